@@ -0,0 +1,91 @@
+"""
+对比每次新建 AsyncClient (冷连接) 与共用连接池 (热连接) 的请求耗时
+
+用法 (在仓库根目录):
+    python -m benchmarks.http_client                       # 本地 HTTP 服务
+    python -m benchmarks.http_client --url https://codeforces.com/api/contest.list
+"""
+
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from httpx import AsyncClient
+
+from plugins.acm.utils.metrics import LatencyRecorder
+from plugins.acm.utils.network import HttpClientManager, Method
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头与响应体分两次写出，关闭 Nagle 避免 keep-alive 连接上的 40ms 延迟确认
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"status":"OK","result":[]}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_local_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def bench(url: str, rounds: int) -> LatencyRecorder:
+    latency = LatencyRecorder()
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        async with AsyncClient() as client:
+            (await client.get(url)).raise_for_status()
+        latency.record("cold", time.perf_counter() - start)
+
+    manager = HttpClientManager()
+    try:
+        # 第一次请求建立连接，不计入热连接耗时
+        await manager.request(Method.GET, url)
+        for _ in range(rounds):
+            start = time.perf_counter()
+            (await manager.request(Method.GET, url)).raise_for_status()
+            latency.record("warm", time.perf_counter() - start)
+    finally:
+        await manager.close()
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="请求的地址，默认使用本地 HTTP 服务")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    server = None
+    url = args.url
+    if not url:
+        server = _start_local_server()
+        url = f"http://127.0.0.1:{server.server_port}/"
+    try:
+        latency = asyncio.run(bench(url, args.rounds))
+    finally:
+        if server:
+            server.shutdown()
+
+    print(f"{url} ({args.rounds} 次)")
+    for name, stats in latency.summary().items():
+        print(f"  {name}: p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+对比原生 SVG 与 Playwright + Chart.js 两种方式生成 Rating 图的耗时与内存
+
+不使用渲染缓存，每轮都重新生成。原生方式统计 Python 分配的峰值内存，
+浏览器方式统计 Playwright 进程树的 RSS；浏览器不可用时只测原生方式。
+
+用法 (在仓库根目录):
+    python -m benchmarks.rating_chart
+    python -m benchmarks.rating_chart --contests 1000 --rounds 50
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from plugins.acm.platforms.codeforces import (
+    RATING_CHART_SCALE,
+    CodeforcesUserRating,
+    webui_helper,
+)
+from plugins.acm.utils.chart import CAIROSVG_AVAILABLE, svg_to_png
+from plugins.acm.utils.metrics import LatencyRecorder
+from plugins.acm.utils.renderer import PlaywrightRenderer
+
+HANDLE = "benchmark"
+
+
+def make_history(contests: int, seed: int = 0) -> List[CodeforcesUserRating]:
+    """生成随机游走的 Rating 历史"""
+    rng = random.Random(seed)
+    rating, start = 1500, 1_300_000_000
+    history = []
+    for i in range(contests):
+        new_rating = max(0, rating + rng.randint(-120, 150))
+        history.append(
+            CodeforcesUserRating(
+                contest_id=i + 1,
+                contest_name=f"Round {i + 1}",
+                handle=HANDLE,
+                new_rating=new_rating,
+                old_rating=rating,
+                rating_update_time_seconds=start + i * 7 * 86400,
+                rank=rng.randint(1, 20000),
+            )
+        )
+        rating = new_rating
+    return history
+
+
+async def bench(history: List[CodeforcesUserRating], rounds: int) -> Dict[str, Any]:
+    latency = LatencyRecorder()
+    result: Dict[str, Any] = {}
+
+    tracemalloc.start()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            svg = webui_helper.render_cf_rating_chart_svg(HANDLE, history)
+            if CAIROSVG_AVAILABLE:
+                svg_to_png(svg, RATING_CHART_SCALE)
+            latency.record("native", time.perf_counter() - start)
+        result["native_peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+    renderer = PlaywrightRenderer()
+    try:
+        if await renderer.start():
+            html = webui_helper.render_cf_rating_chart(HANDLE, history)
+            # 第一次渲染包含页面冷启动，不计入统计
+            await renderer.render(html, scale=RATING_CHART_SCALE)
+            for _ in range(rounds):
+                start = time.perf_counter()
+                await renderer.render(html, scale=RATING_CHART_SCALE)
+                latency.record("browser", time.perf_counter() - start)
+            rss = renderer.memory_usage()
+            result["browser_rss_mb"] = rss / 1024 / 1024 if rss is not None else None
+    finally:
+        await renderer.close()
+
+    result["latency"] = latency.summary()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contests", type=int, default=200, help="历史比赛场数")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    logging.getLogger("playwright").setLevel(logging.CRITICAL)
+
+    result = asyncio.run(bench(make_history(args.contests), args.rounds))
+
+    output = "PNG (cairosvg)" if CAIROSVG_AVAILABLE else "SVG (未安装 cairosvg)"
+    print(f"{args.contests} 场比赛, {args.rounds} 次, 原生输出 {output}")
+    for name, stats in result["latency"].items():
+        print(f"  {name}: p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms")
+    print(f"  native 峰值内存 {result['native_peak_kb']:.1f} KB")
+    if "browser_rss_mb" in result:
+        rss = result["browser_rss_mb"]
+        print(
+            f"  browser RSS {rss:.1f} MB" if rss is not None else "  browser RSS 未知"
+        )
+    else:
+        print("  browser: 浏览器不可用，已跳过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+对比每次新建页面与使用页面池时 PlaywrightRenderer 的渲染耗时 (p50 / p99)
+
+指定 `--max-renders` 时再加一组按渲染次数替换浏览器的对比，
+同时输出替换次数与结束时 Playwright 进程树的 RSS。
+需要可用的 Chromium (`playwright install chromium`)。
+
+用法 (在仓库根目录):
+    python -m benchmarks.renderer
+    python -m benchmarks.renderer --html page.html --rounds 100
+    python -m benchmarks.renderer --rounds 200 --max-renders 50
+"""
+
+import argparse
+import asyncio
+from typing import Any, Dict, Optional
+
+from plugins.acm.utils.metrics import LatencyRecorder
+from plugins.acm.utils.renderer import PlaywrightRenderer
+
+SAMPLE_HTML = """
+<html><body style="font-family: sans-serif">
+<h2>Codeforces Round</h2>
+<table>{rows}</table>
+</body></html>
+""".format(
+    rows="".join(
+        f"<tr><td>{i}</td><td>user{i}</td><td>{3000 - i * 7}</td></tr>"
+        for i in range(1, 51)
+    )
+)
+
+
+async def bench(
+    html_content: str,
+    rounds: int,
+    pool_size: Optional[int] = None,
+    max_renders: int = 0,
+) -> Optional[Dict[str, Any]]:
+    """
+    连续渲染同一段 HTML，`pool_size=0` 时每次新建页面，
+    `max_renders` 大于 0 时每渲染这么多次替换一次浏览器
+    """
+    renderer = PlaywrightRenderer(pool_size=pool_size, browser_max_renders=max_renders)
+    try:
+        if not await renderer.start():
+            return None
+        # 第一次渲染包含浏览器与页面的冷启动，不计入统计
+        await renderer.render(html_content)
+        renderer.latency = LatencyRecorder()
+        for _ in range(rounds):
+            await renderer.render(html_content)
+        return {
+            "latency": renderer.latency.summary(),
+            "recycles": renderer.recycles,
+            "rss": renderer.memory_usage(),
+        }
+    finally:
+        await renderer.close()
+
+
+async def run(html_content: str, rounds: int, max_renders: int):
+    cases = [("no pool", 0, 0), ("pool", None, 0)]
+    if max_renders > 0:
+        cases.append((f"pool + recycle/{max_renders}", None, max_renders))
+    for name, pool_size, case_max_renders in cases:
+        result = await bench(html_content, rounds, pool_size, case_max_renders)
+        if result is None:
+            raise SystemExit("浏览器启动失败，请先运行 playwright install chromium")
+        rss = result["rss"]
+        rss_text = f"{rss / 1024 / 1024:.1f} MB" if rss is not None else "未知"
+        for metric, stats in result["latency"].items():
+            print(
+                f"  {name} [{metric}]: p50 {stats['p50_ms']:.2f} ms, "
+                f"p99 {stats['p99_ms']:.2f} ms, "
+                f"替换浏览器 {result['recycles']} 次, RSS {rss_text}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--html", help="要渲染的 HTML 文件，默认使用内置的表格页面")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument(
+        "--max-renders", type=int, default=0, help="每个浏览器最多渲染的次数"
+    )
+    args = parser.parse_args()
+
+    html_content = SAMPLE_HTML
+    if args.html:
+        with open(args.html, encoding="utf-8") as f:
+            html_content = f.read()
+    print(f"渲染 {args.rounds} 次")
+    asyncio.run(run(html_content, args.rounds, args.max_renders))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 import asyncio
-import os
 import random
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Set
 
 from ncatbot.core import GroupMessageEvent
 from ncatbot.core.helper.forward_constructor import ForwardConstructor
@@ -10,6 +9,7 @@ from ncatbot.utils import get_log, ncatbot_config
 
 from .platforms.codeforces import (
     render_codeforces_rating_chart,
+    render_codeforces_team_rank_image,
     render_codeforces_user_info_image,
 )
 from .platforms.scpc import (
@@ -17,9 +17,10 @@ from .platforms.scpc import (
     render_scpc_user_info_image,
     render_scpc_week_rank_image,
     render_scpc_updated_problems_image,
-    renderer,
 )
 from .utils.ai import ask_deepseek, DEFAULT_SYSTEM_PROMPT
+from .utils.rating_series import DEFAULT_MAX_POINTS
+from .utils.text import image_to_base64, remove_file
 from .utils.webui import webui
 
 if TYPE_CHECKING:
@@ -27,12 +28,25 @@ if TYPE_CHECKING:
 
 LOG = get_log()
 
+PLATFORM_LABELS = {
+    "scpc": "SCPC",
+    "cf": "Codeforces",
+    "nowcoder": "牛客",
+    "luogu": "洛谷",
+}
+# /近期比赛 的整体延迟预算(秒)
+DEFAULT_FANOUT_BUDGET = 3.0
+# 超出预算的平台最多再等待多久补发(秒)
+DEFAULT_FOLLOWUP_TIMEOUT = 30.0
+
+_background_tasks: Set[asyncio.Task] = set()
+
 
 async def send_random_image_logic(plugin: "SCPCPlugin", event: GroupMessageEvent):
     LOG.info(f"用户 {event.user_id} 请求随机图片")
     random_id = random.randint(1, 5)
     image_path = f"plugins/acm/assets/image{random_id}.png"
-    await plugin.api.send_group_image(event.group_id, image_path)
+    await plugin.outbox.send_image(event.group_id, image_path)
 
 
 async def enable_contest_reminders_logic(
@@ -40,7 +54,10 @@ async def enable_contest_reminders_logic(
 ):
     LOG.info(f"用户 {event.user_id} 添加了比赛订阅 至 {event.group_id}")
     plugin.group_listeners[event.group_id] = True
-    await plugin.api.send_group_text(event.group_id, "已为本群开启比赛监听任务")
+    plugin.store.save_subscription(event.group_id, True)
+    for key, fingerprint in plugin.contest_announcer.baseline_group(event.group_id):
+        plugin.store.save_announced(event.group_id, key, fingerprint)
+    await plugin.outbox.send_text(event.group_id, "已为本群开启比赛监听任务")
 
 
 async def disable_contest_reminders_logic(
@@ -48,7 +65,10 @@ async def disable_contest_reminders_logic(
 ):
     LOG.info(f"User {event} removed contest listener for contest")
     plugin.group_listeners[event.group_id] = False
-    await plugin.api.send_group_text(event.group_id, "已为本群关闭比赛监听任务")
+    plugin.store.save_subscription(event.group_id, False)
+    plugin.contest_announcer.forget_group(event.group_id)
+    plugin.store.delete_announced(event.group_id)
+    await plugin.outbox.send_text(event.group_id, "已为本群关闭比赛监听任务")
 
 
 async def get_user_info_logic(
@@ -57,92 +77,104 @@ async def get_user_info_logic(
     data = await plugin.scpc_platform.get_user_info(username)
     if not data:
         LOG.warning(f"获取 SCPC 用户信息失败：{username}")
-        await plugin.api.send_group_text(
+        await plugin.outbox.send_text(
             event.group_id, f"未找到用户 {username} 的信息"
         )
         return
 
-    image_path = await render_scpc_user_info_image(data)
-    if image_path:
-        await plugin.api.send_group_image(event.group_id, image_path)
+    image = await render_scpc_user_info_image(plugin.renderer, data)
+    if image:
+        await plugin.outbox.send_image(event.group_id, image)
     else:
-        await plugin.api.send_group_text(event.group_id, "生成用户信息图片失败")
+        await plugin.outbox.send_text(event.group_id, "生成用户信息图片失败")
+
+
+def _no_contests_text(plugin: "SCPCPlugin", source: str) -> str:
+    """没有比赛可显示时的回复，区分上游请求失败与确实没有比赛"""
+    label = PLATFORM_LABELS[source]
+    if plugin.contest_cache.last_error(source):
+        return f"获取{label}比赛失败，请稍后再试"
+    return f"近期没有{label}比赛"
 
 
 async def get_scpc_week_rank_logic(plugin: "SCPCPlugin", event: GroupMessageEvent):
     rank_data = await plugin.scpc_platform.get_week_rank()
     if not rank_data:
-        await plugin.api.send_group_text(event.group_id, "获取本周排行失败")
+        await plugin.outbox.send_text(event.group_id, "获取本周排行失败")
         return
-    image_path = await render_scpc_week_rank_image(rank_data)
-    if image_path:
-        await plugin.api.send_group_image(event.group_id, image_path)
+    image = await render_scpc_week_rank_image(plugin.renderer, rank_data)
+    if image:
+        await plugin.outbox.send_image(event.group_id, image)
     else:
-        await plugin.api.send_group_text(event.group_id, "生成排行图片失败")
+        await plugin.outbox.send_text(event.group_id, "生成排行图片失败")
 
 
 async def get_codeforces_contests_logic(plugin: "SCPCPlugin", event: GroupMessageEvent):
-    contests = await plugin.codeforces_platform.get_contests()
+    contests = await plugin.contest_cache.get("cf")
     if not contests:
-        await plugin.api.send_group_text(event.group_id, "近期没有Codeforces比赛")
+        await plugin.outbox.send_text(event.group_id, _no_contests_text(plugin, "cf"))
         return
 
     items = plugin._build_contest_texts(contests, False, "cf")
     if not items:
-        await plugin.api.send_group_text(event.group_id, "近期没有Codeforces比赛")
+        await plugin.outbox.send_text(event.group_id, "近期没有Codeforces比赛")
         return
 
     msg = "🏆 Codeforces 近期比赛 🏆\n\n" + "\n\n".join([t for _, t in items])
-    await plugin.api.send_group_text(event.group_id, msg)
+    await plugin.outbox.send_text(event.group_id, msg)
 
 
 async def get_recent_scpc_contests_logic(
     plugin: "SCPCPlugin", event: GroupMessageEvent
 ):
-    contests = await plugin.scpc_platform.get_recent_contests()
+    contests = await plugin.contest_cache.get("scpc")
     if not contests:
-        await plugin.api.send_group_text(event.group_id, "近期没有SCPC比赛")
+        await plugin.outbox.send_text(event.group_id, _no_contests_text(plugin, "scpc"))
         return
 
     items = plugin._build_contest_texts(contests, True, "scpc")
     if not items:
-        await plugin.api.send_group_text(event.group_id, "近期没有SCPC比赛")
+        await plugin.outbox.send_text(event.group_id, "近期没有SCPC比赛")
         return
 
     msg = "🏆 SCPC 近期比赛 🏆\n\n" + "\n\n".join([t for _, t in items])
-    await plugin.api.send_group_text(event.group_id, msg)
+    await plugin.outbox.send_text(event.group_id, msg)
 
 
 async def get_nowcoder_recent_contests_logic(
     plugin: "SCPCPlugin", event: GroupMessageEvent
 ):
-    contests = await plugin.nowcoder_platform.get_contests()
+    contests = await plugin.contest_cache.get("nowcoder")
     if not contests:
-        await plugin.api.send_group_text(event.group_id, "近期没有牛客比赛")
+        await plugin.outbox.send_text(
+            event.group_id, _no_contests_text(plugin, "nowcoder")
+        )
         return
 
     items = plugin._build_contest_texts(contests, False, "nowcoder")
     if not items:
-        await plugin.api.send_group_text(event.group_id, "近期没有牛客比赛")
+        await plugin.outbox.send_text(event.group_id, "近期没有牛客比赛")
         return
 
     msg = "🏆 牛客 近期比赛 🏆\n\n" + "\n\n".join([t for _, t in items])
-    await plugin.api.send_group_text(event.group_id, msg)
+    await plugin.outbox.send_text(event.group_id, msg)
 
 
 async def get_luogu_contests_logic(plugin: "SCPCPlugin", event: GroupMessageEvent):
-    contests = await plugin.luogu_platform.get_contests()
+    contests = await plugin.contest_cache.get("luogu")
     if not contests:
-        await plugin.api.send_group_text(event.group_id, "近期没有洛谷比赛")
+        await plugin.outbox.send_text(
+            event.group_id, _no_contests_text(plugin, "luogu")
+        )
         return
 
     items = plugin._build_contest_texts(contests, False, "luogu")
     if not items:
-        await plugin.api.send_group_text(event.group_id, "近期没有洛谷比赛")
+        await plugin.outbox.send_text(event.group_id, "近期没有洛谷比赛")
         return
 
     msg = "🏆 洛谷 近期比赛 🏆\n\n" + "\n\n".join([t for _, t in items])
-    await plugin.api.send_group_text(event.group_id, msg)
+    await plugin.outbox.send_text(event.group_id, msg)
 
 
 async def get_recent_scpc_updated_problems_logic(
@@ -150,44 +182,46 @@ async def get_recent_scpc_updated_problems_logic(
 ):
     problems = await plugin.scpc_platform.get_recent_updated_problems()
     if not problems:
-        await plugin.api.send_group_text(event.group_id, "近期没有更新题目")
+        await plugin.outbox.send_text(event.group_id, "近期没有更新题目")
         return
 
-    image_path = await render_scpc_updated_problems_image(problems)
+    image = await render_scpc_updated_problems_image(plugin.renderer, problems)
 
     try:
         fcr = ForwardConstructor(user_id=ncatbot_config.bt_uin, nickname="SCPC Bot")
         fcr.attach_text("📝 SCPC 近期更新题目 📝")
 
-        if image_path:
-            fcr.attach_image(image_path)
+        if image:
+            fcr.attach_image(image_to_base64(image))
 
         for p in problems:
             content = f"[{p.problem_id}] {p.title}\n{p.url}"
             fcr.attach_text(content)
 
         forward = fcr.to_forward()
-        await plugin.api.post_group_forward_msg(event.group_id, forward)
+        await plugin.outbox.send_forward(event.group_id, forward)
     except Exception as e:
         LOG.error(f"Send forward message failed: {e}")
-        if image_path:
-            await plugin.api.send_group_image(event.group_id, image_path)
+        if image:
+            await plugin.outbox.send_image(event.group_id, image)
 
         msg = "📝 SCPC 近期更新题目 📝\n\n"
         for p in problems:
             msg += f"[{p.problem_id}] {p.title}\n{p.url}\n\n"
-        await plugin.api.send_group_text(event.group_id, msg)
+        await plugin.outbox.send_text(event.group_id, msg)
 
 
 async def get_codeforces_user_info_logic(
     plugin: "SCPCPlugin", event: GroupMessageEvent, handle: str
 ):
     LOG.info(f"获取 CF 用户信息: {handle}")
-    image_path = await render_codeforces_user_info_image(handle)
-    if image_path:
-        await plugin.api.send_group_image(event.group_id, image_path)
+    image = await render_codeforces_user_info_image(
+        plugin.renderer, handle, users=plugin.cf_users
+    )
+    if image:
+        await plugin.outbox.send_image(event.group_id, image)
     else:
-        await plugin.api.send_group_text(
+        await plugin.outbox.send_text(
             event.group_id, f"无法获取 Codeforces 用户 {handle} 的信息或生成图片失败"
         )
 
@@ -196,16 +230,44 @@ async def get_codeforces_rating_chart_logic(
     plugin: "SCPCPlugin", event: GroupMessageEvent, handle: str
 ):
     LOG.info(f"获取 CF Rating 图表: {handle}")
-    image_path = await render_codeforces_rating_chart(handle)
-    if image_path:
-        await plugin.api.send_group_image(event.group_id, image_path)
+    image = await render_codeforces_rating_chart(
+        plugin.renderer,
+        handle,
+        native=plugin.config.get("rating_chart_native", True),
+        max_points=int(
+            plugin.config.get("rating_chart_max_points", DEFAULT_MAX_POINTS)
+        ),
+        users=plugin.cf_users,
+    )
+    if image:
+        await plugin.outbox.send_image(event.group_id, image)
     else:
-        await plugin.api.send_group_text(
+        await plugin.outbox.send_text(
             event.group_id,
             f"无法获取 Codeforces 用户 {handle} 的 Rating 数据或生成图片失败",
         )
 
 
+async def get_codeforces_team_rank_logic(
+    plugin: "SCPCPlugin", event: GroupMessageEvent
+):
+    handles = [str(h) for h in plugin.config.get("cf_team_handles", []) if h]
+    if not handles:
+        await plugin.outbox.send_text(
+            event.group_id, "未配置队员的 Codeforces 用户名 (cf_team_handles)"
+        )
+        return
+
+    LOG.info(f"获取 CF 队内排行: {len(handles)} 人")
+    image = await render_codeforces_team_rank_image(
+        plugin.renderer, handles, users=plugin.cf_users
+    )
+    if image:
+        await plugin.outbox.send_image(event.group_id, image)
+    else:
+        await plugin.outbox.send_text(event.group_id, "获取 Codeforces 队内排行失败")
+
+
 async def ai_chat_logic(plugin: "SCPCPlugin", event: GroupMessageEvent, question: str):
     LOG.info(f"User {event.user_id} asking AI: {question}")
 
@@ -222,7 +284,7 @@ async def ai_chat_logic(plugin: "SCPCPlugin", event: GroupMessageEvent, question
 
     # Construct reply
     reply = f"🤖 AI 回复:\n{answer}"
-    await plugin.api.send_group_text(event.group_id, reply)
+    await plugin.outbox.send_text(event.group_id, reply)
 
 
 async def get_scpc_contest_rank_logic(
@@ -232,57 +294,114 @@ async def get_scpc_contest_rank_logic(
 
     rank_data = await plugin.scpc_platform.get_contest_rank(contest_id)
     if not rank_data:
-        await plugin.api.send_group_text(event.group_id, "获取比赛排行失败")
+        await plugin.outbox.send_text(event.group_id, "获取比赛排行失败")
         return
     path = await generate_excel_contest_rank(rank_data, contest_id)
     if path:
         try:
-            await plugin.api.send_group_file(event.group_id, path)
-        except AttributeError:
-            await plugin.api.send_group_text(
-                event.group_id, f"生成表格成功，但发送文件失败。路径: {path}"
+            await plugin.outbox.send_file(
+                event.group_id, path, name=f"SCPC_{contest_id}.xlsx"
             )
+        except AttributeError:
+            await plugin.outbox.send_text(event.group_id, "生成表格成功，但发送文件失败")
+        finally:
+            remove_file(path)
     else:
-        await plugin.api.send_group_text(event.group_id, "生成排行表格失败")
+        await plugin.outbox.send_text(event.group_id, "生成排行表格失败")
+
+
+def _build_all_contest_items(plugin: "SCPCPlugin", results: Dict[str, list]):
+    items = []
+    for source, contests in results.items():
+        if contests:
+            items.extend(
+                plugin._build_contest_texts(contests, source == "scpc", source)
+            )
+    items.sort(key=lambda x: x[0])
+    return items
+
+
+async def _send_late_contests(
+    plugin: "SCPCPlugin",
+    group_id,
+    pending: Dict[str, "asyncio.Task"],
+    timeout: float,
+):
+    """
+    等待超出预算的平台返回后补发一条消息
+    """
+    done, still_pending = await asyncio.wait(pending.values(), timeout=timeout)
+    for task in still_pending:
+        task.cancel()
+
+    results = {
+        source: task.result()
+        for source, task in pending.items()
+        if task in done and not task.exception()
+    }
+    items = _build_all_contest_items(plugin, results)
+    if not items:
+        return
+
+    names = "、".join(PLATFORM_LABELS.get(s, s) for s in results)
+    msg = f"📬 补充 {names} 比赛 📬\n" + "\n\n".join([t for _, t in items])
+    try:
+        await plugin.outbox.send_text(group_id, msg)
+    except Exception as e:
+        LOG.error(f"补发比赛信息失败: {e}")
 
 
 async def get_all_recent_contests_logic(plugin: "SCPCPlugin", event: GroupMessageEvent):
     LOG.info(f"User {event.user_id} requesting all recent contests")
 
-    tasks = [
-        plugin.scpc_platform.get_recent_contests(),
-        plugin.codeforces_platform.get_contests(),
-        plugin.nowcoder_platform.get_contests(),
-        plugin.luogu_platform.get_contests(),
-    ]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    budget = float(plugin.config.get("contest_fanout_budget", DEFAULT_FANOUT_BUDGET))
+    loop = asyncio.get_running_loop()
+    tasks = {
+        source: loop.create_task(plugin.contest_cache.get(source))
+        for source in PLATFORM_LABELS
+    }
+    done, _ = await asyncio.wait(tasks.values(), timeout=budget)
+
+    results = {}
+    missing = []
+    for source, task in tasks.items():
+        if task in done and not task.exception():
+            results[source] = task.result()
+        else:
+            missing.append(source)
+
+    pending = {s: t for s, t in tasks.items() if t not in done}
+    if pending:
+        if plugin.config.get("contest_followup_late", True):
+            followup = loop.create_task(
+                _send_late_contests(
+                    plugin, event.group_id, pending, DEFAULT_FOLLOWUP_TIMEOUT
+                )
+            )
+            _background_tasks.add(followup)
+            followup.add_done_callback(_background_tasks.discard)
+        else:
+            for task in pending.values():
+                task.cancel()
 
-    scpc_contests = results[0] if not isinstance(results[0], Exception) else []
-    cf_contests = results[1] if not isinstance(results[1], Exception) else []
-    nowcoder_contests = results[2] if not isinstance(results[2], Exception) else []
-    luogu_contests = results[3] if not isinstance(results[3], Exception) else []
+    items = _build_all_contest_items(plugin, results)
 
-    items = []
-    if scpc_contests:
-        items.extend(plugin._build_contest_texts(scpc_contests, True, "scpc"))
-    if cf_contests:
-        items.extend(plugin._build_contest_texts(cf_contests, False, "cf"))
-    if nowcoder_contests:
-        items.extend(plugin._build_contest_texts(nowcoder_contests, False, "nowcoder"))
-    if luogu_contests:
-        items.extend(plugin._build_contest_texts(luogu_contests, False, "luogu"))
-
-    items.sort(key=lambda x: x[0])
+    missing_note = ""
+    if missing:
+        names = "、".join(PLATFORM_LABELS[s] for s in missing)
+        missing_note = f"\n\n⚠️ {names} 暂未响应"
+        if pending and plugin.config.get("contest_followup_late", True):
+            missing_note += "，稍后补发"
 
     if not items:
-        await plugin.api.send_group_text(event.group_id, "近期没有比赛")
+        await plugin.outbox.send_text(event.group_id, "近期没有比赛" + missing_note)
         return
 
     header = "🏆 近期比赛预告 🏆\n"
     content = "\n\n".join([t for _, t in items])
-    msg = header + content
+    msg = header + content + missing_note
 
-    await plugin.api.send_group_text(event.group_id, msg)
+    await plugin.outbox.send_text(event.group_id, msg)
 
 
 async def get_help_logic(plugin: "SCPCPlugin", event: GroupMessageEvent):
@@ -313,23 +432,18 @@ async def get_help_logic(plugin: "SCPCPlugin", event: GroupMessageEvent):
             "desc": "获取 Codeforces 用户 Rating 变化图",
             "is_admin": False,
         },
+        {
+            "name": "/cf排行",
+            "desc": "获取队员 Codeforces Rating 排行",
+            "is_admin": False,
+        },
         {"name": "/ai [question]", "desc": "询问 AI 问题", "is_admin": False},
     ]
 
     html = webui.render_help(commands_list, plugin.version)
+    image = await plugin.renderer.render(html)
 
-    # Save to temp file
-    temp_path = os.path.abspath(f"data/temp_help_{event.group_id}.png")
-    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-
-    success = await renderer.render_html(html, temp_path)
-
-    if success:
-        await plugin.api.send_group_image(event.group_id, temp_path)
-        # Cleanup
-        try:
-            os.remove(temp_path)
-        except Exception:
-            pass
+    if image:
+        await plugin.outbox.send_image(event.group_id, image)
     else:
-        await plugin.api.send_group_text(event.group_id, "生成帮助图片失败")
+        await plugin.outbox.send_text(event.group_id, "生成帮助图片失败")
@@ -1,20 +1,36 @@
-import os
-from dataclasses import dataclass
-from typing import List, Optional
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
 
 from ncatbot.utils import get_log
 
 from ..utils import webui
-from ..utils.network import fetch_json
+from ..utils.chart import CAIROSVG_AVAILABLE, svg_to_png
+from ..utils.network import FetchError, SingleFlight, fetch_json
+from ..utils.rating_series import DEFAULT_MAX_POINTS
 from ..utils.renderer import PlaywrightRenderer
 from .platform import Contest, Platform
 
 LOG = get_log()
 
-# Initialize global renderer
-renderer = PlaywrightRenderer()
 webui_helper = webui.WebUI()
 
+# Rating 曲线按 2 倍像素比渲染，线条与坐标文字更清晰
+RATING_CHART_SCALE = 2
+
+# 用户资料与 Rating 记录的缓存有效期(秒)，Rating 记录只在比赛结束后变化
+DEFAULT_PROFILE_TTL = 600.0
+DEFAULT_HISTORY_TTL = 3600.0
+DEFAULT_MAX_CACHED_HANDLES = 1024
+
+# 一次 user.info 请求查询的用户数，受 URL 长度限制
+CF_USER_INFO_BATCH = 200
+# 批量查询中剔除不存在的用户后重试的次数上限
+CF_MISSING_HANDLE_RETRIES = 5
+CF_MISSING_HANDLE_PREFIX = "handles: User with handle "
+
 
 def codeforces_contests_url(include_gym: bool = False) -> str:
     """
@@ -38,11 +54,29 @@ def codeforces_user_rating_url(username: str) -> str:
 
 def codeforces_user_info_url(username: str) -> str:
     """
-    返回指定用户信息 API 的 URL
+    返回指定用户信息 API 的 URL，多个用户名用 `;` 分隔
     """
     return f"https://codeforces.com/api/user.info?handles={username}"
 
 
+def _unique_handles(handles: Iterable[str]) -> List[str]:
+    """去掉空白与重复的用户名 (Codeforces 用户名不区分大小写)"""
+    unique: Dict[str, str] = {}
+    for handle in handles:
+        handle = handle.strip()
+        if handle:
+            unique.setdefault(handle.lower(), handle)
+    return list(unique.values())
+
+
+def _missing_handle(comment: str) -> Optional[str]:
+    """从 user.info 的错误信息中取出不存在的用户名"""
+    if not comment.startswith(CF_MISSING_HANDLE_PREFIX):
+        return None
+    rest = comment[len(CF_MISSING_HANDLE_PREFIX) :]
+    return rest.split(" ", 1)[0] or None
+
+
 @dataclass
 class CodeforcesUser:
     handle: str
@@ -70,10 +104,29 @@ class CodeforcesUserRating:
     rank: int  # 排名
 
 
+def _parse_user(data: Dict[str, Any]) -> CodeforcesUser:
+    return CodeforcesUser(
+        handle=data.get("handle", ""),
+        rating=data.get("rating", 0),
+        max_rating=data.get("maxRating", 0),
+        rank=data.get("rank", ""),
+        max_rank=data.get("maxRank", ""),
+        avatar=data.get("avatar", ""),
+        title_photo=data.get("titlePhoto", ""),
+        contribution=data.get("contribution", 0),
+        friend_of_count=data.get("friendOfCount", 0),
+        organization=data.get("organization", ""),
+        country=data.get("country", ""),
+        city=data.get("city", ""),
+    )
+
+
 class CodeforcesPlatform(Platform):
 
     async def get_contests(self) -> List[Contest]:
-        response = await fetch_json(codeforces_contests_url())
+        response = await fetch_json(codeforces_contests_url(), raise_on_error=True)
+        if response.get("status") != "OK":
+            raise FetchError(f"Codeforces API 返回失败: {response.get('comment')}")
         records = response.get("result", [])
         contests: List[Contest] = []
         for entry in records:
@@ -97,26 +150,54 @@ class CodeforcesPlatform(Platform):
         result = response.get("result", [])
         if not result:
             return None
+        return _parse_user(result[0])
 
-        data = result[0]
-        return CodeforcesUser(
-            handle=data.get("handle", ""),
-            rating=data.get("rating", 0),
-            max_rating=data.get("maxRating", 0),
-            rank=data.get("rank", ""),
-            max_rank=data.get("maxRank", ""),
-            avatar=data.get("avatar", ""),
-            title_photo=data.get("titlePhoto", ""),
-            contribution=data.get("contribution", 0),
-            friend_of_count=data.get("friendOfCount", 0),
-            organization=data.get("organization", ""),
-            country=data.get("country", ""),
-            city=data.get("city", ""),
-        )
+    async def get_users_info(self, handles: Iterable[str]) -> Dict[str, CodeforcesUser]:
+        """
+        批量获取用户信息，返回 小写用户名 -> 用户信息
+
+        每 CF_USER_INFO_BATCH 个用户合并为一次请求。某个用户不存在时
+        整批请求会失败，此时剔除该用户后重试；不存在的用户不出现在结果中。
+        """
+        unique = _unique_handles(handles)
+        users: Dict[str, CodeforcesUser] = {}
+        for i in range(0, len(unique), CF_USER_INFO_BATCH):
+            chunk = unique[i : i + CF_USER_INFO_BATCH]
+            for _ in range(CF_MISSING_HANDLE_RETRIES + 1):
+                if not chunk:
+                    break
+                response = await fetch_json(
+                    codeforces_user_info_url(";".join(chunk)), error_json=True
+                )
+                if response.get("status") == "OK":
+                    for data in response.get("result", []):
+                        user = _parse_user(data)
+                        users[user.handle.lower()] = user
+                    break
+                missing = _missing_handle(str(response.get("comment", "")))
+                if missing is None:
+                    LOG.warning(f"批量获取 CF 用户信息失败: {response.get('comment')}")
+                    break
+                LOG.info(f"CF 用户 {missing} 不存在，已从批量查询中剔除")
+                chunk = [h for h in chunk if h.lower() != missing.lower()]
+        return users
 
-    async def get_user_rating_history(self, handle: str) -> List[CodeforcesUserRating]:
-        response = await fetch_json(codeforces_user_rating_url(handle))
+    async def get_user_rating_history(
+        self, handle: str, raise_on_error: bool = False
+    ) -> List[CodeforcesUserRating]:
+        """
+        获取用户参加过的 rated 比赛记录
+
+        Args:
+            raise_on_error: 请求失败时抛出 FetchError 而不是返回空列表，
+                用来区分接口失败与没有参加过比赛
+        """
+        response = await fetch_json(
+            codeforces_user_rating_url(handle), raise_on_error=raise_on_error
+        )
         if not response or response.get("status") != "OK":
+            if raise_on_error:
+                raise FetchError(f"Codeforces API 返回失败: {response.get('comment')}")
             return []
 
         records = response.get("result", [])
@@ -138,33 +219,267 @@ class CodeforcesPlatform(Platform):
         return history
 
 
-async def render_codeforces_user_info_image(handle: str) -> Optional[str]:
-    platform = CodeforcesPlatform()
-    user = await platform.get_user_info(handle)
+@dataclass
+class _CachedHandle:
+    profile: Optional[CodeforcesUser] = None
+    profile_at: float = 0.0  # 获取时间，0 表示从未获取或已失效
+    history: List[CodeforcesUserRating] = field(default_factory=list)
+    history_at: float = 0.0
+
+
+class CodeforcesUserCache:
+    """
+    按用户名缓存 Codeforces 用户资料与 Rating 记录
+
+    - 资料与 Rating 记录分别使用 `profile_ttl` 与 `history_ttl`
+    - 过期后立即返回旧数据并在后台刷新，上游失败时继续使用旧数据
+    - Rating 记录刷新时只追加比最后一条缓存记录更新的比赛
+    - 资料中的当前积分与最后一条 Rating 记录不一致时，说明有新比赛，
+      Rating 记录立即失效
+
+    同一用户的并发请求会被合并，缓存的用户数超过上限时淘汰最久未使用的。
+    """
+
+    def __init__(
+        self,
+        platform: Optional["CodeforcesPlatform"] = None,
+        profile_ttl: float = DEFAULT_PROFILE_TTL,
+        history_ttl: float = DEFAULT_HISTORY_TTL,
+        max_handles: int = DEFAULT_MAX_CACHED_HANDLES,
+    ):
+        self.platform = platform or CodeforcesPlatform()
+        self.profile_ttl = profile_ttl
+        self.history_ttl = history_ttl
+        self.max_handles = max_handles
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _CachedHandle]" = OrderedDict()
+        self._flight = SingleFlight()
+        self._background: Set[asyncio.Task] = set()
+
+    def _entry(self, handle: str) -> _CachedHandle:
+        key = handle.lower()
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _CachedHandle()
+            self._entries[key] = entry
+            while len(self._entries) > self.max_handles:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(key)
+        return entry
+
+    async def get_user_info(self, handle: str) -> Optional[CodeforcesUser]:
+        entry = self._entry(handle)
+        if entry.profile is None:
+            self.misses += 1
+            return await self.refresh_user_info(handle)
+        self.hits += 1
+        if time.time() - entry.profile_at >= self.profile_ttl:
+            self._refresh_in_background(self.refresh_user_info, handle)
+        return entry.profile
+
+    async def get_rating_history(self, handle: str) -> List[CodeforcesUserRating]:
+        entry = self._entry(handle)
+        if entry.history_at == 0.0:
+            # 从未获取，或已知有新比赛，同步刷新
+            self.misses += 1
+            return await self.refresh_rating_history(handle)
+        self.hits += 1
+        if time.time() - entry.history_at >= self.history_ttl:
+            self._refresh_in_background(self.refresh_rating_history, handle)
+        return entry.history
+
+    async def get_users_info(self, handles: Iterable[str]) -> Dict[str, CodeforcesUser]:
+        """
+        批量获取用户信息，返回 小写用户名 -> 用户信息
+
+        未缓存或已过期的用户合并为尽量少的 user.info 请求同步获取，
+        请求失败的用户使用旧数据 (如果有)。
+        """
+        users: Dict[str, CodeforcesUser] = {}
+        stale: List[str] = []
+        now = time.time()
+        for handle in _unique_handles(handles):
+            entry = self._entry(handle)
+            if entry.profile is not None:
+                users[handle.lower()] = entry.profile
+            if entry.profile is None or now - entry.profile_at >= self.profile_ttl:
+                self.misses += 1
+                stale.append(handle)
+            else:
+                self.hits += 1
+
+        if stale:
+            fetched = await self.platform.get_users_info(stale)
+            for key, user in fetched.items():
+                self._store_profile(self._entry(key), user)
+                users[key] = user
+        return users
+
+    async def refresh_user_info(self, handle: str) -> Optional[CodeforcesUser]:
+        return await self._flight.do(
+            ("profile", handle.lower()), lambda: self._do_refresh_user_info(handle)
+        )
+
+    async def refresh_rating_history(
+        self, handle: str
+    ) -> List[CodeforcesUserRating]:
+        return await self._flight.do(
+            ("history", handle.lower()),
+            lambda: self._do_refresh_rating_history(handle),
+        )
+
+    async def _do_refresh_user_info(self, handle: str) -> Optional[CodeforcesUser]:
+        entry = self._entry(handle)
+        user = await self.platform.get_user_info(handle)
+        if user is None:
+            if entry.profile is not None:
+                LOG.warning(f"刷新 CF 用户 {handle} 资料失败，继续使用旧数据")
+            return entry.profile
+
+        self._store_profile(entry, user)
+        return user
+
+    def _store_profile(self, entry: _CachedHandle, user: CodeforcesUser):
+        entry.profile, entry.profile_at = user, time.time()
+        if entry.history and entry.history[-1].new_rating != user.rating:
+            entry.history_at = 0.0
+
+    async def _do_refresh_rating_history(
+        self, handle: str
+    ) -> List[CodeforcesUserRating]:
+        entry = self._entry(handle)
+        try:
+            fetched = await self.platform.get_user_rating_history(
+                handle, raise_on_error=True
+            )
+        except FetchError as e:
+            # 不更新获取时间，下次请求会重新获取
+            if entry.history:
+                LOG.warning(
+                    f"刷新 CF 用户 {handle} Rating 记录失败，继续使用旧数据: {e}"
+                )
+            return entry.history
+
+        if entry.history and len(fetched) >= len(entry.history):
+            last = entry.history[-1].rating_update_time_seconds
+            entry.history.extend(
+                h for h in fetched if h.rating_update_time_seconds > last
+            )
+        else:
+            entry.history = fetched
+        entry.history_at = time.time()
+        return entry.history
+
+    def _refresh_in_background(
+        self, refresh: Callable[[str], Awaitable[Any]], handle: str
+    ):
+        task = asyncio.get_running_loop().create_task(refresh(handle))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def stats(self) -> Dict[str, int]:
+        return {"handles": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+async def render_codeforces_user_info_image(
+    renderer: PlaywrightRenderer,
+    handle: str,
+    users: Optional[CodeforcesUserCache] = None,
+) -> Optional[bytes]:
+    if users:
+        user = await users.get_user_info(handle)
+    else:
+        user = await CodeforcesPlatform().get_user_info(handle)
     if not user:
         return None
 
     try:
         html = webui_helper.render_cf_user_info(user)
-        out_path = os.path.abspath(f"plugins/acm/assets/cf_user_{handle}.png")
-        success = await renderer.render_html(html, out_path)
-        return out_path if success else None
+        return await renderer.render(html)
     except Exception as e:
         LOG.error(f"Render CF user info failed: {e}")
         return None
 
 
-async def render_codeforces_rating_chart(handle: str) -> Optional[str]:
-    platform = CodeforcesPlatform()
-    history = await platform.get_user_rating_history(handle)
+def rank_codeforces_users(users: Iterable[CodeforcesUser]) -> List[CodeforcesUser]:
+    """按当前积分、历史最高积分降序排列，同分按用户名排序"""
+    return sorted(users, key=lambda u: (-u.rating, -u.max_rating, u.handle.lower()))
+
+
+async def render_codeforces_team_rank_image(
+    renderer: PlaywrightRenderer,
+    handles: List[str],
+    users: Optional[CodeforcesUserCache] = None,
+) -> Optional[bytes]:
+    """
+    生成一组用户按 Rating 排序的排行图片，用户信息批量获取
+
+    传入 `users` 时优先使用缓存，只请求未缓存或已过期的用户。
+    """
+    if users:
+        found = await users.get_users_info(handles)
+    else:
+        found = await CodeforcesPlatform().get_users_info(handles)
+    if not found:
+        return None
+
+    try:
+        html = webui_helper.render_cf_rank(rank_codeforces_users(found.values()))
+        return await renderer.render(html)
+    except Exception as e:
+        LOG.error(f"Render CF team rank failed: {e}")
+        return None
+
+
+async def render_codeforces_rating_chart(
+    renderer: PlaywrightRenderer,
+    handle: str,
+    native: bool = True,
+    max_points: int = DEFAULT_MAX_POINTS,
+    users: Optional[CodeforcesUserCache] = None,
+) -> Optional[bytes]:
+    """
+    生成 Rating 曲线图片
+
+    `native` 为 True 时在 Python 中直接生成 SVG 并转为 PNG，失败时
+    回退到浏览器中的 Chart.js 页面。比赛场数超过 `max_points` 时降采样。
+    传入 `users` 时 Rating 记录从缓存读取。
+    """
+    if users:
+        history = await users.get_rating_history(handle)
+    else:
+        history = await CodeforcesPlatform().get_user_rating_history(handle)
     if not history:
         return None
 
     try:
-        html = webui_helper.render_cf_rating_chart(handle, history)
-        out_path = os.path.abspath(f"plugins/acm/assets/cf_rating_{handle}.png")
-        success = await renderer.render_html(html, out_path)
-        return out_path if success else None
+        if native:
+            image = await render_native_rating_chart(
+                renderer, handle, history, max_points
+            )
+            if image:
+                return image
+            LOG.warning("原生 Rating 图表生成失败，改用 Chart.js 渲染")
+        html = webui_helper.render_cf_rating_chart(handle, history, max_points)
+        return await renderer.render(html, scale=RATING_CHART_SCALE)
     except Exception as e:
         LOG.error(f"Render CF rating chart failed: {e}")
         return None
+
+
+async def render_native_rating_chart(
+    renderer: PlaywrightRenderer,
+    handle: str,
+    history: List[CodeforcesUserRating],
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> Optional[bytes]:
+    """
+    不经过 Chart.js 生成 Rating 曲线：安装了 cairosvg 时完全不使用浏览器，
+    否则由浏览器直接截图 SVG (不加载任何外部脚本)
+    """
+    svg = webui_helper.render_cf_rating_chart_svg(handle, history, max_points)
+    if CAIROSVG_AVAILABLE:
+        return await asyncio.to_thread(svg_to_png, svg, RATING_CHART_SCALE)
+    html = webui_helper.render_svg_page(svg)
+    return await renderer.render(html, image_format="png", scale=RATING_CHART_SCALE)
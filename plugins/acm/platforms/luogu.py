@@ -2,7 +2,7 @@ from typing import List
 
 from ncatbot.utils import get_log
 
-from ..utils.network import fetch_json
+from ..utils.network import FetchError, fetch_json
 from .platform import Contest, Platform
 
 LOG = get_log()
@@ -19,7 +19,7 @@ class LuoguPlatform(Platform):
 
     async def get_contests(self) -> List[Contest]:
         try:
-            response = await fetch_json(luogu_contest_url())
+            response = await fetch_json(luogu_contest_url(), raise_on_error=True)
             if (
                 not response
                 or "currentData" not in response
@@ -42,6 +42,8 @@ class LuoguPlatform(Platform):
                 )
                 contests.append(contest)
             return contests
+        except FetchError:
+            raise
         except Exception as e:
             LOG.error(f"Failed to get Luogu contests: {e}")
             return []
@@ -5,7 +5,7 @@ from typing import List
 from bs4 import BeautifulSoup, Tag
 from ncatbot.utils import get_log
 
-from ..utils.network import fetch_html
+from ..utils.network import FetchError, fetch_html
 from .platform import Contest, Platform
 
 LOG = get_log()
@@ -23,7 +23,6 @@ NOWCODER_HEADER = {
     "Referer": "https://ac.nowcoder.com/acm/contest/vip-index",
     "Content-Type": "application/json",
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.77 Safari/537.36",
-    "Connection": "close",
 }
 
 
@@ -32,7 +31,9 @@ class NowcoderPlatform(Platform):
     async def get_contests(self) -> List[Contest]:
         try:
             content = await fetch_html(
-                nowcoder_recent_contests_url(), headers=NOWCODER_HEADER
+                nowcoder_recent_contests_url(),
+                headers=NOWCODER_HEADER,
+                raise_on_error=True,
             )
             soup = BeautifulSoup(content, "html.parser")
             find_item = soup.find("div", class_="platform-mod js-current")
@@ -60,6 +61,8 @@ class NowcoderPlatform(Platform):
                     LOG.error(f"Failed to parse Nowcoder contest item: {e}")
                     continue
             return contests
+        except FetchError:
+            raise
         except Exception as e:
             LOG.error(f"Failed to get Nowcoder contests: {e}")
             return []
@@ -29,5 +29,8 @@ class Platform(metaclass=ABCMeta):
 
         Returns:
             比赛列表
+
+        Raises:
+            FetchError: 上游接口不可用时抛出，便于缓存层保留上一次的快照
         """
         pass
@@ -1,23 +1,23 @@
 import os
+import tempfile
 from dataclasses import dataclass, fields
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 import xlsxwriter
-from httpx import AsyncClient
 from ncatbot.utils import get_log
 
-from ..utils.network import Method, fetch_json
+from ..utils.network import Method, fetch_json, limited_request
 from ..utils.renderer import PlaywrightRenderer
-from ..utils.text import calculate_accept_ratio
+from ..utils.text import calculate_accept_ratio, remove_file
 from ..utils.webui import WebUI
 from .platform import Contest, Platform
 
 LOG = get_log()
 
-# Initialize global renderer
-renderer = PlaywrightRenderer()
 webui_helper = WebUI()
+# 需要以文件形式发送的临时产物(如 Excel 表格)的存放目录
+TEMP_DIR = os.path.abspath("data/tmp")
 
 
 def parse_scpc_time(value: Any) -> int:
@@ -158,22 +158,21 @@ class SCPCPlatform(Platform):
 
     async def login(self):
         try:
-            async with AsyncClient() as client:
-                response = await client.post(
-                    scpc_login_url(),
-                    headers={
-                        "Host": "scpc.fun",
-                        "Origin": "http://scpc.fun",
-                        "Referer": "http://scpc.fun/home",
-                        "Content-Type": "application/json",
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.77 Safari/537.36",
-                        "Connection": "close",
-                    },
-                    json={
-                        "password": self.password,
-                        "username": self.username,
-                    },
-                )
+            response = await limited_request(
+                Method.POST,
+                scpc_login_url(),
+                headers={
+                    "Host": "scpc.fun",
+                    "Origin": "http://scpc.fun",
+                    "Referer": "http://scpc.fun/home",
+                    "Content-Type": "application/json",
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.77 Safari/537.36",
+                },
+                payload={
+                    "password": self.password,
+                    "username": self.username,
+                },
+            )
             if "Authorization" in response.headers:
                 self.token = response.headers["Authorization"]
             else:
@@ -284,7 +283,7 @@ class SCPCPlatform(Platform):
         """
         获取 SCPC 近期比赛并直接返回统一 `Contest` 列表
         """
-        response = await fetch_json(scpc_recent_contest_url())
+        response = await fetch_json(scpc_recent_contest_url(), raise_on_error=True)
         if not response or "data" not in response:
             return []
         records = response.get("data") or []
@@ -327,7 +326,7 @@ class SCPCPlatform(Platform):
         return problems
 
     async def get_contests(self) -> List[Contest]:
-        json_data = await fetch_json(scpc_contests_url())
+        json_data = await fetch_json(scpc_contests_url(), raise_on_error=True)
         records = (
             json_data.get("data", {}).get("records") or json_data.get("records") or []
         )
@@ -357,29 +356,31 @@ class SCPCPlatform(Platform):
 # ----------------------------
 
 
-async def render_scpc_week_rank_image(users: list) -> Optional[str]:
+async def render_scpc_week_rank_image(
+    renderer: PlaywrightRenderer, users: list
+) -> Optional[bytes]:
     try:
         html = webui_helper.render_week_rank(users)
-        out_path = os.path.abspath("plugins/acm/assets/scpc_week_rank.png")
-        success = await renderer.render_html(html, out_path)
-        return out_path if success else None
+        return await renderer.render(html)
     except Exception as e:
         LOG.error(f"Render SCPC week rank failed: {e}")
         return None
 
 
-async def render_scpc_updated_problems_image(problems: list) -> Optional[str]:
+async def render_scpc_updated_problems_image(
+    renderer: PlaywrightRenderer, problems: list
+) -> Optional[bytes]:
     try:
         html = webui_helper.render_updated_problems(problems)
-        out_path = os.path.abspath("plugins/acm/assets/scpc_updated_problems.png")
-        success = await renderer.render_html(html, out_path)
-        return out_path if success else None
+        return await renderer.render(html)
     except Exception as e:
         LOG.error(f"Render SCPC updated problems failed: {e}")
         return None
 
 
-async def render_scpc_user_info_image(user: ScpcUser) -> Optional[str]:
+async def render_scpc_user_info_image(
+    renderer: PlaywrightRenderer, user: ScpcUser
+) -> Optional[bytes]:
     try:
         ac_count = len(user.solved_list)
         ratio = calculate_accept_ratio(ac_count, user.total)
@@ -394,20 +395,18 @@ async def render_scpc_user_info_image(user: ScpcUser) -> Optional[str]:
             user.username,
             user.avatar,
         )
-        out_path = os.path.abspath(f"plugins/acm/assets/scpc_user_{user.username}.png")
-        success = await renderer.render_html(html, out_path)
-        return out_path if success else None
+        return await renderer.render(html)
     except Exception as e:
         LOG.error(f"Render SCPC user info failed: {e}")
         return None
 
 
-async def render_scpc_contests_image(contests: List[Contest]) -> Optional[str]:
+async def render_scpc_contests_image(
+    renderer: PlaywrightRenderer, contests: List[Contest]
+) -> Optional[bytes]:
     try:
         html = webui_helper.render_contests(contests)
-        out_path = os.path.abspath("plugins/acm/assets/scpc_contests.png")
-        success = await renderer.render_html(html, out_path)
-        return out_path if success else None
+        return await renderer.render(html)
     except Exception as e:
         LOG.error(f"Render SCPC contests failed: {e}")
         return None
@@ -419,8 +418,14 @@ async def generate_excel_contest_rank(
     if not rank_users:
         return None
 
+    filename = None
     try:
-        filename = f"SCPC_{contest_id}.xlsx"
+        # 每次生成唯一的临时文件，避免并发请求互相覆盖；发送后由调用方删除
+        os.makedirs(TEMP_DIR, exist_ok=True)
+        fd, filename = tempfile.mkstemp(
+            prefix=f"SCPC_{contest_id}_", suffix=".xlsx", dir=TEMP_DIR
+        )
+        os.close(fd)
         workbook = xlsxwriter.Workbook(filename)
         worksheet = workbook.add_worksheet()
         header_format = workbook.add_format(
@@ -506,7 +511,9 @@ async def generate_excel_contest_rank(
             worksheet.set_column(col, col, width)
 
         workbook.close()
-        return os.path.abspath(filename)
+        return filename
     except Exception as e:
         LOG.error(f"Generate Excel rank failed: {e}")
+        if filename:
+            remove_file(filename)
         return None
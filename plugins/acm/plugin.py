@@ -1,6 +1,6 @@
 import asyncio
 from datetime import datetime
-from typing import Dict, List, Set, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from ncatbot.core.event import GroupMessageEvent
 from ncatbot.plugin_system import (
@@ -12,12 +12,74 @@ from ncatbot.plugin_system import (
 from ncatbot.utils import get_log
 
 from . import commands
-from .platforms.codeforces import CodeforcesPlatform
+from .platforms.codeforces import (
+    DEFAULT_HISTORY_TTL,
+    DEFAULT_PROFILE_TTL,
+    CodeforcesPlatform,
+    CodeforcesUserCache,
+)
 from .platforms.luogu import LuoguPlatform
 from .platforms.nowcoder import NowcoderPlatform
 from .platforms.platform import Contest
 from .platforms.scpc import SCPCPlatform
 from .utils.ai import DEFAULT_SYSTEM_PROMPT
+from .utils.announcer import ContestAnnouncer, ContestChange
+from .utils.assets import (
+    DEFAULT_ASSET_CACHE_DIR,
+    DEFAULT_ASSET_CACHE_MAX_BYTES,
+    DEFAULT_ASSET_TTL,
+    DEFAULT_FETCH_TIMEOUT,
+    AssetResolver,
+)
+from .utils.broadcast import (
+    DEFAULT_GLOBAL_BURST,
+    DEFAULT_GLOBAL_RATE,
+    DEFAULT_GROUP_BURST,
+    DEFAULT_GROUP_RATE,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_WORKERS,
+    Broadcaster,
+    log_broadcast_result,
+)
+from .utils.cache import DEFAULT_CONTEST_TTL, ContestCache
+from .utils.disk_cache import DiskCache
+from .utils.network import (
+    DEFAULT_HOST_LIMITS,
+    DEFAULT_HTTP_RETRIES,
+    host_limiter,
+    http_client,
+    single_flight,
+)
+from .utils.outbox import (
+    DEFAULT_MERGE_CHARS,
+    DEFAULT_OUTBOX_WORKERS,
+    Outbox,
+    log_outbox_stats,
+)
+from .utils.rating_series import DEFAULT_MAX_POINTS
+from .utils.render_cache import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_MAX_BYTES,
+    DEFAULT_TTL,
+    RenderCache,
+)
+from .utils.render_pool import RenderProcessPool
+from .utils.renderer import (
+    BROWSER_MAX_RENDERS,
+    BROWSER_MAX_RSS,
+    DEFAULT_IMAGE_FORMAT,
+    DEFAULT_IMAGE_QUALITY,
+    MAX_CONCURRENT_RENDERS,
+    PAGE_MAX_USES,
+    PlaywrightRenderer,
+)
+from .utils.reminder import DEFAULT_LEAD_TIMES, ReminderEngine, format_lead_time
+from .utils.scheduler import (
+    DEFAULT_REFRESH_INTERVALS,
+    DEFAULT_REFRESH_JITTER,
+    RefreshScheduler,
+)
+from .utils.store import DEFAULT_STORE_PATH, LocalStore
 
 LOG = get_log()
 
@@ -29,19 +91,35 @@ class SCPCPlugin(NcatBotPlugin):
     description = "专为西南科技大学 SCPC 团队 打造的 ncatbot 机器人插件"
 
     group_listeners: Dict[str, bool] = {}
-    cf_alerted_ids: Set[int] = set()
+    # 各群已播报的比赛 (平台, 比赛ID)，用于只推送新增与变更的比赛
+    contest_announcer = ContestAnnouncer()
 
     codeforces_platform = CodeforcesPlatform()
     scpc_platform = SCPCPlatform("player281", "123456")
     nowcoder_platform = NowcoderPlatform()
     luogu_platform = LuoguPlatform()
 
+    http_client = http_client
+    host_limiter = host_limiter
+    single_flight = single_flight
+
+    cf_users = CodeforcesUserCache(codeforces_platform)
+
+    contest_cache = ContestCache(
+        {
+            "scpc": scpc_platform.get_recent_contests,
+            "cf": codeforces_platform.get_contests,
+            "nowcoder": nowcoder_platform.get_contests,
+            "luogu": luogu_platform.get_contests,
+        }
+    )
+
     # ----------------------------
     # region 插件生命周期方法
     # ----------------------------
     async def on_load(self):
         """
-        注册比赛监听的定时任务 (每 30 分钟执行一次)
+        注册配置项，启动比赛预取与比赛提醒
         """
         LOG.info("SCPC 插件启动中")
 
@@ -53,57 +131,368 @@ class SCPCPlugin(NcatBotPlugin):
         )
         self.register_config("ai_temperature", 0.5)
         self.register_config("ai_max_tokens", 800)
+        self.register_config("http_max_connections", 20, value_type=int)
+        self.register_config("http_max_keepalive_connections", 10, value_type=int)
+        self.register_config("http_keepalive_expiry", 60.0, value_type=float)
+        self.register_config("http2_enabled", True, value_type=bool)
+        self.register_config(
+            "http_host_limits",
+            {host: list(limit) for host, limit in DEFAULT_HOST_LIMITS.items()},
+            value_type=dict,
+        )
+        self.register_config("http_max_retries", DEFAULT_HTTP_RETRIES, value_type=int)
+        self.register_config(
+            "contest_cache_ttl", DEFAULT_CONTEST_TTL, value_type=float
+        )
+        self.register_config("cf_profile_ttl", DEFAULT_PROFILE_TTL, value_type=float)
+        self.register_config("cf_history_ttl", DEFAULT_HISTORY_TTL, value_type=float)
+        self.register_config("cf_team_handles", [], value_type=list)
+        self.register_config(
+            "contest_refresh_intervals", DEFAULT_REFRESH_INTERVALS, value_type=dict
+        )
+        self.register_config(
+            "contest_refresh_jitter", DEFAULT_REFRESH_JITTER, value_type=float
+        )
+        self.register_config(
+            "contest_fanout_budget", commands.DEFAULT_FANOUT_BUDGET, value_type=float
+        )
+        self.register_config("contest_followup_late", True, value_type=bool)
+        self.register_config("reminder_lead_times", DEFAULT_LEAD_TIMES, value_type=list)
+        self.register_config("store_path", DEFAULT_STORE_PATH)
+        self.register_config("render_workers", 0, value_type=int)
+        self.register_config(
+            "render_max_concurrency", MAX_CONCURRENT_RENDERS, value_type=int
+        )
+        self.register_config(
+            "render_page_pool_size", MAX_CONCURRENT_RENDERS, value_type=int
+        )
+        self.register_config("render_page_max_uses", PAGE_MAX_USES, value_type=int)
+        self.register_config("browser_max_renders", BROWSER_MAX_RENDERS, value_type=int)
+        self.register_config(
+            "browser_max_rss_mb", BROWSER_MAX_RSS // 1024 // 1024, value_type=int
+        )
+        self.register_config("image_format", DEFAULT_IMAGE_FORMAT)
+        self.register_config("image_quality", DEFAULT_IMAGE_QUALITY, value_type=int)
+        self.register_config("rating_chart_native", True, value_type=bool)
+        self.register_config(
+            "rating_chart_max_points", DEFAULT_MAX_POINTS, value_type=int
+        )
+        self.register_config("render_cache_enabled", True, value_type=bool)
+        self.register_config("render_cache_dir", DEFAULT_CACHE_DIR)
+        self.register_config(
+            "render_cache_max_mb", DEFAULT_MAX_BYTES // 1024 // 1024, value_type=int
+        )
+        self.register_config("render_cache_ttl", DEFAULT_TTL, value_type=float)
+        self.register_config("asset_cache_dir", DEFAULT_ASSET_CACHE_DIR)
+        self.register_config(
+            "asset_cache_max_mb",
+            DEFAULT_ASSET_CACHE_MAX_BYTES // 1024 // 1024,
+            value_type=int,
+        )
+        self.register_config("asset_cache_ttl", DEFAULT_ASSET_TTL, value_type=float)
+        self.register_config(
+            "asset_fetch_timeout", DEFAULT_FETCH_TIMEOUT, value_type=float
+        )
+        self.register_config(
+            "outbox_workers", DEFAULT_OUTBOX_WORKERS, value_type=int
+        )
+        self.register_config(
+            "outbox_merge_chars", DEFAULT_MERGE_CHARS, value_type=int
+        )
+        self.register_config("broadcast_workers", DEFAULT_WORKERS, value_type=int)
+        self.register_config(
+            "broadcast_group_rate", DEFAULT_GROUP_RATE, value_type=float
+        )
+        self.register_config(
+            "broadcast_group_burst", DEFAULT_GROUP_BURST, value_type=float
+        )
+        self.register_config(
+            "broadcast_global_rate", DEFAULT_GLOBAL_RATE, value_type=float
+        )
+        self.register_config(
+            "broadcast_global_burst", DEFAULT_GLOBAL_BURST, value_type=float
+        )
+        self.register_config(
+            "broadcast_max_retries", DEFAULT_MAX_RETRIES, value_type=int
+        )
 
-        self.add_scheduled_task(
-            self._contest_listener_task,
-            "interval_task",
-            "1h",
+        self.http_client.configure(
+            max_connections=int(self.config.get("http_max_connections", 20)),
+            max_keepalive_connections=int(
+                self.config.get("http_max_keepalive_connections", 10)
+            ),
+            keepalive_expiry=float(self.config.get("http_keepalive_expiry", 60.0)),
+            http2=bool(self.config.get("http2_enabled", True)),
+        )
+        self.host_limiter.configure(
+            limits=self.config.get("http_host_limits", DEFAULT_HOST_LIMITS),
+            max_retries=int(self.config.get("http_max_retries", DEFAULT_HTTP_RETRIES)),
+        )
+        self.contest_cache.ttl = float(
+            self.config.get("contest_cache_ttl", DEFAULT_CONTEST_TTL)
+        )
+        self.cf_users.profile_ttl = float(
+            self.config.get("cf_profile_ttl", DEFAULT_PROFILE_TTL)
+        )
+        self.cf_users.history_ttl = float(
+            self.config.get("cf_history_ttl", DEFAULT_HISTORY_TTL)
         )
 
-    async def _contest_listener_task(self):
-        if not any(self.group_listeners.values()):
-            return
+        # 相同 HTML 的渲染结果直接复用磁盘上的图片
+        render_cache = None
+        if self.config.get("render_cache_enabled", True):
+            render_cache = RenderCache(
+                self.config.get("render_cache_dir", DEFAULT_CACHE_DIR),
+                max_bytes=int(self.config.get("render_cache_max_mb", 64)) * 1024 * 1024,
+                ttl=float(self.config.get("render_cache_ttl", DEFAULT_TTL)),
+            )
 
-        tasks = [
-            self.scpc_platform.get_recent_contests(),
-            self.codeforces_platform.get_contests(),
-            self.nowcoder_platform.get_contests(),
-            self.luogu_platform.get_contests(),
-        ]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        scpc_contests = results[0] if not isinstance(results[0], Exception) else []
-        cf_contests = results[1] if not isinstance(results[1], Exception) else []
-        nowcoder_contests = results[2] if not isinstance(results[2], Exception) else []
-        luogu_contests = results[3] if not isinstance(results[3], Exception) else []
-
-        items = []
-        if scpc_contests:
-            items.extend(self._build_contest_texts(scpc_contests, True, "scpc"))
-        if cf_contests:
-            items.extend(self._build_contest_texts(cf_contests, False, "cf"))
-        if nowcoder_contests:
-            items.extend(
-                self._build_contest_texts(nowcoder_contests, False, "nowcoder")
+        # 全插件共享渲染服务，所有渲染共用同一个并发上限
+        self.renderer = self._create_renderer(render_cache)
+        await self.renderer.start()
+
+        # 统一的发送队列：命令回复优先于后台广播，同群文本合并发送
+        self.outbox = Outbox(
+            self.api,
+            workers=int(self.config.get("outbox_workers", DEFAULT_OUTBOX_WORKERS)),
+            merge_chars=int(
+                self.config.get("outbox_merge_chars", DEFAULT_MERGE_CHARS)
+            ),
+        )
+        self.outbox.start()
+
+        # 群消息广播：有界并发 + 按群/全局限流 + 失败重试
+        self.broadcaster = Broadcaster(
+            self.outbox.send_broadcast_text,
+            workers=int(self.config.get("broadcast_workers", DEFAULT_WORKERS)),
+            group_rate=float(
+                self.config.get("broadcast_group_rate", DEFAULT_GROUP_RATE)
+            ),
+            group_burst=float(
+                self.config.get("broadcast_group_burst", DEFAULT_GROUP_BURST)
+            ),
+            global_rate=float(
+                self.config.get("broadcast_global_rate", DEFAULT_GLOBAL_RATE)
+            ),
+            global_burst=float(
+                self.config.get("broadcast_global_burst", DEFAULT_GLOBAL_BURST)
+            ),
+            max_retries=int(
+                self.config.get("broadcast_max_retries", DEFAULT_MAX_RETRIES)
+            ),
+            on_complete=log_broadcast_result,
+        )
+
+        # 从本地存储恢复订阅、比赛快照与播报状态
+        self.store = LocalStore(self.config.get("store_path", DEFAULT_STORE_PATH))
+        await self.store.open()
+        self.group_listeners.update(await self.store.load_subscriptions())
+        for source, snapshot in (await self.store.load_snapshots()).items():
+            self.contest_cache.restore(source, snapshot)
+        self.contest_announcer.announced.update(await self.store.load_announced())
+        self.contest_cache.add_listener(self._persist_contest_snapshot)
+
+        # 后台预取比赛列表，交互命令直接读取内存快照
+        self.refresh_scheduler = RefreshScheduler(
+            self.contest_cache,
+            intervals=self.config.get("contest_refresh_intervals"),
+            jitter=float(
+                self.config.get("contest_refresh_jitter", DEFAULT_REFRESH_JITTER)
+            ),
+        )
+        self.refresh_scheduler.start()
+
+        # 按比赛开始时间精确触发提醒
+        self.reminder_engine = ReminderEngine(
+            self._on_contest_reminder,
+            lead_times=self.config.get("reminder_lead_times"),
+        )
+        for source in self.contest_cache.sources:
+            snapshot = self.contest_cache.peek(source)
+            if snapshot:
+                self.reminder_engine.sync(source, snapshot.contests)
+        self.contest_cache.add_listener(self.reminder_engine.sync)
+        self.reminder_engine.start()
+
+        # 只播报新增与变更的比赛
+        self._announce_tasks: Set[asyncio.Task] = set()
+        for source in self.contest_cache.sources:
+            snapshot = self.contest_cache.peek(source)
+            if snapshot:
+                self.contest_announcer.diff(source, snapshot.contests)
+                self._prune_announced(source)
+        self.contest_cache.add_listener(self._on_contest_snapshot)
+        # 补发上次没有送达 (发送失败或进程退出) 的播报
+        if any(self.contest_announcer.unannounced(g) for g in self._enabled_groups()):
+            self._start_announce(self.contest_announcer.unannounced)
+
+    async def on_close(self):
+        """
+        停止后台任务，写回本地存储并释放网络资源
+        """
+        LOG.info("SCPC 插件卸载中")
+        await self.reminder_engine.stop()
+        await self.refresh_scheduler.stop()
+        # 未完成的播报在关闭发送队列和存储前取消，未送达的部分下次启动时补发
+        announce_tasks = list(self._announce_tasks)
+        for task in announce_tasks:
+            task.cancel()
+        await asyncio.gather(*announce_tasks, return_exceptions=True)
+        log_outbox_stats(self.outbox)
+        await self.outbox.stop()
+        await self.store.close()
+        LOG.info(f"渲染统计: {self.renderer.stats()}")
+        LOG.info(f"CF 用户缓存: {self.cf_users.stats()}")
+        LOG.info(f"HTTP 限流: {self.host_limiter.stats()}")
+        await self.renderer.close()
+        await self.http_client.close()
+
+    def _create_renderer(self, render_cache: Optional[RenderCache]):
+        """
+        按配置创建进程内渲染器，或 `render_workers` > 0 时的多进程渲染池
+        """
+        renderer_options = {
+            "max_concurrency": int(
+                self.config.get("render_max_concurrency", MAX_CONCURRENT_RENDERS)
+            ),
+            "pool_size": int(
+                self.config.get("render_page_pool_size", MAX_CONCURRENT_RENDERS)
+            ),
+            "page_max_uses": int(
+                self.config.get("render_page_max_uses", PAGE_MAX_USES)
+            ),
+            "browser_max_renders": int(
+                self.config.get("browser_max_renders", BROWSER_MAX_RENDERS)
+            ),
+            "browser_max_rss": int(
+                self.config.get("browser_max_rss_mb", BROWSER_MAX_RSS // 1024 // 1024)
+            )
+            * 1024
+            * 1024,
+            "image_format": self.config.get("image_format", DEFAULT_IMAGE_FORMAT),
+            "image_quality": int(
+                self.config.get("image_quality", DEFAULT_IMAGE_QUALITY)
+            ),
+        }
+        # 渲染时的 Chart.js 使用插件内置文件，头像等外部资源走磁盘缓存
+        asset_options = {
+            "cache_dir": self.config.get("asset_cache_dir", DEFAULT_ASSET_CACHE_DIR),
+            "max_bytes": int(self.config.get("asset_cache_max_mb", 32)) * 1024 * 1024,
+            "ttl": float(self.config.get("asset_cache_ttl", DEFAULT_ASSET_TTL)),
+            "fetch_timeout": float(
+                self.config.get("asset_fetch_timeout", DEFAULT_FETCH_TIMEOUT)
+            ),
+        }
+
+        render_workers = int(self.config.get("render_workers", 0))
+        if render_workers > 0:
+            return RenderProcessPool(
+                render_workers,
+                worker_config={**renderer_options, "assets": asset_options},
+                cache=render_cache,
             )
-        if luogu_contests:
-            items.extend(self._build_contest_texts(luogu_contests, False, "luogu"))
 
-        items.sort(key=lambda x: x[0])
+        asset_resolver = AssetResolver(
+            DiskCache(
+                asset_options["cache_dir"],
+                max_bytes=asset_options["max_bytes"],
+                ttl=asset_options["ttl"],
+            ),
+            fetch_timeout=asset_options["fetch_timeout"],
+        )
+        return PlaywrightRenderer(
+            **renderer_options, cache=render_cache, assets=asset_resolver
+        )
+
+    def _enabled_groups(self) -> List[str]:
+        return [gid for gid, enabled in self.group_listeners.items() if enabled]
 
-        if not items:
+    async def _on_contest_reminder(self, source: str, contest: Contest, lead: int):
+        """
+        比赛即将开始时向开启提醒的群聊发送提醒
+        """
+        now_ts = int(datetime.now().timestamp())
+        text = self._format_single_contest(contest, now_ts, source == "scpc")
+        msg = f"⏰ 比赛提醒: 还有 {format_lead_time(lead)} 开始 ⏰\n" + text
+        await self.broadcaster.broadcast(self._enabled_groups(), msg)
+
+    def _persist_contest_snapshot(self, source: str, contests: List[Contest]):
+        snapshot = self.contest_cache.peek(source)
+        if snapshot:
+            self.store.save_snapshot(source, snapshot)
+
+    def _prune_announced(self, source: str):
+        """删除已结束或不再列出的比赛的播报记录 (内存与本地存储)"""
+        for group_id, key in self.contest_announcer.prune(source):
+            self.store.delete_announced_contest(group_id, key)
+
+    def _on_contest_snapshot(self, source: str, contests: List[Contest]):
+        first = not self.contest_announcer.has_snapshot(source)
+        changes = self.contest_announcer.diff(source, contests)
+        self._prune_announced(source)
+        if first:
+            # 第一份快照只作为基线，其中的比赛对已开启的群视为已播报
+            for group_id, key, fp in self.contest_announcer.baseline_source(
+                source, self._enabled_groups()
+            ):
+                self.store.save_announced(group_id, key, fp)
+        if not changes or not any(self.group_listeners.values()):
             return
+        self._start_announce(
+            lambda group_id: self.contest_announcer.pending_for_group(
+                group_id, changes
+            )
+        )
 
-        header = "🏆 近期比赛预告 🏆\n"
-        content = "\n\n".join([t for _, t in items])
-        msg = header + content
+    def _start_announce(self, changes_for: Callable[[str], List[ContestChange]]):
+        task = asyncio.get_running_loop().create_task(
+            self._announce_contest_changes(changes_for)
+        )
+        self._announce_tasks.add(task)
+        task.add_done_callback(self._announce_tasks.discard)
+
+    async def _announce_contest_changes(
+        self, changes_for: Callable[[str], List[ContestChange]]
+    ):
+        """
+        向各群推送尚未播报过的新增/变更比赛
 
-        for group_id, enabled in self.group_listeners.items():
-            if enabled:
-                try:
-                    await self.api.send_group_text(group_id, msg)
-                except Exception as e:
-                    LOG.error(f"Failed to send contest list to group {group_id}: {e}")
+        Args:
+            changes_for: 给出某个群需要播报的变化
+        """
+        now_ts = int(datetime.now().timestamp())
+        pending_by_group: Dict[str, List[ContestChange]] = {}
+
+        def build_message(group_id: str) -> Optional[str]:
+            pending = changes_for(group_id)
+            if not pending:
+                return None
+            pending_by_group[group_id] = pending
+
+            sections = []
+            for change in sorted(pending, key=lambda c: c.contest.start_time):
+                text = self._format_single_contest(
+                    change.contest, now_ts, change.source == "scpc"
+                )
+                if change.previous is None:
+                    sections.append("🆕 新比赛\n" + text)
+                else:
+                    old_start = datetime.fromtimestamp(change.previous[0]).strftime(
+                        "%Y-%m-%d %H:%M"
+                    )
+                    sections.append(f"🔄 比赛变更 (原定 {old_start})\n" + text)
+            return "📢 比赛动态 📢\n" + "\n\n".join(sections)
+
+        def on_sent(group_id: str):
+            # 确认送达后才记为已播报，失败的播报在下次启动时补发
+            pending = pending_by_group.pop(group_id, [])
+            self.contest_announcer.mark_announced(group_id, pending)
+            for change in pending:
+                self.store.save_announced(group_id, change.key, change.fingerprint)
+
+        await self.broadcaster.broadcast(
+            self._enabled_groups(), build_message, on_sent=on_sent
+        )
 
     def _format_single_contest(
         self,
@@ -213,6 +602,11 @@ class SCPCPlugin(NcatBotPlugin):
     async def get_codeforces_rating_chart(self, event: GroupMessageEvent, handle: str):
         await commands.get_codeforces_rating_chart_logic(self, event, handle)
 
+    @command_registry.command("cf排行", description="获取队员 Codeforces Rating 排行")
+    @group_filter
+    async def get_codeforces_team_rank(self, event: GroupMessageEvent):
+        await commands.get_codeforces_team_rank_logic(self, event)
+
     @command_registry.command("ai", description="询问 AI 问题")
     @group_filter
     async def ai_chat(self, event: GroupMessageEvent, question: str):
@@ -0,0 +1,175 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..platforms.platform import Contest
+
+ContestKey = Tuple[str, int]
+Fingerprint = Tuple[int, int]  # (start_time, duration)
+
+
+@dataclass
+class ContestChange:
+    source: str  # 平台标识
+    contest: Contest  # 最新的比赛信息
+    previous: Optional[Fingerprint] = None  # 变更前的 (开始时间, 时长)，新比赛为 None
+
+    @property
+    def key(self) -> ContestKey:
+        return (self.source, self.contest.id)
+
+    @property
+    def fingerprint(self) -> Fingerprint:
+        return fingerprint(self.contest)
+
+
+def fingerprint(contest: Contest) -> Fingerprint:
+    return (int(contest.start_time), int(contest.duration))
+
+
+class ContestAnnouncer:
+    """
+    比赛增量播报的差异引擎
+
+    记录每个平台上一次快照的比赛指纹，新快照到来时只产出新增的比赛
+    以及改期/时长变化的比赛。每个群已播报过的比赛按 (平台, 比赛ID)
+    记录在 `announced` 中，播报时只需检查本次变化的条目，
+    开销与变化数量成正比，而不是与比赛总数成正比。
+    已结束或不再出现在快照中的比赛通过 `prune` 从记录中删除。
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[str, Dict[int, Fingerprint]] = {}
+        self._contests: Dict[str, Dict[int, Contest]] = {}
+        # group_id -> {(source, contest_id): fingerprint}
+        self.announced: Dict[str, Dict[ContestKey, Fingerprint]] = {}
+
+    def diff(self, source: str, contests: List[Contest]) -> List[ContestChange]:
+        """
+        对比平台的新旧快照并更新记录
+
+        平台的第一份快照只作为基线，不产生变化。
+        """
+        current = {c.id: fingerprint(c) for c in contests}
+        previous = self._snapshots.get(source)
+        self._snapshots[source] = current
+        self._contests[source] = {c.id: c for c in contests}
+        if previous is None or previous == current:
+            return []
+
+        now = int(time.time())
+        changes = []
+        for contest in contests:
+            if contest.start_time <= now:
+                continue
+            old = previous.get(contest.id)
+            if old is None or old != current[contest.id]:
+                changes.append(ContestChange(source, contest, old))
+        return changes
+
+    def has_snapshot(self, source: str) -> bool:
+        return source in self._snapshots
+
+    def baseline_source(
+        self, source: str, group_ids: Iterable[str]
+    ) -> List[Tuple[str, ContestKey, Fingerprint]]:
+        """
+        将平台当前快照中的比赛标记为这些群已播报
+
+        平台的第一份快照只作为基线不产生变化，其中的比赛需要同时记为
+        已播报，否则之后 `unannounced` 会把它们当作未送达的播报补发。
+
+        Returns:
+            本次新标记的 (group_id, 比赛键, 指纹) 列表
+        """
+        snapshot = self._snapshots.get(source, {})
+        marked = []
+        for group_id in group_ids:
+            announced = self.announced.setdefault(group_id, {})
+            for contest_id, fp in snapshot.items():
+                key = (source, contest_id)
+                if announced.get(key) != fp:
+                    announced[key] = fp
+                    marked.append((group_id, key, fp))
+        return marked
+
+    def baseline_group(self, group_id: str) -> List[Tuple[ContestKey, Fingerprint]]:
+        """
+        将当前已知的比赛标记为该群已播报，之后只推送新的变化
+
+        Returns:
+            本次新标记的 (比赛键, 指纹) 列表
+        """
+        announced = self.announced.setdefault(group_id, {})
+        marked = []
+        for source, snapshot in self._snapshots.items():
+            for contest_id, fp in snapshot.items():
+                key = (source, contest_id)
+                if announced.get(key) != fp:
+                    announced[key] = fp
+                    marked.append((key, fp))
+        return marked
+
+    def pending_for_group(
+        self, group_id: str, changes: Iterable[ContestChange]
+    ) -> List[ContestChange]:
+        """
+        筛选出该群尚未播报过的变化
+
+        不会记为已播报：消息送达后再调用 `mark_announced`，
+        发送失败的变化之后仍可以通过 `unannounced` 补发。
+        """
+        announced = self.announced.get(group_id, {})
+        return [c for c in changes if announced.get(c.key) != c.fingerprint]
+
+    def mark_announced(self, group_id: str, changes: Iterable[ContestChange]):
+        announced = self.announced.setdefault(group_id, {})
+        for change in changes:
+            announced[change.key] = change.fingerprint
+
+    def unannounced(
+        self, group_id: str, now: Optional[int] = None
+    ) -> List[ContestChange]:
+        """
+        该群尚未播报过的未开始比赛，用于补发上次没有送达的播报
+
+        没有任何播报记录的群 (尚未建立基线) 返回空列表。
+        """
+        announced = self.announced.get(group_id)
+        if not announced:
+            return []
+        now = int(time.time()) if now is None else now
+        result = []
+        for source, contests in self._contests.items():
+            for contest in contests.values():
+                key = (source, contest.id)
+                if contest.start_time > now and announced.get(key) != fingerprint(
+                    contest
+                ):
+                    result.append(ContestChange(source, contest, announced.get(key)))
+        return result
+
+    def prune(
+        self, source: str, now: Optional[int] = None
+    ) -> List[Tuple[str, ContestKey]]:
+        """
+        删除各群记录中该平台已结束或已不在最新快照中的比赛
+
+        Returns:
+            被删除的 (group_id, 比赛键) 列表
+        """
+        contests = self._contests.get(source)
+        if contests is None:
+            return []
+        now = int(time.time()) if now is None else now
+        removed = []
+        for group_id, announced in self.announced.items():
+            for key in [k for k in announced if k[0] == source]:
+                contest = contests.get(key[1])
+                if contest is None or contest.start_time + contest.duration <= now:
+                    del announced[key]
+                    removed.append((group_id, key))
+        return removed
+
+    def forget_group(self, group_id: str):
+        self.announced.pop(group_id, None)
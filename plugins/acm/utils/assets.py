@@ -0,0 +1,161 @@
+import hashlib
+import mimetypes
+import os
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from ncatbot.utils import get_log
+
+from .disk_cache import DiskCache
+from .network import DEFAULT_HEADERS, Method, http_client, single_flight
+
+LOG = get_log()
+
+# 插件内置的静态资源目录
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
+# 模板中引用的外部资源 (固定版本) -> 内置文件名
+BUNDLED_ASSETS = {
+    "https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.js": (
+        "chart.umd.min.js"
+    ),
+}
+
+DEFAULT_ASSET_CACHE_DIR = "data/asset_cache"
+DEFAULT_ASSET_CACHE_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_ASSET_TTL = 24 * 3600
+# 单个外部资源的下载超时(秒)，超时后使用占位图
+DEFAULT_FETCH_TIMEOUT = 3.0
+# 下载失败后在这段时间内不再重试，直接使用占位图(秒)
+FAILURE_COOLDOWN = 600.0
+MAX_ASSET_BYTES = 5 * 1024 * 1024
+
+PLACEHOLDER_IMAGE = (
+    b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64">'
+    b'<rect width="64" height="64" fill="#e5e7eb"/>'
+    b'<circle cx="32" cy="25" r="11" fill="#9ca3af"/>'
+    b'<path d="M12 58c2-12 10-18 20-18s18 6 20 18z" fill="#9ca3af"/>'
+    b"</svg>"
+)
+
+
+def _suffix_for(content_type: str) -> Optional[str]:
+    """Content-Type 对应的文件后缀，只使用能由后缀还原出同一类型的后缀"""
+    for suffix in mimetypes.guess_all_extensions(content_type):
+        if mimetypes.guess_type("asset" + suffix)[0] == content_type:
+            return suffix
+    return None
+
+
+class AssetResolver:
+    """
+    拦截渲染页面发出的外部请求
+
+    - 内置的静态资源 (Chart.js) 直接从插件目录返回，不访问网络
+    - 其他外部资源 (头像等) 经磁盘缓存获取，下载带超时，
+      失败时图片返回占位图、其他资源直接中止，渲染不再等待第三方站点。
+      缓存文件的后缀取自上游响应的 Content-Type，返回时据此还原类型
+    """
+
+    def __init__(
+        self,
+        cache: DiskCache,
+        fetch_timeout: float = DEFAULT_FETCH_TIMEOUT,
+        static_dir: str = STATIC_DIR,
+    ):
+        self.cache = cache
+        self.fetch_timeout = float(fetch_timeout)
+        self.static_dir = static_dir
+        self._failed_until: Dict[str, float] = {}
+
+    def bundled_path(self, url: str) -> Optional[str]:
+        """URL 对应的内置文件路径，不是内置资源或文件缺失时返回 None"""
+        name = BUNDLED_ASSETS.get(url)
+        if not name:
+            return None
+        path = os.path.join(self.static_dir, name)
+        if not os.path.isfile(path):
+            LOG.warning(f"内置资源 {path} 不存在，改为下载 {url}")
+            return None
+        return path
+
+    async def handle(self, route):
+        """Playwright 路由回调"""
+        request = route.request
+        url = request.url
+        if not url.startswith(("http://", "https://")):
+            await route.continue_()
+            return
+
+        try:
+            bundled = self.bundled_path(url)
+            if bundled:
+                content_type, _ = mimetypes.guess_type(bundled)
+                await route.fulfill(path=bundled, content_type=content_type)
+                return
+
+            asset = await self.fetch(url)
+            if asset is not None:
+                body, content_type = asset
+                if not content_type:
+                    content_type, _ = mimetypes.guess_type(urlsplit(url).path)
+                await route.fulfill(status=200, body=body, content_type=content_type)
+            elif request.resource_type == "image":
+                await route.fulfill(
+                    status=200, body=PLACEHOLDER_IMAGE, content_type="image/svg+xml"
+                )
+            else:
+                await route.abort()
+        except Exception as e:
+            LOG.warning(f"处理渲染资源请求失败 {url}: {e}")
+            # 未处理的请求会让页面一直等到渲染超时
+            try:
+                await route.abort()
+            except Exception:
+                pass
+
+    async def fetch(self, url: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """
+        获取外部资源，优先读取磁盘缓存
+
+        Returns:
+            (资源内容, Content-Type)，类型未知时为 None；
+            下载失败或仍处于失败冷却期时返回 None
+        """
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        cached = await self.cache.load_async(key)
+        if cached is not None:
+            data, suffix = cached
+            # 默认后缀表示下载时没有可用的类型
+            content_type = None
+            if suffix != self.cache.suffix:
+                content_type, _ = mimetypes.guess_type("asset" + suffix)
+            return data, content_type
+        if self._failed_until.get(url, 0.0) > time.monotonic():
+            return None
+        return await single_flight.do(("asset", url), lambda: self._download(url, key))
+
+    async def _download(
+        self, url: str, key: str
+    ) -> Optional[Tuple[bytes, Optional[str]]]:
+        try:
+            resp = await http_client.request(
+                Method.GET,
+                url,
+                headers={"User-Agent": DEFAULT_HEADERS["User-Agent"]},
+                timeout=self.fetch_timeout,
+            )
+            if resp.status_code != 200:
+                raise ValueError(f"HTTP {resp.status_code}")
+            if len(resp.content) > MAX_ASSET_BYTES:
+                raise ValueError(f"资源过大 ({len(resp.content)} bytes)")
+        except Exception as e:
+            LOG.warning(f"下载渲染资源失败 {url}: {e}")
+            self._failed_until[url] = time.monotonic() + FAILURE_COOLDOWN
+            return None
+
+        self._failed_until.pop(url, None)
+        content_type = resp.headers.get("Content-Type", "").split(";")[0].strip()
+        suffix = _suffix_for(content_type) if content_type else None
+        await self.cache.put_async(key, resp.content, suffix)
+        return resp.content, content_type or None
@@ -0,0 +1,169 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from ncatbot.utils import get_log
+
+from .metrics import LatencyRecorder
+from .ratelimit import TokenBucket
+
+LOG = get_log()
+
+# 默认并发与限流参数
+DEFAULT_WORKERS = 4
+DEFAULT_GROUP_RATE = 0.5  # 每个群每秒最多发送的消息数
+DEFAULT_GROUP_BURST = 2
+DEFAULT_GLOBAL_RATE = 5.0  # 全局每秒最多发送的消息数
+DEFAULT_GLOBAL_BURST = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 1.0  # 首次重试等待(秒)，之后指数增长
+
+SendFunc = Callable[[str, str], Awaitable[object]]
+MessageFactory = Callable[[str], Optional[str]]
+SentCallback = Callable[[str], None]
+
+
+@dataclass
+class BroadcastResult:
+    total: int  # 目标群数量
+    sent: int = 0  # 发送成功数量
+    failed: List[str] = field(default_factory=list)  # 最终发送失败的群
+    elapsed: float = 0.0  # 完成整次广播的耗时(秒)
+
+
+class Broadcaster:
+    """
+    群消息广播器
+
+    使用固定数量的 worker 并发发送，每个群以及全局各有一个令牌桶，
+    避免触发 QQ 的发送频率限制。发送失败时按指数退避重试，
+    每次广播结束后通过 `on_complete` 回调上报耗时等指标。
+    """
+
+    def __init__(
+        self,
+        send: SendFunc,
+        workers: int = DEFAULT_WORKERS,
+        group_rate: float = DEFAULT_GROUP_RATE,
+        group_burst: float = DEFAULT_GROUP_BURST,
+        global_rate: float = DEFAULT_GLOBAL_RATE,
+        global_burst: float = DEFAULT_GLOBAL_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        on_complete: Optional[Callable[[BroadcastResult], None]] = None,
+    ):
+        self.send = send
+        self.workers = max(1, int(workers))
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = backoff
+        self.on_complete = on_complete
+        self.latency = LatencyRecorder()
+        self._group_buckets: Dict[str, TokenBucket] = {}
+
+    def _bucket_for(self, group_id: str) -> TokenBucket:
+        bucket = self._group_buckets.get(group_id)
+        if bucket is None:
+            bucket = TokenBucket(self.group_rate, self.group_burst)
+            self._group_buckets[group_id] = bucket
+        return bucket
+
+    async def broadcast(
+        self,
+        group_ids: Iterable[str],
+        message: Union[str, MessageFactory],
+        on_sent: Optional[SentCallback] = None,
+    ) -> BroadcastResult:
+        """
+        向多个群发送消息
+
+        Args:
+            group_ids: 目标群列表
+            message: 文本内容，或按群生成文本的函数（返回 None 表示跳过该群）
+            on_sent: 某个群的消息确认送达后以 group_id 调用
+
+        Returns:
+            广播结果
+        """
+        start = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue()
+        total = 0
+        for group_id in group_ids:
+            text = message(group_id) if callable(message) else message
+            if text:
+                queue.put_nowait((group_id, text))
+                total += 1
+
+        result = BroadcastResult(total=total)
+        if total:
+            workers = [
+                asyncio.ensure_future(self._worker(queue, result, on_sent))
+                for _ in range(min(self.workers, total))
+            ]
+            try:
+                await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        result.elapsed = time.perf_counter() - start
+        self.latency.record("broadcast", result.elapsed)
+        if self.on_complete:
+            try:
+                self.on_complete(result)
+            except Exception as e:
+                LOG.warning(f"广播指标回调执行失败: {e}")
+        return result
+
+    async def _worker(
+        self,
+        queue: asyncio.Queue,
+        result: BroadcastResult,
+        on_sent: Optional[SentCallback],
+    ):
+        while True:
+            group_id, text = await queue.get()
+            try:
+                if await self._send_with_retry(group_id, text):
+                    result.sent += 1
+                    if on_sent:
+                        try:
+                            on_sent(group_id)
+                        except Exception as e:
+                            LOG.warning(f"广播送达回调执行失败 ({group_id}): {e}")
+                else:
+                    result.failed.append(group_id)
+            finally:
+                queue.task_done()
+
+    async def _send_with_retry(self, group_id: str, text: str) -> bool:
+        bucket = self._bucket_for(group_id)
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                await self.send(group_id, text)
+                return True
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    LOG.error(f"向群 {group_id} 发送消息失败，已放弃: {e}")
+                    return False
+                delay = self.backoff * (2**attempt) * random.uniform(0.8, 1.2)
+                LOG.warning(
+                    f"向群 {group_id} 发送消息失败，{delay:.1f}s 后重试: {e}"
+                )
+                await asyncio.sleep(delay)
+        return False
+
+
+def log_broadcast_result(result: BroadcastResult):
+    """默认的广播指标回调：记录完成耗时与失败数量"""
+    LOG.info(
+        f"广播完成: {result.sent}/{result.total} 个群, "
+        f"失败 {len(result.failed)} 个, 耗时 {result.elapsed:.2f}s"
+    )
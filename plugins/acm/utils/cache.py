@@ -0,0 +1,144 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from ncatbot.utils import get_log
+
+from ..platforms.platform import Contest
+from .metrics import LatencyRecorder
+from .network import SingleFlight
+
+LOG = get_log()
+
+# 比赛快照默认有效期(秒)
+DEFAULT_CONTEST_TTL = 600.0
+
+ContestFetcher = Callable[[], Awaitable[List[Contest]]]
+SnapshotListener = Callable[[str, List[Contest]], None]
+
+
+@dataclass
+class ContestSnapshot:
+    contests: List[Contest]  # 比赛列表
+    fetched_at: float  # 获取时间戳（秒）
+
+
+class ContestCache:
+    """
+    按平台缓存比赛列表快照
+
+    - 快照在 TTL 内直接返回内存数据
+    - 快照过期后立即返回旧数据，同时在后台刷新 (stale-while-revalidate)
+    - 上游失败时保留最后一次成功的快照，而不是返回空列表
+
+    由后台调度器负责刷新的平台会被加入 `managed_sources`，
+    读取这些平台只访问内存，不会触发网络请求。
+    """
+
+    def __init__(
+        self,
+        fetchers: Dict[str, ContestFetcher],
+        ttl: float = DEFAULT_CONTEST_TTL,
+    ):
+        self.fetchers = fetchers
+        self.ttl = ttl
+        self.managed_sources: Set[str] = set()
+        self._snapshots: Dict[str, ContestSnapshot] = {}
+        # 各平台最近一次刷新失败的原因，刷新成功后清除
+        self._errors: Dict[str, str] = {}
+        self._flight = SingleFlight()
+        self._background: Set[asyncio.Task] = set()
+        # 各平台上游请求耗时，用于调整聚合查询的延迟预算
+        self.latency = LatencyRecorder()
+        self._listeners: List[SnapshotListener] = []
+
+    @property
+    def sources(self) -> List[str]:
+        return list(self.fetchers.keys())
+
+    def add_listener(self, listener: SnapshotListener):
+        """
+        注册快照更新回调，每次成功刷新后以 (source, contests) 调用
+        """
+        self._listeners.append(listener)
+
+    def restore(self, source: str, snapshot: ContestSnapshot):
+        """
+        使用持久化的快照预热缓存，不触发快照更新回调
+        """
+        if source in self.fetchers:
+            self._snapshots[source] = snapshot
+
+    def peek(self, source: str) -> Optional[ContestSnapshot]:
+        """获取当前快照，不触发任何网络请求"""
+        return self._snapshots.get(source)
+
+    def last_error(self, source: str) -> Optional[str]:
+        """最近一次刷新失败的原因，最近一次刷新成功时返回 None"""
+        return self._errors.get(source)
+
+    def is_fresh(self, source: str) -> bool:
+        snapshot = self._snapshots.get(source)
+        if snapshot is None:
+            return False
+        return time.time() - snapshot.fetched_at < self.ttl
+
+    async def get(self, source: str) -> List[Contest]:
+        """
+        获取指定平台的比赛列表
+
+        Args:
+            source: 平台标识 (scpc/cf/nowcoder/luogu)
+
+        Returns:
+            比赛列表，没有任何可用快照且上游失败时返回空列表
+        """
+        snapshot = self._snapshots.get(source)
+        if snapshot is None:
+            return await self.refresh(source)
+
+        if source not in self.managed_sources and not self.is_fresh(source):
+            self._refresh_in_background(source)
+        return snapshot.contests
+
+    async def refresh(self, source: str) -> List[Contest]:
+        """
+        立即从上游刷新指定平台，同一平台的并发刷新会被合并
+
+        Returns:
+            刷新后的比赛列表；失败时返回最后一次成功的快照
+        """
+        return await self._flight.do(source, lambda: self._do_refresh(source))
+
+    async def _do_refresh(self, source: str) -> List[Contest]:
+        fetcher = self.fetchers[source]
+        start = time.perf_counter()
+        try:
+            contests = await fetcher()
+        except Exception as e:
+            self.latency.record(source, time.perf_counter() - start)
+            self._errors[source] = str(e) or type(e).__name__
+            snapshot = self._snapshots.get(source)
+            if snapshot is None:
+                LOG.warning(f"刷新 {source} 比赛列表失败且没有可用快照: {e}")
+                return []
+            LOG.warning(f"刷新 {source} 比赛列表失败，继续使用旧快照: {e}")
+            return snapshot.contests
+
+        self.latency.record(source, time.perf_counter() - start)
+        self._errors.pop(source, None)
+        self._snapshots[source] = ContestSnapshot(
+            contests=contests, fetched_at=time.time()
+        )
+        for listener in self._listeners:
+            try:
+                listener(source, contests)
+            except Exception as e:
+                LOG.error(f"比赛快照回调执行失败 ({source}): {e}")
+        return contests
+
+    def _refresh_in_background(self, source: str):
+        task = asyncio.get_running_loop().create_task(self.refresh(source))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
@@ -0,0 +1,221 @@
+import math
+from html import escape
+from typing import Dict, List, Optional, Tuple
+
+from ncatbot.utils import get_log
+
+LOG = get_log()
+
+try:
+    import cairosvg
+
+    CAIROSVG_AVAILABLE = True
+except (ImportError, OSError):
+    # 未安装 cairosvg，或系统缺少 libcairo
+    CAIROSVG_AVAILABLE = False
+
+CHART_WIDTH = 720
+CHART_HEIGHT = 440
+# 绘图区四周留白：左侧纵轴刻度、右侧最新积分标签、顶部标题、底部日期
+PADDING = (60, 60, 50, 40)  # left, right, top, bottom
+
+# Codeforces 段位颜色 (与 cf_rating_chart.html 一致)
+RANK_COLORS: List[Tuple[int, str]] = [
+    (1200, "#808080"),  # newbie
+    (1400, "#008000"),  # pupil
+    (1600, "#03a89e"),  # specialist
+    (1900, "#0000ff"),  # expert
+    (2100, "#aa00aa"),  # candidate master
+    (2400, "#ff8c00"),  # master / international master
+]
+TOP_RANK_COLOR = "#ff0000"  # grandmaster 及以上
+
+# 背景段位色带: (下限, 上限, 颜色, 不透明度)
+RANK_BANDS: List[Tuple[int, int, str, float]] = [
+    (0, 1200, "#cccccc", 0.2),
+    (1200, 1400, "#77ff77", 0.2),
+    (1400, 1600, "#77ddbb", 0.2),
+    (1600, 1900, "#aaaaff", 0.2),
+    (1900, 2100, "#ff88ff", 0.2),
+    (2100, 2300, "#ffcc88", 0.2),
+    (2300, 2400, "#ffbb55", 0.2),
+    (2400, 2600, "#ff7777", 0.2),
+    (2600, 3000, "#ff3333", 0.2),
+    (3000, 10000, "#aa0000", 0.2),
+]
+
+MAX_X_TICKS = 10
+
+
+def rating_color(rating: int) -> str:
+    for upper, color in RANK_COLORS:
+        if rating < upper:
+            return color
+    return TOP_RANK_COLOR
+
+
+def _nice_step(span: float, target_ticks: int = 6) -> int:
+    """纵轴刻度间隔，取 1/2/2.5/5 × 10^n 中最接近目标刻度数的值"""
+    raw = max(span / target_ticks, 1)
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 2.5, 5, 10):
+        if raw <= factor * magnitude:
+            return int(factor * magnitude)
+    return int(10 * magnitude)
+
+
+def y_axis_range(lo: int, hi: int) -> Tuple[int, int, int]:
+    """纵轴的 (下限, 上限, 刻度间隔)，上下各留出至少 100 分"""
+    step = _nice_step(max(hi - lo, 100) + 200)
+    lo = math.floor((lo - 100) / step) * step
+    hi = math.ceil((hi + 100) / step) * step
+    return max(lo, 0), hi, step
+
+
+def render_rating_chart_svg(
+    handle: str,
+    labels: List[str],
+    data: List[int],
+    meta: List[Dict[str, object]],
+    max_line: Optional[List[int]] = None,
+    y_range: Optional[Tuple[int, int, int]] = None,
+    bands: Optional[List[Tuple[int, int, str, float]]] = None,
+    width: int = CHART_WIDTH,
+    height: int = CHART_HEIGHT,
+) -> str:
+    """
+    直接生成 Rating 曲线的 SVG，不依赖浏览器与 Chart.js
+
+    保留段位色带、按段位着色的折线与数据点、最新积分标签；
+    每个数据点带有 <title>，包含该场比赛的积分变化、排名与比赛名称。
+
+    Args:
+        handle: 用户名
+        labels: 每个数据点的日期
+        data: 每个数据点的积分
+        meta: 每个数据点的比赛信息 (contest / rank / old / new)
+        max_line: 每个数据点对应的历史最高积分，绘制为虚线
+        y_range: 预先计算的纵轴范围，为空时按 data 计算
+        bands: 预先筛选的段位色带，为空时使用全部色带
+    """
+    left, right, top, bottom = PADDING
+    plot_w = width - left - right
+    plot_h = height - top - bottom
+    lo, hi, step = y_range or y_axis_range(min(data), max(data))
+
+    def px(i: int) -> float:
+        if len(data) == 1:
+            return left + plot_w / 2
+        return left + plot_w * i / (len(data) - 1)
+
+    def py(value: float) -> float:
+        return top + plot_h * (hi - value) / (hi - lo)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="Arial, sans-serif">',
+        f'<rect width="{width}" height="{height}" fill="#ffffff"/>',
+        f'<text x="{width / 2:.1f}" y="30" font-size="16" text-anchor="middle" '
+        f'fill="#666666">{escape(handle)} 的 Rating 变化图</text>',
+    ]
+
+    # 段位色带
+    for band_lo, band_hi, color, opacity in bands or RANK_BANDS:
+        y1, y2 = py(min(band_hi, hi)), py(max(band_lo, lo))
+        if y2 > y1:
+            parts.append(
+                f'<rect x="{left}" y="{y1:.1f}" width="{plot_w}" '
+                f'height="{y2 - y1:.1f}" fill="{color}" fill-opacity="{opacity}"/>'
+            )
+
+    # 纵轴网格与刻度
+    for value in range(lo, hi + 1, step):
+        y = py(value)
+        parts.append(
+            f'<line x1="{left}" y1="{y:.1f}" x2="{left + plot_w}" y2="{y:.1f}" '
+            f'stroke="#f0f0f0"/>'
+            f'<text x="{left - 8}" y="{y + 4:.1f}" font-size="12" text-anchor="end" '
+            f'fill="#666666">{value}</text>'
+        )
+
+    # 横轴日期，最多 MAX_X_TICKS 个
+    stride = max(1, math.ceil(len(labels) / MAX_X_TICKS))
+    for i in range(0, len(labels), stride):
+        parts.append(
+            f'<text x="{px(i):.1f}" y="{top + plot_h + 20}" font-size="12" '
+            f'text-anchor="middle" fill="#666666">{escape(labels[i])}</text>'
+        )
+
+    # 折线颜色按段位分段：用 userSpaceOnUse 的纵向渐变做硬切换
+    stops = []
+    previous = rating_color(0)
+    for upper, _ in RANK_COLORS:
+        offset = min(1.0, max(0.0, (upper - lo) / (hi - lo)))
+        current = rating_color(upper)
+        stops.append(f'<stop offset="{offset:.4f}" stop-color="{previous}"/>')
+        stops.append(f'<stop offset="{offset:.4f}" stop-color="{current}"/>')
+        previous = current
+    parts.append(
+        f'<defs><linearGradient id="rankLine" gradientUnits="userSpaceOnUse" '
+        f'x1="0" y1="{py(lo):.1f}" x2="0" y2="{py(hi):.1f}">{"".join(stops)}'
+        f"</linearGradient></defs>"
+    )
+
+    points = " ".join(f"{px(i):.1f},{py(v):.1f}" for i, v in enumerate(data))
+    base = py(lo)
+    parts.append(
+        f'<polygon points="{px(0):.1f},{base:.1f} {points} '
+        f'{px(len(data) - 1):.1f},{base:.1f}" fill="#c8c8c8" fill-opacity="0.1"/>'
+        f'<polyline points="{points}" fill="none" stroke="url(#rankLine)" '
+        f'stroke-width="2" stroke-linejoin="round"/>'
+    )
+
+    if max_line:
+        peak_points = " ".join(
+            f"{px(i):.1f},{py(v):.1f}" for i, v in enumerate(max_line)
+        )
+        parts.append(
+            f'<polyline points="{peak_points}" fill="none" stroke="#999999" '
+            f'stroke-width="1" stroke-dasharray="4,4"/>'
+        )
+
+    for i, value in enumerate(data):
+        m = meta[i]
+        delta = int(m["new"]) - int(m["old"])
+        tooltip = (
+            f"积分: {m['new']} ({'+' if delta >= 0 else ''}{delta})\n"
+            f"排名: {m['rank']}\n比赛: {m['contest']}"
+        )
+        parts.append(
+            f'<circle cx="{px(i):.1f}" cy="{py(value):.1f}" r="3" '
+            f'fill="{rating_color(value)}" stroke="#ffffff">'
+            f"<title>{escape(tooltip)}</title></circle>"
+        )
+
+    # 最新积分标签
+    last = data[-1]
+    text = str(last)
+    box_w = len(text) * 7.5 + 12
+    x, y = px(len(data) - 1) + 10, py(last)
+    parts.append(
+        f'<rect x="{x:.1f}" y="{y - 11:.1f}" width="{box_w:.1f}" height="22" rx="4" '
+        f'fill="{rating_color(last)}"/>'
+        f'<text x="{x + 6:.1f}" y="{y + 4:.1f}" font-size="12" font-weight="bold" '
+        f'fill="#ffffff">{text}</text>'
+    )
+
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def svg_to_png(svg: str, scale: float = 1.0) -> Optional[bytes]:
+    """
+    用 cairosvg 把 SVG 转为 PNG，cairosvg 不可用或转换失败时返回 None
+    """
+    if not CAIROSVG_AVAILABLE:
+        return None
+    try:
+        return cairosvg.svg2png(bytestring=svg.encode("utf-8"), scale=scale)
+    except Exception as e:
+        LOG.error(f"SVG 转换 PNG 失败: {e}")
+        return None
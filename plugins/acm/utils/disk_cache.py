@@ -0,0 +1,251 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from ncatbot.utils import get_log
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，只能保证单进程内的大小上限
+    fcntl = None
+
+LOG = get_log()
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 6 * 3600
+LOCK_FILE = ".lock"
+TMP_SUFFIX = ".tmp"
+# 超过这个时间的临时文件视为写入中途退出留下的残留(秒)
+STALE_TMP_AGE = 3600
+# 两次整理缓存目录的最长间隔(秒)，其他进程写入的文件在整理后才会被看到
+SWEEP_INTERVAL = 600
+
+
+class DiskCache:
+    """
+    磁盘上的字节缓存，键为调用方计算好的哈希字符串，文件名为 键 + 后缀
+
+    每个进程在内存中维护 键 -> (后缀, 大小) 的索引，查找和写入只访问对应的
+    文件，不列出目录。文件的 mtime 为写入时间，超过 `ttl` 视为失效；每次读取
+    把 atime 更新为当前时间。
+
+    多个进程可以共用同一个目录：启动时、每隔 `sweep_interval` 秒，以及本进程
+    记录的总大小超过 `max_bytes` 时，在文件锁内扫描目录，删除过期文件，按 atime
+    淘汰最久未使用的文件直到不超过上限，再用扫描结果重建索引，因此大小上限
+    对所有进程整体生效，其他进程写入的文件也在这时加入索引。
+
+    同步方法会读写磁盘，在事件循环中请使用对应的 `*_async` 版本。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL,
+        suffix: str = ".bin",
+        sweep_interval: float = SWEEP_INTERVAL,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.suffix = suffix  # 写入时未指定后缀使用的默认后缀
+        self.max_bytes = int(max_bytes)
+        self.ttl = float(ttl)
+        self.sweep_interval = float(sweep_interval)
+        self.hits = 0
+        self.misses = 0
+        # key -> (后缀, 大小)，按最近使用排序，最久未使用的在前
+        self._index: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError as e:
+            LOG.warning(f"创建缓存目录 {self.directory} 失败: {e}")
+            return
+        self._sweep()
+
+    # ----------------------------
+    # region 读写
+    # ----------------------------
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        读取缓存内容，未命中或已过期返回 None
+        """
+        item = self.load(key)
+        return item[0] if item else None
+
+    def load(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """
+        读取缓存内容及写入时的后缀，未命中或已过期返回 None
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+        suffix = entry[0]
+        path = os.path.join(self.directory, key + suffix)
+        try:
+            st = os.stat(path)
+            if time.time() - st.st_mtime > self.ttl:
+                self._unlink(path)
+                self._drop(key, entry)
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+            # atime 记录最近使用时间，mtime 保持为写入时间
+            os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+        except FileNotFoundError:
+            # 已被其他进程淘汰
+            self._drop(key, entry)
+            return None
+        except OSError as e:
+            LOG.warning(f"读取缓存文件失败: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            self.hits += 1
+        return data, suffix
+
+    def put(self, key: str, data: bytes, suffix: Optional[str] = None):
+        """写入缓存内容，`suffix` 为文件后缀 (如 `.png`)，为空时使用默认后缀"""
+        suffix = suffix or self.suffix
+        path = os.path.join(self.directory, key + suffix)
+        # 先写临时文件再替换，多个进程共用缓存目录时不会读到半个文件
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}{TMP_SUFFIX}"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            LOG.warning(f"写入缓存文件失败: {e}")
+            self._unlink(tmp_path)
+            return
+        with self._lock:
+            old = self._index.pop(key, None)
+            self._index[key] = (suffix, len(data))
+            self._total_bytes += len(data) - (old[1] if old else 0)
+            need_sweep = (
+                self._total_bytes > self.max_bytes
+                or time.monotonic() >= self._next_sweep
+            )
+        # 同一个键换了格式时删除旧后缀的文件
+        if old and old[0] != suffix:
+            self._unlink(os.path.join(self.directory, key + old[0]))
+        if need_sweep:
+            self._sweep()
+
+    async def get_async(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def load_async(self, key: str) -> Optional[Tuple[bytes, str]]:
+        return await asyncio.to_thread(self.load, key)
+
+    async def put_async(self, key: str, data: bytes, suffix: Optional[str] = None):
+        await asyncio.to_thread(self.put, key, data, suffix)
+
+    # ----------------------------
+    # region 索引与淘汰
+    # ----------------------------
+    def _find(self, key: str) -> Optional[str]:
+        """索引中键对应的文件路径"""
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        return os.path.join(self.directory, key + entry[0])
+
+    def _drop(self, key: str, entry: Tuple[str, int]):
+        """文件已失效或已被删除：移出索引并记为未命中"""
+        with self._lock:
+            if self._index.get(key) == entry:
+                del self._index[key]
+                self._total_bytes -= entry[1]
+            self.misses += 1
+
+    @staticmethod
+    def _unlink(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程互斥的目录锁，同一时刻只有一个进程在扫描和淘汰"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, LOCK_FILE), "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sweep(self):
+        """
+        扫描缓存目录并重建索引：删除过期文件、残留的临时文件以及同一个键
+        旧后缀的文件，总大小超过上限时按 atime 从最久未使用的文件开始删除
+        """
+        # 扫描期间持有索引锁，写入在扫描结束后再登记，不会被重建的索引覆盖
+        with self._lock, self._file_lock():
+            self._next_sweep = time.monotonic() + self.sweep_interval
+            try:
+                now = time.time()
+                # key -> (atime, mtime, 后缀, 大小)
+                found: Dict[str, Tuple[float, float, str, int]] = {}
+                with os.scandir(self.directory) as it:
+                    for entry in it:
+                        if entry.name == LOCK_FILE or not entry.is_file():
+                            continue
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        if entry.name.endswith(TMP_SUFFIX):
+                            if now - st.st_mtime > STALE_TMP_AGE:
+                                self._unlink(entry.path)
+                            continue
+                        if now - st.st_mtime > self.ttl:
+                            self._unlink(entry.path)
+                            continue
+                        key, dot, suffix = entry.name.partition(".")
+                        item = (st.st_atime, st.st_mtime, dot + suffix, st.st_size)
+                        other = found.get(key)
+                        if other is not None:
+                            # 保留较新写入的文件
+                            stale, item = sorted((other, item), key=lambda i: i[1])
+                            self._unlink(os.path.join(self.directory, key + stale[2]))
+                        found[key] = item
+            except OSError as e:
+                LOG.warning(f"整理缓存目录 {self.directory} 失败: {e}")
+                return
+
+            entries = sorted(found.items(), key=lambda kv: kv[1][0])
+            total = sum(item[3] for _, item in entries)
+            evicted = 0
+            for key, (_, _, suffix, size) in entries:
+                if total <= self.max_bytes:
+                    break
+                self._unlink(os.path.join(self.directory, key + suffix))
+                total -= size
+                evicted += 1
+            self._index = OrderedDict(
+                (key, (suffix, size)) for key, (_, _, suffix, size) in entries[evicted:]
+            )
+            self._total_bytes = total
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": len(self._index),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
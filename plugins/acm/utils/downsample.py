@@ -0,0 +1,92 @@
+from typing import Optional
+
+import numpy as np
+
+# 降采样至少保留的点数 (首尾两点)
+MIN_BUDGET = 2
+
+
+def lttb_indices(
+    y: np.ndarray, n_out: int, x: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留点的下标 (升序)
+
+    首尾两点总是保留；中间的点平均分成 n_out - 2 个桶，每个桶保留与
+    前一个已选点、下一个桶平均点构成三角形面积最大的点。
+    桶内的面积计算是向量化的，只有逐桶的选择是循环。
+
+    Args:
+        y: 数值序列
+        n_out: 保留的点数
+        x: 横坐标，为空时使用下标
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # 每个桶的平均点，作为前一个桶选点时的第三个顶点
+    sums_x = np.add.reduceat(x[1 : n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1 : n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs(
+            (x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def bucket_peak_indices(y: np.ndarray, buckets: int) -> np.ndarray:
+    """把序列平均分成若干段，返回每段最大值 (局部峰值) 第一次出现的下标"""
+    n = len(y)
+    buckets = max(1, min(buckets, n))
+    y = np.asarray(y)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)[:-1]
+    peaks = np.maximum.reduceat(y, edges)
+    segment = np.repeat(np.arange(buckets), np.diff(np.append(edges, n)))
+    hits = np.flatnonzero(y == peaks[segment])
+    _, first = np.unique(segment[hits], return_index=True)
+    return hits[first]
+
+
+def downsample_indices(
+    y: np.ndarray, budget: int, x: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    在 `budget` 个点以内降采样，保证保留首尾、最大值、最小值与各段的局部峰值
+
+    约四分之一的点数用于各段峰值，其余交给 LTTB 保留整体形状。
+    点数不够时依次舍弃靠后的段峰值、最小值、最大值，首尾总是保留。
+    """
+    n = len(y)
+    if budget >= n:
+        return np.arange(n)
+    if budget < MIN_BUDGET:
+        raise ValueError(f"降采样至少保留 {MIN_BUDGET} 个点，实际为 {budget}")
+    y = np.asarray(y)
+    forced = np.concatenate(
+        (
+            [0, n - 1, int(np.argmax(y)), int(np.argmin(y))],
+            bucket_peak_indices(y, max(1, budget // 4)),
+        )
+    )
+    # 按上面的优先级去重后截取，保证不超过 budget
+    _, first = np.unique(forced, return_index=True)
+    keep = np.sort(forced[np.sort(first)[:budget]])
+    rest = budget - len(keep)
+    if rest >= 3:
+        keep = np.union1d(keep, lttb_indices(y, rest, x))
+    return keep
@@ -0,0 +1,113 @@
+import os
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+# 每个指标保留的最近样本数
+DEFAULT_WINDOW = 200
+
+
+def percentile(values, q: float) -> float:
+    """
+    计算分位数 (最近秩法)
+
+    Args:
+        values: 样本序列
+        q: 分位 (0-100)
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return float(ordered[index])
+
+
+class LatencyRecorder:
+    """
+    按名称记录耗时样本，提供 p50/p95/p99 等统计
+
+    只保留最近 `window` 个样本，内存占用固定。
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, name: str, seconds: float):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            self._samples[name] = samples
+        samples.append(seconds)
+        self._counts[name] = self._counts.get(name, 0) + 1
+
+    def summary(self, name: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        返回统计信息 (单位: 毫秒)
+
+        Args:
+            name: 指定指标名称，为空时返回全部
+        """
+        names = [name] if name else list(self._samples.keys())
+        result: Dict[str, Dict[str, float]] = {}
+        for n in names:
+            samples = self._samples.get(n)
+            if not samples:
+                continue
+            result[n] = {
+                "count": self._counts.get(n, 0),
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "max_ms": max(samples) * 1000,
+            }
+        return result
+
+
+def process_tree_rss(
+    root_pid: Optional[int] = None, match: str = ""
+) -> Optional[int]:
+    """
+    统计某进程所有子孙进程的常驻内存 (RSS, 字节)
+
+    通过读取 /proc 实现，仅支持 Linux，其他平台返回 None。
+
+    Args:
+        root_pid: 根进程，为空时为当前进程
+        match: 只统计命令行中包含该字符串的进程
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    root_pid = root_pid or os.getpid()
+
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read().decode(errors="ignore")
+            # comm 字段可能包含空格，从最后一个 ')' 之后解析
+            ppid = int(stat[stat.rfind(")") + 2 :].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total = 0
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            if match:
+                with open(f"/proc/{pid}/cmdline", "rb") as f:
+                    if match not in f.read().decode(errors="ignore"):
+                        continue
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except (OSError, ValueError):
+            continue
+    return total
@@ -1,11 +1,25 @@
+import asyncio
+import json
+import random
+import time
 from enum import Enum
-from typing import Dict, Optional, Any
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
 
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits, Response, Timeout, TransportError
 from ncatbot.utils import get_log
 
+from .ratelimit import TokenBucket
+
 LOG = get_log()
 
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 
 class Method(Enum):
     POST = "POST"
@@ -17,11 +31,445 @@ class Method(Enum):
 DEFAULT_HEADERS = {
     "Content-Type": "application/json",
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.77 Safari/537.36",
-    "Connection": "close",
 }
 
+# 连接池默认参数
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 60.0
+# 关闭其他事件循环中的客户端时最多等待的时间(秒)
+CLOSE_TIMEOUT = 5.0
+
+
+# 各 host 的限速: host -> (每秒请求数, 突发请求数)，子域名使用同一限速
+# Codeforces API 要求每 2 秒最多 1 次请求，允许少量突发
+DEFAULT_HOST_LIMITS: Dict[str, Tuple[float, float]] = {
+    "codeforces.com": (0.5, 2),
+    "scpc.fun": (5.0, 10),
+}
+# 单个请求被限流或遇到临时错误后最多重试的次数
+DEFAULT_HTTP_RETRIES = 3
+# 退避时间：首次 BACKOFF_BASE 秒，连续失败时翻倍，最多 BACKOFF_MAX 秒
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+# 每个 host 的重试预算：每秒补充的重试次数与最多累积的次数
+RETRY_BUDGET_RATE = 0.1
+RETRY_BUDGET_BURST = 5
+# 表示被限流的 HTTP 状态码，以及可以重试的临时错误状态码
+THROTTLE_STATUS = (429, 503)
+RETRY_STATUS = (502, 504)
+# Codeforces 超过频率限制时返回 FAILED 与该信息
+CF_FAILED_PREFIX = '{"status":"FAILED"'
+CF_CALL_LIMIT = "Call limit exceeded"
+
+
+class FetchError(Exception):
+    """上游请求失败（网络错误、HTTP 错误状态或响应无法解析）"""
+
+
+class RateLimitedError(FetchError):
+    """上游持续限流，重试次数或重试预算已用完"""
+
+
+class HttpClientManager:
+    """
+    长生命周期的 HTTP 客户端管理器
+
+    所有平台请求共用同一个 `AsyncClient`，按 host 复用 keep-alive 连接，
+    在安装了 `h2` 时对支持的站点启用 HTTP/2。
+
+    ncatbot 的定时任务运行在独立线程的事件循环中，而 `AsyncClient`
+    绑定创建它的事件循环，因此这里按事件循环分别维护客户端。
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY,
+        http2: bool = True,
+    ):
+        self._clients: Dict[asyncio.AbstractEventLoop, AsyncClient] = {}
+        self.configure(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            http2=http2,
+        )
+
+    def configure(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY,
+        http2: bool = True,
+    ):
+        """
+        更新连接池参数，仅对之后新建的客户端生效
+
+        Args:
+            max_connections: 最大连接数
+            max_keepalive_connections: 最大保持的空闲连接数
+            keepalive_expiry: 空闲连接保持时间(秒)
+            http2: 是否尝试启用 HTTP/2
+        """
+        self.limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and not HTTP2_AVAILABLE:
+            LOG.debug("未安装 h2，HTTP 客户端将仅使用 HTTP/1.1")
+        self.http2 = http2 and HTTP2_AVAILABLE
+
+    def get_client(self) -> AsyncClient:
+        """获取当前事件循环对应的客户端，不存在时创建"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # 清理已经结束的事件循环留下的客户端
+            for stale in [lp for lp in self._clients if lp.is_closed()]:
+                self._clients.pop(stale, None)
+            client = AsyncClient(limits=self.limits, http2=self.http2)
+            self._clients[loop] = client
+        return client
+
+    async def request(
+        self,
+        method: Method,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        payload: Optional[Dict[str, Any]] = None,
+        timeout: float = 30.0,
+    ) -> Response:
+        """
+        发送请求并返回原始响应
+
+        Args:
+            method: 请求方式
+            url: 目标url地址
+            headers: HTTP请求头
+            payload: 请求数据
+            timeout: 请求超时时间(秒)
+        """
+        client = self.get_client()
+        return await client.request(
+            method=method.value,
+            url=url,
+            json=payload,
+            headers=headers,
+            timeout=Timeout(timeout),
+        )
+
+    async def close(self):
+        """
+        关闭所有事件循环中的客户端
+
+        `AsyncClient` 只能在创建它的事件循环中关闭：其他事件循环仍在运行时
+        把关闭操作提交过去并等待完成，已经结束的事件循环无法再关闭连接，
+        只记录日志后丢弃。
+        """
+        clients = self._clients
+        self._clients = {}
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        for client_loop, client in clients.items():
+            try:
+                if client_loop is loop:
+                    await client.aclose()
+                elif client_loop.is_running() and not client_loop.is_closed():
+                    future = asyncio.run_coroutine_threadsafe(
+                        client.aclose(), client_loop
+                    )
+                    await asyncio.wait_for(asyncio.wrap_future(future), CLOSE_TIMEOUT)
+                elif not client.is_closed:
+                    LOG.warning("HTTP 客户端所属的事件循环已结束，无法关闭其连接")
+            except Exception as e:
+                LOG.warning(f"关闭 HTTP 客户端失败: {e}")
+
+
+class HostRateLimiter:
+    """
+    按 host 限流与自适应退避
+
+    - 配置了限速的 host 每次请求前从各自的令牌桶取令牌，
+      子域名 (如 mirror.codeforces.com) 与主域名共用一个令牌桶
+    - 收到限流响应后该 host 进入退避期，期间所有请求等待；连续限流时
+      退避时间翻倍，有 Retry-After 时取两者较大值，请求成功后恢复
+    - 每次重试消耗该 host 的重试预算，预算用完后不再重试，
+      避免上游故障时重试把请求量放大数倍
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Sequence[float]]] = None,
+        max_retries: int = DEFAULT_HTTP_RETRIES,
+    ):
+        self.configure(limits, max_retries)
+
+    def configure(
+        self,
+        limits: Optional[Dict[str, Sequence[float]]] = None,
+        max_retries: int = DEFAULT_HTTP_RETRIES,
+    ):
+        """
+        更新各 host 的限速，会清空已有的令牌桶与退避状态
+
+        Args:
+            limits: host -> (每秒请求数, 突发请求数)，为空时使用默认值
+            max_retries: 单个请求最多重试的次数
+        """
+        if limits is None:
+            limits = DEFAULT_HOST_LIMITS
+        self.limits: Dict[str, Tuple[float, float]] = {
+            host.lower(): (float(limit[0]), float(limit[1]))
+            for host, limit in limits.items()
+        }
+        self.max_retries = max(0, int(max_retries))
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._retry_budgets: Dict[str, TokenBucket] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._strikes: Dict[str, int] = {}
+        self.throttled = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+
+    def _limit_key(self, host: str) -> str:
+        """限速配置中匹配 host 的键，没有匹配时返回 host 本身"""
+        host = host.lower()
+        while host:
+            if host in self.limits:
+                return host
+            host = host.partition(".")[2]
+        return ""
+
+    def _key(self, host: str) -> str:
+        return self._limit_key(host) or host.lower()
+
+    async def acquire(self, host: str):
+        """
+        等待退避期结束，并从该 host 的令牌桶取走一个令牌
+
+        等待期间其他请求可能再次收到限流响应、延长退避期，
+        因此每次醒来都重新检查，直到不在退避期内且拿到令牌。
+        """
+        key = self._key(host)
+        bucket = None
+        if key in self.limits:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(*self.limits[key])
+                self._buckets[key] = bucket
+        while True:
+            delay = self._blocked_until.get(key, 0.0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if bucket is None or bucket.try_acquire():
+                return
+            await asyncio.sleep(bucket.wait_time())
+
+    def on_success(self, host: str):
+        self._strikes.pop(self._key(host), None)
+
+    def on_throttled(self, host: str, retry_after: Optional[float] = None) -> float:
+        """
+        记录一次限流，让该 host 进入退避期
+
+        Returns:
+            本次退避的时间(秒)
+        """
+        key = self._key(host)
+        strikes = self._strikes.get(key, 0) + 1
+        self._strikes[key] = strikes
+        self.throttled += 1
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (strikes - 1))
+        if retry_after:
+            delay = max(delay, min(retry_after, BACKOFF_MAX))
+        # 在 [delay/2, delay] 内随机，避免等待中的请求同时恢复
+        delay = random.uniform(delay / 2, delay)
+        until = time.monotonic() + delay
+        self._blocked_until[key] = max(self._blocked_until.get(key, 0.0), until)
+        return delay
+
+    def try_retry(self, host: str, attempt: int) -> bool:
+        """第 `attempt` 次重试是否允许：未超过重试次数且该 host 还有重试预算"""
+        if attempt > self.max_retries:
+            return False
+        key = self._key(host)
+        budget = self._retry_budgets.get(key)
+        if budget is None:
+            budget = TokenBucket(RETRY_BUDGET_RATE, RETRY_BUDGET_BURST)
+            self._retry_budgets[key] = budget
+        if not budget.try_acquire():
+            self.budget_exhausted += 1
+            return False
+        self.retries += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        now = time.monotonic()
+        return {
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "budget_exhausted": self.budget_exhausted,
+            "backing_off": sum(1 for t in self._blocked_until.values() if t > now),
+        }
+
 
-async def fetch_html(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30.0) -> str:
+def _is_throttled(response: Response) -> bool:
+    if response.status_code in THROTTLE_STATUS:
+        return True
+    # Codeforces 也可能以 FAILED 响应体表示超过频率限制
+    text = response.text
+    return text.startswith(CF_FAILED_PREFIX) and CF_CALL_LIMIT in text
+
+
+def _retry_after(response: Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def _jittered_backoff(attempt: int) -> float:
+    """第 `attempt` 次重试前的等待时间，在 [0, 退避上限] 内随机 (full jitter)"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+class SingleFlight:
+    """
+    合并相同的并发请求 (single-flight)
+
+    同一时刻对同一个 key 的多次调用只会真正执行一次，其余调用者等待
+    同一个任务并拿到相同的结果（或异常）。结果对象在调用者之间共享，
+    调用方不应修改返回值。
+    """
+
+    def __init__(self):
+        self._calls: Dict[
+            Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task
+        ] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或加入一个进行中的调用
+
+        Args:
+            key: 请求去重使用的键
+            func: 实际发起请求的协程函数
+
+        Returns:
+            func 的返回值
+        """
+        loop = asyncio.get_running_loop()
+        call_key = (loop, key)
+        task = self._calls.get(call_key)
+        if task is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            task = loop.create_task(func())
+            self._calls[call_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(call_key, None))
+        # shield: 单个调用者被取消时不影响其他等待者
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        """返回命中/未命中计数以及当前进行中的请求数"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "in_flight": len(self._calls),
+        }
+
+
+def request_key(
+    method: Method,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    payload: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, str, str, str]:
+    """
+    生成用于请求合并的键 (method + url + headers + payload)
+    """
+    return (
+        method.value,
+        url,
+        json.dumps(headers or {}, sort_keys=True),
+        json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str),
+    )
+
+
+# Global instance
+http_client = HttpClientManager()
+host_limiter = HostRateLimiter()
+single_flight = SingleFlight()
+
+
+async def limited_request(
+    method: Method,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    payload: Optional[Dict[str, Any]] = None,
+    timeout: float = 30.0,
+) -> Response:
+    """
+    按 host 限流发送请求，被限流或遇到临时错误时退避后重试
+
+    网络错误只对 GET 请求重试。重试次数或重试预算用完后，
+    仍被限流时抛出 RateLimitedError，其他情况返回最后一次的响应或抛出原异常。
+    """
+    host = urlsplit(url).hostname or ""
+    attempt = 0
+    while True:
+        await host_limiter.acquire(host)
+        response: Optional[Response] = None
+        try:
+            response = await http_client.request(
+                method, url, headers=headers, payload=payload, timeout=timeout
+            )
+        except TransportError:
+            if method is not Method.GET:
+                raise
+            throttled = False
+            if not host_limiter.try_retry(host, attempt + 1):
+                raise
+        else:
+            throttled = _is_throttled(response)
+            if not throttled and response.status_code not in RETRY_STATUS:
+                host_limiter.on_success(host)
+                return response
+            if throttled:
+                # 不论是否重试都进入退避期，由 acquire 等待，
+                # 同一 host 的其他请求也会一起等待
+                delay = host_limiter.on_throttled(host, _retry_after(response))
+            if not host_limiter.try_retry(host, attempt + 1):
+                if throttled:
+                    raise RateLimitedError(
+                        f"{host} 持续限流 (HTTP {response.status_code})"
+                    )
+                return response
+
+        attempt += 1
+        if throttled:
+            LOG.warning(f"{host} 限流，{delay:.1f} 秒后第 {attempt} 次重试")
+        else:
+            delay = _jittered_backoff(attempt)
+            LOG.warning(f"请求 {url} 失败，{delay:.1f} 秒后第 {attempt} 次重试")
+            await asyncio.sleep(delay)
+
+
+async def fetch_html(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 30.0,
+    raise_on_error: bool = False,
+) -> str:
     """
     直接通过GET请求获取HTML文本信息
 
@@ -29,6 +477,7 @@ async def fetch_html(url: str, headers: Optional[Dict[str, str]] = None, timeout
         url: 目标url地址
         headers: HTTP请求头
         timeout: 请求超时时间(秒)
+        raise_on_error: 失败时抛出 FetchError 而不是返回空字符串
 
     Returns:
         HTML文本信息
@@ -36,13 +485,19 @@ async def fetch_html(url: str, headers: Optional[Dict[str, str]] = None, timeout
     if headers is None:
         headers = DEFAULT_HEADERS
 
+    async def _do() -> str:
+        response = await limited_request(
+            Method.GET, url, headers=headers, timeout=timeout
+        )
+        response.raise_for_status()
+        return response.text
+
     try:
-        async with AsyncClient(timeout=timeout) as client:
-            response = await client.get(url=url, headers=headers)
-            response.raise_for_status()
-            return response.text
+        return await single_flight.do(request_key(Method.GET, url, headers), _do)
     except Exception as e:
         LOG.error(f"Failed to fetch HTML from {url}: {e}")
+        if raise_on_error:
+            raise FetchError(f"Failed to fetch HTML from {url}: {e}") from e
         return ""
 
 
@@ -52,6 +507,8 @@ async def fetch_json(
     payload: Optional[Dict[str, Any]] = None,
     method: Method = Method.GET,
     timeout: float = 30.0,
+    raise_on_error: bool = False,
+    error_json: bool = False,
 ) -> Dict[str, Any]:
     """
     通过自定义请求获取请求数据
@@ -62,6 +519,9 @@ async def fetch_json(
         payload: 请求数据
         method: 请求方式
         timeout: 请求超时时间(秒)
+        raise_on_error: 失败时抛出 FetchError 而不是返回空字典
+        error_json: HTTP 错误状态时仍尝试解析 JSON 响应体
+            (例如 Codeforces 在 400 响应中返回 FAILED 与原因)
 
     Returns:
         JSON数据转义后的字典
@@ -69,13 +529,24 @@ async def fetch_json(
     if headers is None:
         headers = DEFAULT_HEADERS
 
+    async def _do() -> Dict[str, Any]:
+        response = await limited_request(
+            method, url, headers=headers, payload=payload, timeout=timeout
+        )
+        if error_json and response.is_error:
+            try:
+                return response.json()
+            except ValueError:
+                pass
+        response.raise_for_status()
+        return response.json()
+
     try:
-        async with AsyncClient(timeout=timeout) as client:
-            response = await client.request(
-                url=url, json=payload, headers=headers, method=method.value
-            )
-            response.raise_for_status()
-            return response.json()
+        return await single_flight.do(
+            request_key(method, url, headers, payload), _do
+        )
     except Exception as e:
         LOG.error(f"Error fetching JSON from {url}: {e}")
+        if raise_on_error:
+            raise FetchError(f"Error fetching JSON from {url}: {e}") from e
         return {}
@@ -0,0 +1,274 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from ncatbot.utils import get_log
+
+from .metrics import LatencyRecorder
+from .text import image_to_base64
+
+LOG = get_log()
+
+DEFAULT_OUTBOX_WORKERS = 4
+# 合并后单条文本消息的最大长度
+DEFAULT_MERGE_CHARS = 3000
+MERGE_SEPARATOR = "\n\n"
+
+
+class Priority(IntEnum):
+    """发送优先级，数值越小越先发送"""
+
+    INTERACTIVE = 0  # 用户命令的回复
+    BROADCAST = 1  # 提醒、播报等后台消息
+
+
+@dataclass
+class _Outgoing:
+    kind: str  # text / image / file / forward
+    group_id: str
+    payload: Any
+    priority: int
+    enqueued_at: float
+    future: asyncio.Future
+    merged: int = 1  # 合并进本条的消息数量
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+class Outbox:
+    """
+    统一的群消息发送队列
+
+    所有群消息按优先级排队，由固定数量的 worker 发送：用户命令的回复
+    先于后台广播发送；同一个群同一时刻只有一条消息在发送，保证顺序。
+    同一群、同一优先级尚未发出的多条文本会合并为一次发送。
+    调用方等待的 Future 在消息真正发出后完成，发送异常会原样抛给调用方。
+    另外记录每种消息的发送耗时，以及图片的上传大小。
+    """
+
+    def __init__(
+        self,
+        api,
+        workers: int = DEFAULT_OUTBOX_WORKERS,
+        merge_chars: int = DEFAULT_MERGE_CHARS,
+    ):
+        self._senders = {
+            "text": api.send_group_text,
+            "image": api.send_group_image,
+            "file": api.send_group_file,
+            "forward": api.post_group_forward_msg,
+        }
+        self.workers = max(1, int(workers))
+        self.merge_chars = int(merge_chars)
+        self.latency = LatencyRecorder()
+        self.send_latency = LatencyRecorder()
+        self._image_count = 0
+        self._image_bytes = 0
+        self._heap: List[Tuple[int, int, _Outgoing]] = []
+        self._seq = itertools.count()
+        # 正在发送的群，以及因此暂缓的消息
+        self._busy: Set[str] = set()
+        self._parked: Dict[str, List[Tuple[int, int, _Outgoing]]] = {}
+        # (group_id, priority) -> 尚未发出、可继续合并的文本消息
+        self._mergeable: Dict[Tuple[str, int], _Outgoing] = {}
+        self._depth = 0
+        self._max_depth = 0
+        self._merged_total = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    # ----------------------------
+    # region 生命周期
+    # ----------------------------
+    def start(self):
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        pending = [entry[2] for entry in self._heap]
+        for parked in self._parked.values():
+            pending.extend(entry[2] for entry in parked)
+        for item in pending:
+            if not item.future.done():
+                item.future.cancel()
+        self._heap.clear()
+        self._parked.clear()
+        self._mergeable.clear()
+        self._depth = 0
+
+    # ----------------------------
+    # region 发送接口
+    # ----------------------------
+    async def send_text(
+        self, group_id, text: str, priority: Priority = Priority.INTERACTIVE
+    ):
+        return await self._submit("text", group_id, text, priority)
+
+    async def send_image(
+        self,
+        group_id,
+        image: Union[str, bytes],
+        priority: Priority = Priority.INTERACTIVE,
+    ):
+        """发送图片，`image` 可以是路径/URL，也可以是图片数据 (以 base64 发送)"""
+        if isinstance(image, (bytes, bytearray)):
+            image = image_to_base64(image)
+        return await self._submit("image", group_id, image, priority)
+
+    async def send_file(
+        self,
+        group_id,
+        path: str,
+        name: Optional[str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ):
+        return await self._submit("file", group_id, path, priority, name=name)
+
+    async def send_forward(
+        self, group_id, forward, priority: Priority = Priority.INTERACTIVE
+    ):
+        return await self._submit("forward", group_id, forward, priority)
+
+    async def send_broadcast_text(self, group_id, text: str):
+        """供广播器使用的低优先级文本发送"""
+        return await self.send_text(group_id, text, Priority.BROADCAST)
+
+    def stats(self) -> Dict[str, Any]:
+        """当前队列深度、合并次数与各优先级的排队等待时间"""
+        return {
+            "depth": self._depth,
+            "max_depth": self._max_depth,
+            "busy_groups": len(self._busy),
+            "merged": self._merged_total,
+            "wait": self.latency.summary(),
+            "send": self.send_latency.summary(),
+            "images": self._image_count,
+            "image_kb": round(self._image_bytes / 1024, 1),
+        }
+
+    async def _submit(self, kind: str, group_id, payload, priority: int, **kwargs):
+        if not self._tasks:
+            # 未启动时直接发送，例如插件加载完成之前
+            return await self._senders[kind](group_id, payload, **kwargs)
+
+        group_id = str(group_id)
+        priority = int(priority)
+        if kind == "text":
+            item = self._mergeable.get((group_id, priority))
+            if item is not None and (
+                len(item.payload) + len(MERGE_SEPARATOR) + len(payload)
+                <= self.merge_chars
+            ):
+                item.payload += MERGE_SEPARATOR + payload
+                item.merged += 1
+                self._merged_total += 1
+                return await asyncio.shield(item.future)
+
+        item = _Outgoing(
+            kind=kind,
+            group_id=group_id,
+            payload=payload,
+            priority=priority,
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future(),
+            kwargs=kwargs,
+        )
+        if kind == "text":
+            self._mergeable[(group_id, priority)] = item
+        else:
+            # 之后的文本不能再并入排在这条之前的文本，否则会越过它先发出
+            self._mergeable.pop((group_id, priority), None)
+        heapq.heappush(self._heap, (priority, next(self._seq), item))
+        self._depth += 1
+        self._max_depth = max(self._max_depth, self._depth)
+        self._wakeup.set()
+        return await asyncio.shield(item.future)
+
+    # ----------------------------
+    # region 发送循环
+    # ----------------------------
+    async def _next(self) -> _Outgoing:
+        while True:
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                item = entry[2]
+                if item.group_id in self._busy:
+                    self._parked.setdefault(item.group_id, []).append(entry)
+                    continue
+                return item
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def _release(self, group_id: str):
+        self._busy.discard(group_id)
+        parked = self._parked.pop(group_id, None)
+        if parked:
+            for entry in parked:
+                heapq.heappush(self._heap, entry)
+            self._wakeup.set()
+
+    async def _worker(self):
+        while True:
+            item = await self._next()
+            if self._mergeable.get((item.group_id, item.priority)) is item:
+                del self._mergeable[(item.group_id, item.priority)]
+            self._busy.add(item.group_id)
+            self._depth -= 1
+            name = Priority(item.priority).name.lower()
+            self.latency.record(f"wait_{name}", time.monotonic() - item.enqueued_at)
+            try:
+                sender = self._senders[item.kind]
+                sent_at = time.monotonic()
+                result = await sender(item.group_id, item.payload, **item.kwargs)
+                self.send_latency.record(
+                    f"send_{item.kind}", time.monotonic() - sent_at
+                )
+                if item.kind == "image":
+                    self._image_count += 1
+                    self._image_bytes += image_upload_size(item.payload)
+                if not item.future.done():
+                    item.future.set_result(result)
+            except asyncio.CancelledError:
+                if not item.future.done():
+                    item.future.cancel()
+                raise
+            except Exception as e:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            finally:
+                self._release(item.group_id)
+
+
+def image_upload_size(image: str) -> int:
+    """base64 图片解码后的字节数，路径或 URL 形式的图片读取本地文件大小"""
+    if image.startswith("base64://"):
+        encoded = image[len("base64://") :]
+        return len(encoded) * 3 // 4 - encoded[-2:].count("=")
+    try:
+        return os.path.getsize(image)
+    except OSError:
+        return 0
+
+
+def log_outbox_stats(outbox: Outbox):
+    stats = outbox.stats()
+    LOG.info(
+        f"发送队列: 当前 {stats['depth']} 条, 峰值 {stats['max_depth']} 条, "
+        f"已合并 {stats['merged']} 条, 等待时间 {stats['wait']}"
+    )
+    LOG.info(
+        f"发送耗时: {stats['send']}, 已发送图片 {stats['images']} 张 "
+        f"共 {stats['image_kb']} KB"
+    )
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    令牌桶限流器
+
+    以 `rate` 个/秒的速度补充令牌，最多累积 `capacity` 个，
+    `acquire` 在令牌不足时异步等待。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(float(rate), 1e-6)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """尝试立即取走令牌，不足时返回 False"""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """令牌补充到 `tokens` 个还需要等待的时间(秒)"""
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    async def acquire(self, tokens: float = 1.0):
+        """取走令牌，不足时等待补充"""
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.wait_time(tokens))
@@ -0,0 +1,126 @@
+import datetime
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .chart import RANK_BANDS, y_axis_range
+from .downsample import MIN_BUDGET, downsample_indices
+
+# 图表中最多绘制的点数，超过后降采样
+DEFAULT_MAX_POINTS = 120
+# 最多缓存多少个用户的 Rating 序列
+DEFAULT_MAX_HANDLES = 256
+
+
+class RatingSeries:
+    """
+    单个用户预先计算好的 Rating 序列
+
+    保存每场比赛的时间、积分与比赛信息，以及历史最高积分曲线、
+    纵轴范围和可见的段位色带。有新比赛时只追加新的部分。
+    """
+
+    def __init__(self):
+        self.times = np.empty(0, dtype=np.int64)
+        self.ratings = np.empty(0, dtype=np.int64)
+        self.max_line = np.empty(0, dtype=np.int64)
+        self.labels: List[str] = []
+        self.meta: List[Dict[str, object]] = []
+        self.y_range: Tuple[int, int, int] = (0, 0, 1)
+        self.bands: List[Tuple[int, int, str, float]] = []
+
+    def __len__(self) -> int:
+        return len(self.ratings)
+
+    def matches_prefix(self, history: list) -> bool:
+        """history 是否为已缓存序列加上新比赛"""
+        n = len(self)
+        return (
+            n > 0
+            and len(history) >= n
+            and history[0].rating_update_time_seconds == self.times[0]
+            and history[n - 1].rating_update_time_seconds == self.times[-1]
+        )
+
+    def extend(self, entries: list):
+        if not entries:
+            return
+        times = np.fromiter(
+            (h.rating_update_time_seconds for h in entries), np.int64, len(entries)
+        )
+        ratings = np.fromiter((h.new_rating for h in entries), np.int64, len(entries))
+        # 历史最高积分：新部分的前缀最大值与已有最高值取较大者
+        max_line = np.maximum.accumulate(ratings)
+        if len(self):
+            max_line = np.maximum(max_line, self.max_line[-1])
+
+        self.times = np.concatenate((self.times, times))
+        self.ratings = np.concatenate((self.ratings, ratings))
+        self.max_line = np.concatenate((self.max_line, max_line))
+        for h in entries:
+            dt = datetime.datetime.fromtimestamp(h.rating_update_time_seconds)
+            self.labels.append(dt.strftime("%Y-%m-%d"))
+            self.meta.append(
+                {
+                    "contest": h.contest_name,
+                    "rank": h.rank,
+                    "old": h.old_rating,
+                    "new": h.new_rating,
+                }
+            )
+
+        self.y_range = y_axis_range(
+            int(self.ratings.min()), int(self.ratings.max())
+        )
+        lo, hi, _ = self.y_range
+        self.bands = [band for band in RANK_BANDS if band[0] < hi and band[1] > lo]
+
+    def points(
+        self, max_points: int = DEFAULT_MAX_POINTS
+    ) -> Tuple[List[str], List[int], List[Dict[str, object]], List[int]]:
+        """
+        降采样后的日期、积分、比赛信息与最高积分曲线
+
+        保留首尾、最高分、最低分与各段的局部峰值，其余点由 LTTB 选取。
+        """
+        indices = downsample_indices(self.ratings, max(max_points, MIN_BUDGET))
+        return (
+            [self.labels[i] for i in indices],
+            self.ratings[indices].tolist(),
+            [self.meta[i] for i in indices],
+            self.max_line[indices].tolist(),
+        )
+
+
+class RatingSeriesCache:
+    """按用户名缓存 RatingSeries，超过上限时淘汰最久未使用的用户"""
+
+    def __init__(self, max_handles: int = DEFAULT_MAX_HANDLES):
+        self.max_handles = max_handles
+        self._series: "OrderedDict[str, RatingSeries]" = OrderedDict()
+
+    def get(self, handle: str) -> Optional[RatingSeries]:
+        return self._series.get(handle.lower())
+
+    def update(self, handle: str, history: list) -> RatingSeries:
+        """
+        用最新的比赛记录更新缓存：只有新比赛时增量追加，
+        记录与缓存对不上 (例如 Rating 回滚) 时重新计算
+        """
+        key = handle.lower()
+        series = self._series.get(key)
+        if series is not None and series.matches_prefix(history):
+            series.extend(history[len(series) :])
+        else:
+            series = RatingSeries()
+            series.extend(history)
+        self._series[key] = series
+        self._series.move_to_end(key)
+        while len(self._series) > self.max_handles:
+            self._series.popitem(last=False)
+        return series
+
+
+# Global instance
+rating_series = RatingSeriesCache()
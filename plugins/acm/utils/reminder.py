@@ -0,0 +1,173 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ncatbot.utils import get_log
+
+from ..platforms.platform import Contest
+
+LOG = get_log()
+
+# 默认提前提醒时间(秒): 1 天 / 1 小时 / 10 分钟
+DEFAULT_LEAD_TIMES = [86400, 3600, 600]
+# 提醒最多允许迟到多久(秒)，超过则丢弃（例如机器人刚重启）
+LATE_GRACE = 120.0
+
+ContestKey = Tuple[str, int]
+ReminderCallback = Callable[[str, Contest, int], Awaitable[None]]
+
+
+@dataclass(order=True)
+class _Timer:
+    fire_at: float
+    seq: int
+    key: ContestKey = field(compare=False)
+    lead: int = field(compare=False)
+    version: int = field(compare=False)
+
+
+def format_lead_time(seconds: int) -> str:
+    """将提前量格式化为中文描述，例如 `1天`、`1小时`、`10分钟`"""
+    if seconds % 86400 == 0:
+        return f"{seconds // 86400}天"
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}小时"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}分钟"
+    return f"{seconds}秒"
+
+
+class ReminderEngine:
+    """
+    基于最小堆的比赛提醒引擎
+
+    每场比赛按各个提前量在堆中放入一个定时器，后台任务只睡眠到堆顶
+    定时器的触发时间。比赛快照变化时只为新增或改期的比赛压入新定时器，
+    旧定时器通过版本号惰性失效，不需要每次全量重建。
+    """
+
+    def __init__(
+        self,
+        callback: ReminderCallback,
+        lead_times: Optional[Iterable[int]] = None,
+    ):
+        self.callback = callback
+        self.lead_times = sorted(
+            {int(t) for t in (lead_times or DEFAULT_LEAD_TIMES) if int(t) > 0},
+            reverse=True,
+        )
+        self._heap: List[_Timer] = []
+        self._seq = itertools.count()
+        self._contests: Dict[ContestKey, Contest] = {}
+        self._versions: Dict[ContestKey, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    def start(self):
+        if self._task:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """停止调度并取消正在发送的提醒"""
+        task = self._task
+        self._task = None
+        tasks = list(self._inflight)
+        if task:
+            tasks.append(task)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def pending(self) -> int:
+        """堆中有效定时器的数量"""
+        return sum(1 for t in self._heap if self._versions.get(t.key) == t.version)
+
+    def sync(self, source: str, contests: List[Contest]):
+        """
+        根据某个平台最新的比赛快照增量更新定时器
+
+        Args:
+            source: 平台标识
+            contests: 该平台最新的比赛列表
+        """
+        now = time.time()
+        seen: Set[ContestKey] = set()
+        changed = False
+        for contest in contests:
+            key = (source, contest.id)
+            seen.add(key)
+            old = self._contests.get(key)
+            self._contests[key] = contest
+            if old is not None and old.start_time == contest.start_time:
+                continue
+            changed |= self._schedule(key, contest, now)
+
+        removed = {k for k in self._contests if k[0] == source and k not in seen}
+        if removed:
+            # 比赛从快照中消失：删除其定时器，之后重新出现时版本号从头计数
+            # 也不会让旧定时器重新生效
+            for key in removed:
+                self._contests.pop(key, None)
+                self._versions.pop(key, None)
+            self._heap = [t for t in self._heap if t.key not in removed]
+            heapq.heapify(self._heap)
+
+        if changed and self._wakeup:
+            self._wakeup.set()
+
+    def _schedule(self, key: ContestKey, contest: Contest, now: float) -> bool:
+        version = self._versions.get(key, 0) + 1
+        self._versions[key] = version
+        pushed = False
+        for lead in self.lead_times:
+            fire_at = contest.start_time - lead
+            if fire_at < now:
+                continue
+            heapq.heappush(
+                self._heap, _Timer(fire_at, next(self._seq), key, lead, version)
+            )
+            pushed = True
+        return pushed
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0].fire_at - time.time())
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    continue  # 堆发生变化，重新计算下一次唤醒时间
+                except asyncio.TimeoutError:
+                    pass
+            self._fire_due()
+
+    def _fire_due(self):
+        now = time.time()
+        while self._heap and self._heap[0].fire_at <= now:
+            timer = heapq.heappop(self._heap)
+            if self._versions.get(timer.key) != timer.version:
+                continue
+            if now - timer.fire_at > LATE_GRACE:
+                continue
+            contest = self._contests.get(timer.key)
+            if contest is None:
+                continue
+            task = asyncio.get_running_loop().create_task(
+                self._notify(timer.key[0], contest, timer.lead)
+            )
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _notify(self, source: str, contest: Contest, lead: int):
+        try:
+            await self.callback(source, contest, lead)
+        except Exception as e:
+            LOG.error(f"发送比赛提醒失败 ({source} {contest.id}): {e}")
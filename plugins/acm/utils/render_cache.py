@@ -0,0 +1,43 @@
+import hashlib
+
+from .disk_cache import DEFAULT_MAX_BYTES, DiskCache
+
+DEFAULT_CACHE_DIR = "data/render_cache"
+# 页面中可能引用外部图片(头像等)，缓存的图片最多保留这么久(秒)
+DEFAULT_TTL = 6 * 3600
+
+
+def image_suffix(data: bytes) -> str:
+    """按文件头判断图片格式，返回对应的文件后缀"""
+    if data.startswith(b"\x89PNG"):
+        return ".png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return ".jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ".webp"
+    return ".bin"
+
+
+class RenderCache(DiskCache):
+    """
+    渲染结果缓存：以 (最终 HTML, 视口宽度, 输出参数) 的哈希为键，图片保存在磁盘上，
+    文件后缀为图片的实际格式
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL,
+    ):
+        super().__init__(directory, max_bytes=max_bytes, ttl=ttl, suffix=".png")
+
+    async def put_image(self, key: str, data: bytes):
+        await self.put_async(key, data, image_suffix(data))
+
+    @staticmethod
+    def key(html_content: str, viewport_width: int, variant: str = "") -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{viewport_width}\0{variant}\0".encode())
+        digest.update(html_content.encode("utf-8"))
+        return digest.hexdigest()
@@ -0,0 +1,384 @@
+import asyncio
+import itertools
+import json
+import os
+import pickle
+import struct
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from ncatbot.utils import get_log
+
+from .metrics import LatencyRecorder, process_tree_rss
+from .render_cache import RenderCache
+from .renderer import DEFAULT_IMAGE_FORMAT, RENDER_TIMEOUT, RENDER_WIDTH
+
+LOG = get_log()
+
+DEFAULT_RENDER_WORKERS = 2
+# 工作进程异常退出后，重启前的等待时间(秒)，连续崩溃时指数增长
+RESPAWN_DELAY = 1.0
+MAX_RESPAWN_DELAY = 60.0
+# 关闭时等待工作进程自行退出的时间(秒)
+SHUTDOWN_TIMEOUT = 10.0
+
+_FRAME_HEADER = struct.Struct("!I")
+# 工作进程模块，与本模块位于同一个包内
+WORKER_MODULE = __name__.rsplit(".", 1)[0] + ".render_worker"
+# 工作进程允许调用的渲染器方法
+JOB_METHODS = ("render", "render_many")
+
+
+# ----------------------------
+# region 进程间消息帧
+# ----------------------------
+def encode_frame(message: Any) -> bytes:
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    return _FRAME_HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Any:
+    """读取一帧消息，对端关闭时抛出 asyncio.IncompleteReadError"""
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    (length,) = _FRAME_HEADER.unpack(header)
+    return pickle.loads(await reader.readexactly(length))
+
+
+def _package_root() -> str:
+    """顶层包所在目录，工作进程需要从这里导入本插件"""
+    path = os.path.abspath(__file__)
+    for _ in range(len(__name__.split("."))):
+        path = os.path.dirname(path)
+    return path
+
+
+class _RenderWorker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.reader_task: Optional[asyncio.Task] = None
+        self.renders = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def load(self) -> int:
+        return len(self.pending)
+
+
+class RenderProcessPool:
+    """
+    多进程渲染池
+
+    启动 `workers` 个工作进程，每个进程各自运行一个 PlaywrightRenderer
+    (独立的 Chromium)，分散到多个 CPU 核心上。主进程只负责把 HTML
+    发给当前待处理任务最少的进程并取回图片数据；工作进程崩溃时，
+    其未完成的任务返回失败，进程在后台自动重启。
+
+    对外提供与 PlaywrightRenderer 相同的 `render` / `render_html` 等接口，
+    渲染缓存在主进程中检查，命中时不经过工作进程。
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_RENDER_WORKERS,
+        worker_config: Optional[Dict[str, Any]] = None,
+        cache: Optional[RenderCache] = None,
+    ):
+        self.worker_count = max(1, int(workers))
+        # 传给每个工作进程中 PlaywrightRenderer 的参数
+        self.worker_config = dict(worker_config or {})
+        self.image_format = self.worker_config.get("image_format", DEFAULT_IMAGE_FORMAT)
+        self.cache = cache
+        self.latency = LatencyRecorder()
+        self.restarts = 0
+        self._workers: List[_RenderWorker] = []
+        self._job_ids = itertools.count(1)
+        self._respawn_tasks: Dict[int, asyncio.Task] = {}
+        self._crash_streak: Dict[int, int] = {}
+        self._closing = False
+
+    # ----------------------------
+    # region 生命周期
+    # ----------------------------
+    async def start(self) -> bool:
+        self._closing = False
+        self._workers = [_RenderWorker(i) for i in range(self.worker_count)]
+        await asyncio.gather(*(self._spawn(w) for w in self._workers))
+        alive = sum(1 for w in self._workers if w.alive)
+        rss = self.memory_usage()
+        rss_note = f"，RSS: {rss / 1024 / 1024:.1f} MB" if rss is not None else ""
+        LOG.info(f"渲染进程池已启动 {alive}/{self.worker_count} 个进程{rss_note}")
+        return alive > 0
+
+    async def close(self):
+        self._closing = True
+        for task in self._respawn_tasks.values():
+            task.cancel()
+        self._respawn_tasks.clear()
+        await asyncio.gather(
+            *(self._stop_worker(w) for w in self._workers), return_exceptions=True
+        )
+
+    async def _spawn(self, worker: _RenderWorker):
+        env = dict(os.environ)
+        root = _package_root()
+        env["PYTHONPATH"] = os.pathsep.join(
+            p for p in (root, env.get("PYTHONPATH")) if p
+        )
+        # 结果通过单独的管道返回，工作进程的 stdout/stderr 仍用于日志输出
+        read_fd, write_fd = os.pipe()
+        try:
+            worker.process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-m",
+                WORKER_MODULE,
+                json.dumps(self.worker_config),
+                str(write_fd),
+                stdin=asyncio.subprocess.PIPE,
+                pass_fds=(write_fd,),
+                env=env,
+            )
+        except Exception as e:
+            LOG.error(f"启动渲染进程 #{worker.index} 失败: {e}")
+            os.close(read_fd)
+            worker.process = None
+            self._schedule_respawn(worker)
+            return
+        finally:
+            os.close(write_fd)
+
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(read_fd, "rb")
+        )
+        worker.reader_task = loop.create_task(self._read_results(worker, reader))
+
+    async def _stop_worker(self, worker: _RenderWorker):
+        process = worker.process
+        if process is None:
+            return
+        if process.returncode is None:
+            try:
+                # 关闭 stdin 通知工作进程关闭浏览器并退出
+                process.stdin.close()
+                await asyncio.wait_for(process.wait(), timeout=SHUTDOWN_TIMEOUT)
+            except (asyncio.TimeoutError, OSError):
+                process.kill()
+                await process.wait()
+        if worker.reader_task:
+            await asyncio.gather(worker.reader_task, return_exceptions=True)
+
+    async def _read_results(
+        self, worker: _RenderWorker, reader: asyncio.StreamReader
+    ):
+        process = worker.process
+        try:
+            while True:
+                job_id, data = await read_frame(reader)
+                future = worker.pending.pop(job_id, None)
+                if future and not future.done():
+                    future.set_result(data)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            LOG.error(f"读取渲染进程 #{worker.index} 输出失败: {e}")
+            process.kill()
+
+        await process.wait()
+        for future in worker.pending.values():
+            if not future.done():
+                future.set_result(None)
+        worker.pending.clear()
+        if not self._closing:
+            LOG.warning(
+                f"渲染进程 #{worker.index} 已退出 (code={process.returncode})，准备重启"
+            )
+            self._schedule_respawn(worker)
+
+    def _schedule_respawn(self, worker: _RenderWorker):
+        if self._closing or worker.index in self._respawn_tasks:
+            return
+        streak = self._crash_streak.get(worker.index, 0)
+        self._crash_streak[worker.index] = streak + 1
+        delay = min(MAX_RESPAWN_DELAY, RESPAWN_DELAY * (2**streak))
+
+        async def respawn():
+            await asyncio.sleep(delay)
+            # 先移除记录，启动再次失败时才能重新排队
+            self._respawn_tasks.pop(worker.index, None)
+            self.restarts += 1
+            await self._spawn(worker)
+
+        self._respawn_tasks[worker.index] = asyncio.get_running_loop().create_task(
+            respawn()
+        )
+
+    # ----------------------------
+    # region 渲染接口
+    # ----------------------------
+    def _pick_worker(self) -> Optional[_RenderWorker]:
+        alive = [w for w in self._workers if w.alive]
+        if not alive:
+            return None
+        return min(alive, key=lambda w: w.load)
+
+    async def render(
+        self,
+        html_content: str,
+        viewport_width: int = RENDER_WIDTH,
+        image_format: Optional[str] = None,
+        scale: float = 1.0,
+    ) -> Optional[bytes]:
+        """
+        将 HTML 交给负载最低的工作进程渲染，返回图片数据，失败时返回 None
+        """
+        image_format = image_format or self.image_format
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.key(
+                html_content, viewport_width, f"{image_format}@{scale:g}"
+            )
+            cached = await self.cache.get_async(cache_key)
+            if cached:
+                return cached
+
+        start = time.perf_counter()
+        data = await self._submit(
+            "render", (html_content, viewport_width, image_format, scale)
+        )
+        if data:
+            self.latency.record("render", time.perf_counter() - start)
+            if cache_key:
+                await self.cache.put_image(cache_key, data)
+        return data
+
+    async def render_many(
+        self,
+        html_contents: List[str],
+        viewport_width: int = RENDER_WIDTH,
+        image_format: Optional[str] = None,
+        scale: float = 1.0,
+    ) -> List[Optional[bytes]]:
+        """
+        整批交给同一个工作进程，在一个页面中渲染，按顺序返回图片数据
+        """
+        image_format = image_format or self.image_format
+        variant = f"{image_format}@{scale:g}"
+        results: List[Optional[bytes]] = [None] * len(html_contents)
+        missing: List[int] = []
+        for i, html_content in enumerate(html_contents):
+            if self.cache:
+                key = self.cache.key(html_content, viewport_width, variant)
+                results[i] = await self.cache.get_async(key)
+            if not results[i]:
+                missing.append(i)
+        if not missing:
+            return results
+
+        start = time.perf_counter()
+        rendered = await self._submit(
+            "render_many",
+            ([html_contents[i] for i in missing], viewport_width, image_format, scale),
+        )
+        if rendered is None:
+            return results
+        self.latency.record("render_many", time.perf_counter() - start)
+        for i, data in zip(missing, rendered):
+            results[i] = data
+            if data and self.cache:
+                key = self.cache.key(html_contents[i], viewport_width, variant)
+                await self.cache.put_image(key, data)
+        return results
+
+    async def _submit(self, method: str, args: tuple) -> Any:
+        """把任务发给负载最低的工作进程并等待结果，失败时返回 None"""
+        worker = self._pick_worker()
+        if worker is None:
+            LOG.error("没有可用的渲染进程")
+            return None
+
+        job_id = next(self._job_ids)
+        future = asyncio.get_running_loop().create_future()
+        worker.pending[job_id] = future
+        try:
+            worker.process.stdin.write(encode_frame((job_id, method, args)))
+            await worker.process.stdin.drain()
+            # 工作进程内部已有渲染超时，这里额外留出排队时间
+            result = await asyncio.wait_for(
+                asyncio.shield(future), timeout=RENDER_TIMEOUT * 2
+            )
+        except asyncio.TimeoutError:
+            LOG.error(f"渲染进程 #{worker.index} 响应超时")
+            return None
+        except (ConnectionError, OSError) as e:
+            LOG.error(f"向渲染进程 #{worker.index} 发送任务失败: {e}")
+            return None
+        finally:
+            worker.pending.pop(job_id, None)
+
+        if result is not None:
+            worker.renders += 1
+            self._crash_streak.pop(worker.index, None)
+        return result
+
+    async def render_html(
+        self,
+        html_content: str,
+        output_path: str,
+        viewport_width: int = RENDER_WIDTH,
+        image_format: Optional[str] = None,
+        scale: float = 1.0,
+    ) -> bool:
+        """
+        将 HTML 文本渲染并保存为图片
+
+        Args:
+            html_content: HTML 内容
+            output_path: 图片保存路径
+            viewport_width: 视口宽度
+            image_format: 输出格式，为空时使用默认格式
+            scale: 设备像素比
+
+        Returns:
+            bool: 是否成功
+        """
+        data = await self.render(html_content, viewport_width, image_format, scale)
+        if not data:
+            return False
+        try:
+            with open(output_path, "wb") as f:
+                f.write(data)
+            return True
+        except OSError as e:
+            LOG.error(f"保存渲染图片失败: {e}")
+            return False
+
+    def memory_usage(self) -> Optional[int]:
+        """所有工作进程及其浏览器的总 RSS (字节)，不支持的平台返回 None"""
+        workers = process_tree_rss(match=WORKER_MODULE)
+        browsers = process_tree_rss(match="playwright")
+        if workers is None or browsers is None:
+            return None
+        return workers + browsers
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": [
+                {
+                    "index": w.index,
+                    "alive": w.alive,
+                    "load": w.load,
+                    "renders": w.renders,
+                }
+                for w in self._workers
+            ],
+            "restarts": self.restarts,
+            "latency": self.latency.summary(),
+            "cache": self.cache.stats() if self.cache else None,
+        }
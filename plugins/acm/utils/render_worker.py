@@ -0,0 +1,95 @@
+"""
+渲染工作进程入口，由 RenderProcessPool 通过 `python -m` 启动
+
+参数: <PlaywrightRenderer 参数 JSON> <结果管道 fd>
+从 stdin 读取 (job_id, 方法名, 参数)，调用渲染器对应的方法
+(`render` 或 `render_many`)，向结果管道写回 (job_id, 返回值)。
+"""
+
+import asyncio
+import json
+import os
+import sys
+from typing import Any, Dict, Set
+
+from ncatbot.utils import get_log
+
+from .assets import AssetResolver
+from .disk_cache import DiskCache
+from .network import http_client
+from .render_pool import JOB_METHODS, encode_frame, read_frame
+from .renderer import PlaywrightRenderer
+
+LOG = get_log()
+
+
+def _build_renderer(config: Dict[str, Any]) -> PlaywrightRenderer:
+    config = dict(config)
+    assets = None
+    assets_config = config.pop("assets", None)
+    if assets_config:
+        assets = AssetResolver(
+            DiskCache(
+                assets_config["cache_dir"],
+                max_bytes=assets_config["max_bytes"],
+                ttl=assets_config["ttl"],
+            ),
+            fetch_timeout=assets_config["fetch_timeout"],
+        )
+    return PlaywrightRenderer(assets=assets, **config)
+
+
+async def serve(config: Dict[str, Any], result_fd: int):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin.buffer
+    )
+    transport, protocol = await loop.connect_write_pipe(
+        asyncio.streams.FlowControlMixin, os.fdopen(result_fd, "wb")
+    )
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+
+    renderer = _build_renderer(config)
+    await renderer.start()
+    tasks: Set[asyncio.Task] = set()
+
+    async def handle(job_id: int, method: str, args: tuple):
+        if method not in JOB_METHODS:
+            LOG.error(f"未知的渲染任务类型: {method}")
+            result = None
+        else:
+            result = await getattr(renderer, method)(*args)
+        writer.write(encode_frame((job_id, result)))
+        await writer.drain()
+
+    try:
+        while True:
+            try:
+                job = await read_frame(reader)
+            except asyncio.IncompleteReadError:
+                # 主进程关闭了 stdin
+                break
+            task = loop.create_task(handle(*job))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await renderer.close()
+        await http_client.close()
+        writer.close()
+
+
+def main():
+    config = json.loads(sys.argv[1])
+    result_fd = int(sys.argv[2])
+    try:
+        asyncio.run(serve(config, result_fd))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,152 @@
 import asyncio
-import os
+import html
+import io
 import time
-from typing import Optional
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
 
 from ncatbot.utils import get_log
-from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+from playwright.async_api import (
+    async_playwright,
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    TimeoutError as PlaywrightTimeoutError,
+)
+
+from .assets import AssetResolver
+from .metrics import LatencyRecorder, process_tree_rss
+from .render_cache import RenderCache
+
+try:
+    from PIL import Image
+
+    WEBP_AVAILABLE = True
+except ImportError:
+    WEBP_AVAILABLE = False
 
 # Constants
 MAX_CONCURRENT_RENDERS = 5
 RENDER_WIDTH = 720
 RENDER_TIMEOUT = 30.0
+# 每个页面最多复用的次数，超过后关闭并新建，避免长期运行的页面内存膨胀
+PAGE_MAX_USES = 100
+# 浏览器完成这么多次渲染，或内存超过上限后，启动新浏览器替换旧浏览器
+BROWSER_MAX_RENDERS = 2000
+BROWSER_MAX_RSS = 1024 * 1024 * 1024
+# 检查浏览器内存的最小间隔(秒)，读取 /proc 有一定开销
+RSS_CHECK_INTERVAL = 30.0
+# 替换时等待旧浏览器上的渲染完成的最长时间(秒)
+RECYCLE_DRAIN_TIMEOUT = RENDER_TIMEOUT
+
+# 模板约定：
+# - 带 data-render-target 属性的元素是截图区域，没有时截取整个页面
+# - 带 data-render-pending 属性的元素表示内容尚未绘制完成，
+#   模板在绘制结束后移除该属性；出错时设置 data-render-error
+TARGET_SELECTOR = "[data-render-target]"
+READY_SCRIPT = """() => {
+    if (document.querySelector('[data-render-error]')) return 'error';
+    return !document.querySelector('[data-render-pending]') && 'ready';
+}"""
+# 等待模板就绪信号的超时时间(毫秒)
+READY_TIMEOUT = 10_000
+
+# 输出格式：auto 时按内容选择，含照片(头像等)或很长的图片使用有损格式，
+# 纯文字与图表使用 PNG，避免线条和文字出现压缩痕迹
+IMAGE_FORMATS = ("auto", "png", "jpeg", "webp")
+DEFAULT_IMAGE_FORMAT = "auto"
+DEFAULT_IMAGE_QUALITY = 80
+AUTO_LOSSY_HEIGHT = 1600
+# 截图区域内是否有已加载的图片
+HAS_PHOTOS_SCRIPT = """el => Array.from(el.querySelectorAll('img')).some(
+    img => img.complete && img.naturalWidth > 0 && img.offsetParent !== null
+)"""
 
 LOG = get_log()
 
 
+@dataclass(eq=False)
+class _PooledPage:
+    page: Page
+    context: BrowserContext  # 创建页面时的上下文，浏览器重建后旧页面作废
+    browser: Browser  # 页面所属的浏览器，替换浏览器时据此等待其上的渲染结束
+    uses: int = 0
+    crashed: bool = False
+
+
 class PlaywrightRenderer:
-    def __init__(self):
+    """
+    基于 Playwright 的 HTML 渲染服务
+
+    整个插件共享一个实例（一个 Chromium 进程），由插件在加载时启动、
+    卸载时关闭，并通过参数注入到各个渲染函数中。
+    所有渲染共用同一个并发上限 `max_concurrency`。
+
+    渲染使用预先创建的页面池：页面用完后重置为空白页放回池中，
+    崩溃的页面直接丢弃，使用 `page_max_uses` 次后关闭重建。
+    池大小不超过并发上限，持有信号量即可保证拿到页面；为 0 时不复用页面。
+
+    截图区域与就绪条件由模板声明（见 TARGET_SELECTOR / READY_SCRIPT），
+    渲染器只等待模板给出的信号，不再依次尝试固定的选择器。
+    需要多张图片时使用 `render_many`，整批共用一个页面。
+
+    浏览器渲染次数达到 `browser_max_renders`，或进程树 RSS 超过
+    `browser_max_rss` 字节时，在后台启动新浏览器并预热页面，之后的渲染
+    切换到新浏览器，旧浏览器上的渲染完成后再关闭，切换期间没有冷启动。
+    两项上限为 0 时不检查。
+
+    输出格式由 `image_format` 决定（见 IMAGE_FORMATS），单次渲染可以覆盖；
+    `scale` 不为 1 时使用单独的页面按该设备像素比渲染，不进入页面池。
+    WebP 需要安装 Pillow，未安装时改用 JPEG。
+
+    传入 `cache` 时，相同的 HTML 与宽度直接复用上次渲染的图片；
+    传入 `assets` 时，页面的外部资源请求由 AssetResolver 拦截处理。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENT_RENDERS,
+        pool_size: Optional[int] = None,
+        page_max_uses: int = PAGE_MAX_USES,
+        browser_max_renders: int = BROWSER_MAX_RENDERS,
+        browser_max_rss: int = BROWSER_MAX_RSS,
+        image_format: str = DEFAULT_IMAGE_FORMAT,
+        image_quality: int = DEFAULT_IMAGE_QUALITY,
+        cache: Optional[RenderCache] = None,
+        assets: Optional[AssetResolver] = None,
+    ):
         self._p: Optional[Playwright] = None
         self._browser: Optional[Browser] = None
         self._context: Optional[BrowserContext] = None
         self._init_lock = asyncio.Lock()
-        self._render_semaphore = asyncio.Semaphore(MAX_CONCURRENT_RENDERS)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._render_semaphore = asyncio.Semaphore(self.max_concurrency)
+        if pool_size is None:
+            pool_size = self.max_concurrency
+        self.pool_size = max(0, min(int(pool_size), self.max_concurrency))
+        self.page_max_uses = max(1, int(page_max_uses))
+        if image_format not in IMAGE_FORMATS:
+            LOG.warning(f"不支持的图片格式 {image_format}，使用 {DEFAULT_IMAGE_FORMAT}")
+            image_format = DEFAULT_IMAGE_FORMAT
+        self.image_format = image_format
+        self.image_quality = max(1, min(100, int(image_quality)))
+        # 各输出格式的图片数量与总字节数
+        self._output: Dict[str, List[int]] = {}
+        self.cache = cache
+        self.assets = assets
+        self._idle_pages: List[_PooledPage] = []
+        self._active_pages: Set[_PooledPage] = set()
+        self._refill_task: Optional[asyncio.Task] = None
+        self.browser_max_renders = max(0, int(browser_max_renders))
+        self.browser_max_rss = max(0, int(browser_max_rss))
+        # 当前浏览器完成的渲染次数与替换次数
+        self._browser_renders = 0
+        self.recycles = 0
+        self._recycle_task: Optional[asyncio.Task] = None
+        self._next_rss_check = 0.0
+        self._recycle_retry_at = 0.0
+        self.latency = LatencyRecorder()
         self._browser_failed = False
         self._last_browser_fail_time = 0.0
         self._browser_retry_interval = 300.0
@@ -47,6 +173,8 @@ class PlaywrightRenderer:
     async def _reinit_browser(self):
         """重新初始化浏览器"""
         async with self._init_lock:
+            # 页面随上下文一起关闭
+            self._idle_pages.clear()
             if self._context:
                 try:
                     await self._context.close()
@@ -106,23 +234,14 @@ class PlaywrightRenderer:
                     self._p = await async_playwright().start()
 
                 if not self._browser:
-                    try:
-                        self._browser = await self._p.chromium.launch(headless=True)
-                    except Exception as e:
-                        LOG.warning(
-                            f"使用默认参数启动浏览器失败，尝试使用 --no-sandbox: {e}"
-                        )
-                        self._browser = await self._p.chromium.launch(
-                            args=["--no-sandbox"], headless=True
-                        )
+                    self._browser = await self._launch_browser()
 
                 if not self._context:
-                    self._context = await self._browser.new_context(
-                        viewport={"width": RENDER_WIDTH, "height": 600}
-                    )
+                    self._context = await self._new_context(self._browser)
 
                 LOG.info("Playwright 浏览器初始化成功")
                 self._page_count = 0
+                self._browser_renders = 0
                 return self._browser
             except Exception as e:
                 LOG.error(f"初始化 Playwright 浏览器失败: {e}")
@@ -136,8 +255,61 @@ class PlaywrightRenderer:
                     self._p = None
                 return None
 
+    async def _launch_browser(self) -> Browser:
+        try:
+            return await self._p.chromium.launch(headless=True)
+        except Exception as e:
+            LOG.warning(f"使用默认参数启动浏览器失败，尝试使用 --no-sandbox: {e}")
+            return await self._p.chromium.launch(args=["--no-sandbox"], headless=True)
+
+    async def _new_context(self, browser: Browser) -> BrowserContext:
+        context = await browser.new_context(
+            viewport={"width": RENDER_WIDTH, "height": 600}
+        )
+        if self.assets:
+            # 外部资源走本地文件与磁盘缓存，不直接访问 CDN
+            await context.route("**/*", self.assets.handle)
+        return context
+
+    async def start(self) -> bool:
+        """
+        预先启动浏览器，避免第一个渲染请求承担冷启动开销
+
+        Returns:
+            bool: 浏览器是否可用
+        """
+        browser = await self._ensure_browser()
+        if browser:
+            await self._warm_pool()
+        rss = self.memory_usage()
+        if browser and rss is not None:
+            LOG.info(f"渲染服务已启动，浏览器进程 RSS: {rss / 1024 / 1024:.1f} MB")
+        return browser is not None
+
+    def memory_usage(self) -> Optional[int]:
+        """
+        Playwright 驱动及其 Chromium 进程的总 RSS (字节)，不支持的平台返回 None
+        """
+        return process_tree_rss(match="playwright")
+
     async def close(self):
         """关闭渲染器并清理资源"""
+        if self._refill_task:
+            self._refill_task.cancel()
+            self._refill_task = None
+        if self._recycle_task:
+            self._recycle_task.cancel()
+            await asyncio.gather(self._recycle_task, return_exceptions=True)
+            self._recycle_task = None
+        self._idle_pages.clear()
+        if self._context:
+            try:
+                await self._context.close()
+            except Exception:
+                pass
+            finally:
+                self._context = None
+
         if self._browser:
             try:
                 await self._browser.close()
@@ -154,40 +326,95 @@ class PlaywrightRenderer:
             finally:
                 self._p = None
 
-    async def render_html(
-        self, html_content: str, output_path: str, viewport_width: int = RENDER_WIDTH
-    ) -> bool:
+    async def render(
+        self,
+        html_content: str,
+        viewport_width: int = RENDER_WIDTH,
+        image_format: Optional[str] = None,
+        scale: float = 1.0,
+    ) -> Optional[bytes]:
         """
-        将 HTML 文本渲染并保存为图片
+        将 HTML 文本渲染为图片，直接返回图片数据，不经过磁盘
 
         Args:
             html_content: HTML 内容
-            output_path: 图片保存路径
             viewport_width: 视口宽度
+            image_format: 输出格式，为空时使用渲染器的默认格式
+            scale: 设备像素比，图表等需要更清晰时使用 2
 
         Returns:
-            bool: 是否成功
+            Optional[bytes]: 图片数据，失败时返回 None
         """
+        image_format = image_format or self.image_format
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.key(
+                html_content, viewport_width, f"{image_format}@{scale:g}"
+            )
+            cached = await self.cache.get_async(cache_key)
+            if cached:
+                return cached
+
         async with self._render_semaphore:
+            start = time.perf_counter()
             try:
-                return await asyncio.wait_for(
-                    self._render_html_impl(html_content, output_path, viewport_width),
+                data = await asyncio.wait_for(
+                    self._render_html_impl(
+                        html_content, viewport_width, image_format, scale
+                    ),
                     timeout=RENDER_TIMEOUT,
                 )
+                if data:
+                    self.latency.record("render", time.perf_counter() - start)
+                    if cache_key:
+                        await self.cache.put_image(cache_key, data)
+                return data
             except asyncio.TimeoutError:
                 LOG.error(f"HTML 渲染超时（{RENDER_TIMEOUT}s）")
-                return False
+                return None
             except Exception as e:
                 LOG.error(f"HTML 渲染失败: {e}", exc_info=True)
-                return False
+                return None
 
-    async def _render_html_impl(
-        self, html_content: str, output_path: str, viewport_width: int
+    async def render_html(
+        self,
+        html_content: str,
+        output_path: str,
+        viewport_width: int = RENDER_WIDTH,
+        image_format: Optional[str] = None,
+        scale: float = 1.0,
     ) -> bool:
+        """
+        将 HTML 文本渲染并保存为图片
+
+        Args:
+            html_content: HTML 内容
+            output_path: 图片保存路径
+            viewport_width: 视口宽度
+            image_format: 输出格式，为空时使用渲染器的默认格式
+            scale: 设备像素比
+
+        Returns:
+            bool: 是否成功
+        """
+        data = await self.render(html_content, viewport_width, image_format, scale)
+        if not data:
+            return False
+        try:
+            with open(output_path, "wb") as f:
+                f.write(data)
+            return True
+        except OSError as e:
+            LOG.error(f"保存渲染图片失败: {e}")
+            return False
+
+    async def _render_html_impl(
+        self, html_content: str, viewport_width: int, image_format: str, scale: float
+    ) -> Optional[bytes]:
         browser = await self._ensure_browser()
         if not browser:
             LOG.error("浏览器未初始化，无法渲染 HTML")
-            return False
+            return None
 
         if not await self._is_browser_healthy():
             LOG.warning("浏览器健康检查失败，尝试重新初始化...")
@@ -195,84 +422,444 @@ class PlaywrightRenderer:
             browser = await self._ensure_browser()
             if not browser:
                 LOG.error("浏览器重新初始化失败")
-                return False
+                return None
 
-        page = None
-        page_created = False
+        pooled = None
+        healthy = False
         try:
-            # Reuse context for faster page creation
-            if self._context:
-                page = await self._context.new_page()
-            else:
-                # Fallback if context is somehow missing
-                page = await browser.new_page(
-                    viewport={"width": viewport_width, "height": 600}
-                )
-
+            pooled = await self._acquire_page(scale)
+            page = pooled.page
             self._page_count += 1
-            page_created = True
 
-            # Reset viewport size for this page if needed (though context has default)
-            await page.set_viewport_size({"width": viewport_width, "height": 600})
+            # 复用的页面可能保留了上次调整后的尺寸
+            if page.viewport_size != {"width": viewport_width, "height": 600}:
+                await page.set_viewport_size({"width": viewport_width, "height": 600})
 
+            # set_content 等待 load 事件，脚本与图片均已加载
             await page.set_content(html_content)
-            try:
-                await page.wait_for_load_state("domcontentloaded")
-                # Removed networkidle wait for speed
-            except Exception:
-                pass
-
-            # 尝试等待内容元素可见
-            target_selector = ".card"
-            target = page.locator(target_selector)
-            
-            try:
-                await target.wait_for(state="visible", timeout=2000)
-            except Exception:
-                # 尝试回退到 .container
-                target_selector = ".container"
-                target = page.locator(target_selector)
-                try:
-                    await target.wait_for(state="visible", timeout=2000)
-                except Exception:
-                    # 最后回退到 body
-                    target_selector = "body"
-                    target = page.locator(target_selector)
+            if not await self._wait_ready(page):
+                healthy = True
+                return None
 
-            # 动态调整高度
-            try:
-                h = await page.evaluate(
-                    f"document.querySelector('{target_selector}')?.getBoundingClientRect().height || 600"
-                )
+            target = await self._target_locator(page)
+            # 按截图区域调整视口高度
+            box = await target.bounding_box()
+            if box:
                 await page.set_viewport_size(
-                    {"width": viewport_width, "height": int(h) + 40}
+                    {"width": viewport_width, "height": int(box["height"]) + 40}
                 )
-            except Exception:
-                pass
 
             # 截图
-            ok = False
+            image_format = await self._resolve_format(image_format, target, box)
+            data = None
             try:
-                await target.screenshot(path=output_path)
-                ok = os.path.exists(output_path)
+                data = await self._capture(target, image_format)
             except Exception:
-                ok = False
+                data = None
 
-            if not ok:
+            if not data:
                 try:
-                    await page.screenshot(path=output_path, full_page=False)
-                    ok = os.path.exists(output_path)
+                    data = await self._capture(page, image_format)
                 except Exception:
-                    ok = False
+                    data = None
 
-            return ok
+            healthy = True
+            return data
 
         finally:
-            if page:
+            if pooled:
+                self._page_count = max(0, self._page_count - 1)
+                await self._release_page(pooled, healthy)
+
+    async def _wait_ready(self, frame) -> bool:
+        """等待模板给出就绪信号，模板报错或超时返回 False"""
+        try:
+            state = await (
+                await frame.wait_for_function(READY_SCRIPT, timeout=READY_TIMEOUT)
+            ).json_value()
+        except PlaywrightTimeoutError:
+            LOG.error(f"等待模板就绪超时（{READY_TIMEOUT / 1000:.0f}s）")
+            return False
+        if state == "error":
+            error = await frame.get_attribute(
+                "[data-render-error]", "data-render-error"
+            )
+            LOG.error(f"模板渲染出错: {error}")
+            return False
+        return True
+
+    async def _resolve_format(
+        self, image_format: str, target, box: Optional[Dict[str, float]]
+    ) -> str:
+        """把 auto 换成具体格式，webp 不可用时改用 jpeg"""
+        if image_format == "auto":
+            lossy = bool(box) and box["height"] >= AUTO_LOSSY_HEIGHT
+            if not lossy:
+                try:
+                    lossy = await target.evaluate(HAS_PHOTOS_SCRIPT)
+                except Exception:
+                    lossy = False
+            if not lossy:
+                return "png"
+            image_format = "webp"
+        if image_format == "webp" and not WEBP_AVAILABLE:
+            return "jpeg"
+        return image_format
+
+    async def _capture(self, target, image_format: str) -> Optional[bytes]:
+        """
+        按指定格式截图，`target` 可以是元素或整个页面
+
+        jpeg / webp 编码失败时改用 PNG，不让一次编码错误变成渲染失败
+        """
+        data = png = None
+        if image_format == "jpeg":
+            try:
+                data = await target.screenshot(type="jpeg", quality=self.image_quality)
+            except Exception as e:
+                LOG.warning(f"JPEG 截图失败，改用 PNG: {e}")
+        elif image_format == "webp":
+            png = await target.screenshot(type="png")
+            try:
+                data = await asyncio.to_thread(_png_to_webp, png, self.image_quality)
+            except Exception as e:
+                LOG.warning(f"WebP 编码失败，改用 PNG: {e}")
+        if not data:
+            image_format = "png"
+            data = png or await target.screenshot(type="png")
+        if data:
+            stat = self._output.setdefault(image_format, [0, 0])
+            stat[0] += 1
+            stat[1] += len(data)
+        return data
+
+    @staticmethod
+    async def _target_locator(frame):
+        """模板声明的截图区域，没有声明时为整个 body"""
+        target = frame.locator(TARGET_SELECTOR).first
+        if not await target.count():
+            target = frame.locator("body")
+        return target
+
+    # ----------------------------
+    # region 批量渲染
+    # ----------------------------
+    async def render_many(
+        self,
+        html_contents: List[str],
+        viewport_width: int = RENDER_WIDTH,
+        image_format: Optional[str] = None,
+        scale: float = 1.0,
+    ) -> List[Optional[bytes]]:
+        """
+        在同一个页面中批量渲染多段 HTML，按顺序返回每段的图片数据
+
+        每段 HTML 放在各自的 iframe 中，样式互不影响；整批只占用一个页面
+        和一次 set_content，再按各自的截图区域裁剪截图。
+        单段失败时对应位置为 None，不影响其他结果。
+        """
+        image_format = image_format or self.image_format
+        variant = f"{image_format}@{scale:g}"
+        results: List[Optional[bytes]] = [None] * len(html_contents)
+        missing: List[int] = []
+        for i, html_content in enumerate(html_contents):
+            if self.cache:
+                key = self.cache.key(html_content, viewport_width, variant)
+                results[i] = await self.cache.get_async(key)
+            if not results[i]:
+                missing.append(i)
+        if not missing:
+            return results
+
+        async with self._render_semaphore:
+            start = time.perf_counter()
+            try:
+                rendered = await asyncio.wait_for(
+                    self._render_many_impl(
+                        [html_contents[i] for i in missing],
+                        viewport_width,
+                        image_format,
+                        scale,
+                    ),
+                    timeout=RENDER_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                LOG.error(f"批量渲染超时（{RENDER_TIMEOUT}s）")
+                return results
+            except Exception as e:
+                LOG.error(f"批量渲染失败: {e}", exc_info=True)
+                return results
+            self.latency.record("render_many", time.perf_counter() - start)
+
+        for i, data in zip(missing, rendered):
+            results[i] = data
+            if data and self.cache:
+                key = self.cache.key(html_contents[i], viewport_width, variant)
+                await self.cache.put_image(key, data)
+        return results
+
+    async def _render_many_impl(
+        self,
+        html_contents: List[str],
+        viewport_width: int,
+        image_format: str,
+        scale: float,
+    ) -> List[Optional[bytes]]:
+        results: List[Optional[bytes]] = [None] * len(html_contents)
+        browser = await self._ensure_browser()
+        if not browser:
+            LOG.error("浏览器未初始化，无法渲染 HTML")
+            return results
+
+        pooled = None
+        healthy = False
+        try:
+            pooled = await self._acquire_page(scale)
+            page = pooled.page
+            self._page_count += 1
+            if page.viewport_size != {"width": viewport_width, "height": 600}:
+                await page.set_viewport_size({"width": viewport_width, "height": 600})
+
+            frames_html = "".join(
+                f'<iframe id="render-{i}" srcdoc="{html.escape(content)}"></iframe>'
+                for i, content in enumerate(html_contents)
+            )
+            frame_style = (
+                f"display:block;border:0;width:{viewport_width}px;height:600px"
+            )
+            await page.set_content(
+                "<!DOCTYPE html><html><head><style>"
+                f"body{{margin:0}} iframe{{{frame_style}}}"
+                f"</style></head><body>{frames_html}</body></html>"
+            )
+
+            # 与单独渲染一致：每个 iframe 的高度为截图区域高度 + 40
+            targets = []
+            for i in range(len(html_contents)):
+                element = await page.query_selector(f"#render-{i}")
+                frame = await element.content_frame() if element else None
+                if frame is None or not await self._wait_ready(frame):
+                    targets.append(None)
+                    continue
+                target = await self._target_locator(frame)
+                box = await target.bounding_box()
+                if box:
+                    await element.evaluate(
+                        "(el, h) => { el.style.height = h + 'px'; }",
+                        int(box["height"]) + 40,
+                    )
+                targets.append((target, box))
+
+            # iframe 高度全部确定后再统一截图，各元素位置不再变化
+            for i, item in enumerate(targets):
+                if item is None:
+                    continue
+                target, box = item
                 try:
-                    await page.close()
+                    fmt = await self._resolve_format(image_format, target, box)
+                    results[i] = await self._capture(target, fmt)
                 except Exception as e:
-                    LOG.warning(f"关闭页面时出错: {e}")
+                    LOG.warning(f"批量渲染第 {i + 1} 张图片截图失败: {e}")
 
-            if page_created:
+            healthy = True
+            return results
+
+        finally:
+            if pooled:
                 self._page_count = max(0, self._page_count - 1)
+                await self._release_page(pooled, healthy)
+
+    # ----------------------------
+    # region 页面池
+    # ----------------------------
+    def _is_reusable(self, pooled: _PooledPage) -> bool:
+        return (
+            not pooled.crashed
+            and pooled.context is self._context
+            and pooled.uses < self.page_max_uses
+            and not pooled.page.is_closed()
+        )
+
+    async def _new_page(self, context: Optional[BrowserContext] = None) -> _PooledPage:
+        context = context or self._context
+        page = await context.new_page()
+        pooled = _PooledPage(page=page, context=context, browser=context.browser)
+
+        def on_crash(_):
+            pooled.crashed = True
+            LOG.warning("渲染页面崩溃，将在归还时替换")
+
+        page.on("crash", on_crash)
+        return pooled
+
+    async def _acquire_page(self, scale: float = 1.0) -> _PooledPage:
+        if scale != 1:
+            # 设备像素比在上下文创建时确定，使用单独的页面，用完即关闭
+            browser = self._browser
+            page = await browser.new_page(
+                viewport={"width": RENDER_WIDTH, "height": 600},
+                device_scale_factor=scale,
+            )
+            if self.assets:
+                await page.route("**/*", self.assets.handle)
+            pooled = _PooledPage(page=page, context=page.context, browser=browser)
+            self._active_pages.add(pooled)
+            return pooled
+        while self._idle_pages:
+            pooled = self._idle_pages.pop()
+            if self._is_reusable(pooled):
+                self._active_pages.add(pooled)
+                return pooled
+            await self._discard_page(pooled)
+            self._schedule_refill()
+        pooled = await self._new_page()
+        self._active_pages.add(pooled)
+        return pooled
+
+    async def _release_page(self, pooled: _PooledPage, healthy: bool):
+        """重置页面并放回池中，不可复用的页面关闭后在后台补充新页面"""
+        self._active_pages.discard(pooled)
+        pooled.uses += 1
+        if pooled.browser is self._browser:
+            self._browser_renders += 1
+            self._maybe_recycle()
+        if (
+            healthy
+            and len(self._idle_pages) < self.pool_size
+            and self._is_reusable(pooled)
+        ):
+            try:
+                await pooled.page.goto("about:blank")
+                self._idle_pages.append(pooled)
+                return
+            except Exception as e:
+                LOG.warning(f"重置渲染页面失败: {e}")
+        await self._discard_page(pooled)
+        self._schedule_refill()
+
+    async def _discard_page(self, pooled: _PooledPage):
+        try:
+            if not pooled.page.is_closed():
+                await pooled.page.close()
+        except Exception as e:
+            LOG.warning(f"关闭页面时出错: {e}")
+
+    async def _warm_pool(self):
+        """预先创建页面，使空闲页面与使用中页面之和达到池大小"""
+        try:
+            while (
+                self._context
+                and len(self._idle_pages) + len(self._active_pages) < self.pool_size
+            ):
+                self._idle_pages.append(await self._new_page())
+        except Exception as e:
+            LOG.warning(f"预创建渲染页面失败: {e}")
+
+    def _schedule_refill(self):
+        if self.pool_size == 0:
+            return
+        if self._refill_task and not self._refill_task.done():
+            return
+        self._refill_task = asyncio.get_running_loop().create_task(self._warm_pool())
+
+    # ----------------------------
+    # region 浏览器替换
+    # ----------------------------
+    def _recycle_reason(self) -> Optional[str]:
+        renders = self._browser_renders
+        if self.browser_max_renders and renders >= self.browser_max_renders:
+            return f"已渲染 {renders} 次"
+        if self.browser_max_rss and time.monotonic() >= self._next_rss_check:
+            self._next_rss_check = time.monotonic() + RSS_CHECK_INTERVAL
+            # 替换期间不检查，此时进程树中只有当前浏览器
+            rss = self.memory_usage()
+            if rss is not None and rss >= self.browser_max_rss:
+                return f"内存 {rss / 1024 / 1024:.0f} MB"
+        return None
+
+    def _maybe_recycle(self):
+        if self._recycle_task and not self._recycle_task.done():
+            return
+        if time.monotonic() < self._recycle_retry_at:
+            return
+        reason = self._recycle_reason()
+        if reason:
+            self._recycle_task = asyncio.get_running_loop().create_task(
+                self._recycle_browser(reason)
+            )
+
+    async def _recycle_browser(self, reason: str):
+        """启动新浏览器并切换，旧浏览器上的渲染完成后关闭"""
+        old_browser, old_context = self._browser, self._context
+        if not old_browser or not self._p:
+            return
+        LOG.info(f"浏览器{reason}，启动新浏览器进行替换")
+
+        new_browser = new_context = None
+        try:
+            new_browser = await self._launch_browser()
+            new_context = await self._new_context(new_browser)
+            warm = [
+                await self._new_page(new_context) for _ in range(self.pool_size)
+            ]
+        except Exception as e:
+            LOG.warning(f"启动替换浏览器失败，继续使用当前浏览器: {e}")
+            self._recycle_retry_at = time.monotonic() + self._browser_retry_interval
+            if new_browser:
+                await self._close_browser(new_browser, new_context)
+            return
+
+        async with self._init_lock:
+            if self._browser is not old_browser:
+                # 替换期间浏览器已被重新初始化
+                await self._close_browser(new_browser, new_context)
+                return
+            self._browser, self._context = new_browser, new_context
+            stale, self._idle_pages = self._idle_pages, warm
+            self._browser_renders = 0
+            self._next_rss_check = time.monotonic() + RSS_CHECK_INTERVAL
+            self.recycles += 1
+
+        for pooled in stale:
+            await self._discard_page(pooled)
+
+        # 等待仍在旧浏览器上进行的渲染结束，包括 scale 不为 1 的单独页面
+        deadline = time.monotonic() + RECYCLE_DRAIN_TIMEOUT
+        while time.monotonic() < deadline and any(
+            pooled.browser is old_browser for pooled in self._active_pages
+        ):
+            await asyncio.sleep(0.1)
+        await self._close_browser(old_browser, old_context)
+        LOG.info("浏览器替换完成")
+
+    async def _close_browser(
+        self, browser: Browser, context: Optional[BrowserContext]
+    ):
+        try:
+            if context:
+                await context.close()
+            await browser.close()
+        except Exception as e:
+            LOG.warning(f"关闭旧浏览器失败: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        """渲染耗时分位数与页面池状态"""
+        return {
+            "pool_size": self.pool_size,
+            "idle_pages": len(self._idle_pages),
+            "browser_renders": self._browser_renders,
+            "recycles": self.recycles,
+            "output": {
+                fmt: {"count": count, "avg_kb": round(total / count / 1024, 1)}
+                for fmt, (count, total) in self._output.items()
+            },
+            "latency": self.latency.summary(),
+            "cache": self.cache.stats() if self.cache else None,
+        }
+
+
+def _png_to_webp(data: bytes, quality: int) -> bytes:
+    with Image.open(io.BytesIO(data)) as image:
+        out = io.BytesIO()
+        image.save(out, format="WEBP", quality=quality)
+        return out.getvalue()
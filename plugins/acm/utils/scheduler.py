@@ -0,0 +1,99 @@
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+
+from ncatbot.utils import get_log
+
+from .cache import ContestCache
+
+LOG = get_log()
+
+# 各平台默认刷新周期(秒)
+DEFAULT_REFRESH_INTERVALS = {
+    "scpc": 300.0,
+    "cf": 1800.0,
+    "nowcoder": 900.0,
+    "luogu": 900.0,
+}
+# 刷新周期的随机抖动比例
+DEFAULT_REFRESH_JITTER = 0.1
+
+
+class RefreshScheduler:
+    """
+    后台预取调度器
+
+    为每个平台启动独立的刷新循环，按各自周期（带随机抖动）刷新
+    `ContestCache`，使交互命令始终直接读取内存中的快照。
+    """
+
+    def __init__(
+        self,
+        cache: ContestCache,
+        intervals: Optional[Dict[str, float]] = None,
+        jitter: float = DEFAULT_REFRESH_JITTER,
+    ):
+        self.cache = cache
+        self.intervals = dict(DEFAULT_REFRESH_INTERVALS)
+        if intervals:
+            self.intervals.update(
+                {source: float(value) for source, value in intervals.items()}
+            )
+        self.jitter = max(0.0, float(jitter))
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """在当前事件循环中启动所有平台的刷新循环"""
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        started = {}
+        for source in self.cache.sources:
+            interval = self.intervals.get(source)
+            if not interval or interval <= 0:
+                LOG.info(f"平台 {source} 未配置刷新周期，跳过后台预取")
+                continue
+            self._tasks.append(loop.create_task(self._run(source, interval)))
+            started[source] = interval
+        # 由调度器负责保持快照新鲜，读取时不再触发刷新
+        self.cache.managed_sources.update(started)
+        LOG.info(f"比赛预取调度器已启动: {started}")
+
+    async def stop(self):
+        """停止所有刷新循环"""
+        tasks = self._tasks
+        self._tasks = []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.cache.managed_sources.clear()
+
+    def _next_delay(self, interval: float) -> float:
+        spread = interval * self.jitter
+        return max(1.0, interval + random.uniform(-spread, spread))
+
+    def _initial_delay(self, source: str, interval: float) -> float:
+        # 启动时错开各平台的首次请求
+        delay = random.uniform(0, min(interval * self.jitter, 5.0))
+        snapshot = self.cache.peek(source)
+        if snapshot is not None:
+            # 已有从本地恢复的快照时，等到它到期再刷新
+            age = time.time() - snapshot.fetched_at
+            delay = max(delay, interval - age)
+        return delay
+
+    async def _run(self, source: str, interval: float):
+        await asyncio.sleep(self._initial_delay(source, interval))
+        while True:
+            try:
+                await self.cache.refresh(source)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                LOG.error(f"后台刷新 {source} 比赛列表失败: {e}")
+            await asyncio.sleep(self._next_delay(interval))
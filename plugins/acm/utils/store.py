@@ -0,0 +1,227 @@
+import asyncio
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from ncatbot.utils import get_log
+
+from ..platforms.platform import Contest
+from .cache import ContestSnapshot
+
+LOG = get_log()
+
+DEFAULT_STORE_PATH = "data/acm.db"
+# 写入批次的最长等待时间(秒)
+FLUSH_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    group_id TEXT PRIMARY KEY,
+    enabled INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contest_snapshots (
+    source TEXT PRIMARY KEY,
+    contests TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS announced_contests (
+    group_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    contest_id INTEGER NOT NULL,
+    start_time INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    PRIMARY KEY (group_id, source, contest_id)
+);
+"""
+
+
+class LocalStore:
+    """
+    基于 SQLite (WAL 模式) 的本地持久化存储
+
+    保存群订阅、各平台最新比赛快照以及各群已播报的比赛。
+    所有数据库操作都在单独的线程中执行；写操作先进入内存队列，
+    按键合并后分批提交，不阻塞事件循环。
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = os.path.abspath(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="acm-store"
+        )
+        self._pending: Dict[Hashable, Tuple[str, Tuple[Any, ...]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    # ----------------------------
+    # region 生命周期
+    # ----------------------------
+    async def open(self):
+        await self._run(self._open_sync)
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._flush_task = loop.create_task(self._flush_loop())
+
+    async def close(self):
+        task = self._flush_task
+        self._flush_task = None
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+        await self._run(self._close_sync)
+        self._executor.shutdown(wait=False)
+
+    def _open_sync(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+        self._conn = conn
+
+    def _close_sync(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    # ----------------------------
+    # region 读取
+    # ----------------------------
+    async def load_subscriptions(self) -> Dict[str, bool]:
+        rows = await self._run(
+            self._query, "SELECT group_id, enabled FROM subscriptions"
+        )
+        return {group_id: bool(enabled) for group_id, enabled in rows}
+
+    async def load_snapshots(self) -> Dict[str, ContestSnapshot]:
+        rows = await self._run(
+            self._query, "SELECT source, contests, fetched_at FROM contest_snapshots"
+        )
+        snapshots = {}
+        for source, payload, fetched_at in rows:
+            try:
+                contests = [Contest(**item) for item in json.loads(payload)]
+            except Exception as e:
+                LOG.warning(f"读取 {source} 比赛快照失败: {e}")
+                continue
+            snapshots[source] = ContestSnapshot(
+                contests=contests, fetched_at=fetched_at
+            )
+        return snapshots
+
+    async def load_announced(
+        self,
+    ) -> Dict[str, Dict[Tuple[str, int], Tuple[int, int]]]:
+        rows = await self._run(
+            self._query,
+            "SELECT group_id, source, contest_id, start_time, duration "
+            "FROM announced_contests",
+        )
+        announced: Dict[str, Dict[Tuple[str, int], Tuple[int, int]]] = {}
+        for group_id, source, contest_id, start_time, duration in rows:
+            announced.setdefault(group_id, {})[(source, contest_id)] = (
+                start_time,
+                duration,
+            )
+        return announced
+
+    def _query(self, sql: str) -> List[tuple]:
+        return self._conn.execute(sql).fetchall()
+
+    # ----------------------------
+    # region 写入 (批量、异步)
+    # ----------------------------
+    def save_subscription(self, group_id: str, enabled: bool):
+        self._enqueue(
+            ("subscription", group_id),
+            "INSERT OR REPLACE INTO subscriptions (group_id, enabled) VALUES (?, ?)",
+            (str(group_id), int(enabled)),
+        )
+
+    def save_snapshot(self, source: str, snapshot: ContestSnapshot):
+        payload = json.dumps(
+            [asdict(c) for c in snapshot.contests], ensure_ascii=False
+        )
+        self._enqueue(
+            ("snapshot", source),
+            "INSERT OR REPLACE INTO contest_snapshots (source, contests, fetched_at) "
+            "VALUES (?, ?, ?)",
+            (source, payload, snapshot.fetched_at),
+        )
+
+    def save_announced(
+        self, group_id: str, key: Tuple[str, int], fingerprint: Tuple[int, int]
+    ):
+        source, contest_id = key
+        self._enqueue(
+            ("announced", group_id, source, contest_id),
+            "INSERT OR REPLACE INTO announced_contests "
+            "(group_id, source, contest_id, start_time, duration) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (str(group_id), source, contest_id, fingerprint[0], fingerprint[1]),
+        )
+
+    def delete_announced_contest(self, group_id: str, key: Tuple[str, int]):
+        source, contest_id = key
+        # 与 save_announced 使用同一个键，覆盖尚未写入的播报记录
+        self._enqueue(
+            ("announced", str(group_id), source, contest_id),
+            "DELETE FROM announced_contests "
+            "WHERE group_id = ? AND source = ? AND contest_id = ?",
+            (str(group_id), source, contest_id),
+        )
+
+    def delete_announced(self, group_id: str):
+        group_id = str(group_id)
+        # 丢弃该群尚未写入的播报记录，避免删除后又被写回
+        stale = [
+            k for k in self._pending if k[0] == "announced" and k[1] == group_id
+        ]
+        for key in stale:
+            self._pending.pop(key, None)
+        self._enqueue(
+            ("announced_group", group_id),
+            "DELETE FROM announced_contests WHERE group_id = ?",
+            (group_id,),
+        )
+
+    def _enqueue(self, key: Hashable, sql: str, params: Tuple[Any, ...]):
+        # 同一条记录在一个批次内只保留最后一次写入
+        self._pending.pop(key, None)
+        self._pending[key] = (sql, params)
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def flush(self):
+        """立即提交当前排队的写操作"""
+        if not self._pending or not self._conn:
+            return
+        batch = list(self._pending.values())
+        self._pending = {}
+        try:
+            await self._run(self._write_batch, batch)
+        except Exception as e:
+            LOG.error(f"写入本地存储失败: {e}")
+
+    def _write_batch(self, batch: List[Tuple[str, Tuple[Any, ...]]]):
+        with self._conn:
+            for sql, params in batch:
+                self._conn.execute(sql, params)
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            # 攒一小段时间再写，合并突发的多次更新
+            await asyncio.sleep(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            await self.flush()
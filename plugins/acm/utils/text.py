@@ -1,7 +1,10 @@
+import base64
 import math
+import os
 from datetime import datetime
 
 from ..platforms.platform import Contest
+from .broadcast import Broadcaster
 
 
 def format_timestamp(timestamp: int, formatter: str = "%Y-%m-%d %H:%M") -> str:
@@ -81,7 +84,9 @@ def calculate_accept_ratio(passed: int, total: int) -> float:
     return (passed / total) * 100
 
 
-async def broadcast_text(api_client, group_listeners: dict, text: str):
+async def broadcast_text(
+    api_client, group_listeners: dict, text: str, broadcaster=None
+):
     """
     向已开启监听的群聊广播文本消息
 
@@ -89,10 +94,15 @@ async def broadcast_text(api_client, group_listeners: dict, text: str):
     - api_client: 机器人 API 客户端
     - group_listeners: 群组监听开关映射（group_id -> enabled）
     - text: 要广播的文本内容
+    - broadcaster: 使用的 Broadcaster，为空时按默认参数创建
+
+    Returns:
+    - 广播结果 BroadcastResult
     """
-    for gid, enabled in group_listeners.items():
-        if enabled:
-            await api_client.send_group_text(gid, text)
+    if broadcaster is None:
+        broadcaster = Broadcaster(api_client.send_group_text)
+    group_ids = [gid for gid, enabled in group_listeners.items() if enabled]
+    return await broadcaster.broadcast(group_ids, text)
 
 
 def extract_contest_timing(contest: Contest, now_ts: int):
@@ -133,3 +143,20 @@ def extract_contest_timing(contest: Contest, now_ts: int):
             remaining,
         )
     return None
+
+
+def image_to_base64(data: bytes) -> str:
+    """
+    将图片数据转换为可直接发送的 base64:// 字符串
+    """
+    return "base64://" + base64.b64encode(data).decode("ascii")
+
+
+def remove_file(path: str):
+    """
+    删除临时文件，文件不存在或删除失败时忽略
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
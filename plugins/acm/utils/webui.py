@@ -1,8 +1,11 @@
 import datetime
 import os
+from typing import Optional
 
 from jinja2 import Environment, FileSystemLoader
 
+from .chart import rating_color, render_rating_chart_svg
+from .rating_series import DEFAULT_MAX_POINTS, rating_series
 from .text import (
     extract_contest_timing,
     format_hours,
@@ -11,6 +14,9 @@ from .text import (
     state_icon,
 )
 
+# 比赛列表中"当前时间"的取整粒度(秒)
+CONTEST_NOW_BUCKET = 60
+
 
 class WebUI:
     def __init__(self):
@@ -88,8 +94,11 @@ class WebUI:
             avatar_char=(nickname[:1] or username[:1] or " ").upper(),
         )
 
-    def render_contests(self, contests: list) -> str:
-        now_ts = int(datetime.datetime.now().timestamp())
+    def render_contests(self, contests: list, now_ts: Optional[int] = None) -> str:
+        if now_ts is None:
+            # 按分钟取整，同一分钟内生成的 HTML 相同，便于复用渲染缓存
+            now_ts = int(datetime.datetime.now().timestamp())
+            now_ts -= now_ts % CONTEST_NOW_BUCKET
         contest_data = []
         for c in contests:
             t = extract_contest_timing(c, now_ts)
@@ -117,24 +126,11 @@ class WebUI:
         template = self.env.get_template("cf_user_info.html")
         return template.render(title=f"Codeforces 用户信息 - {user.handle}", user=user)
 
-    def render_cf_rating_chart(self, handle: str, history: list) -> str:
-        labels = []
-        data = []
-        point_meta = []
-
-        for h in history:
-            dt = datetime.datetime.fromtimestamp(h.rating_update_time_seconds)
-            labels.append(dt.strftime("%Y-%m-%d"))
-            data.append(h.new_rating)
-            point_meta.append(
-                {
-                    "contest": h.contest_name,
-                    "rank": h.rank,
-                    "old": h.old_rating,
-                    "new": h.new_rating,
-                }
-            )
-
+    def render_cf_rating_chart(
+        self, handle: str, history: list, max_points: int = DEFAULT_MAX_POINTS
+    ) -> str:
+        series = rating_series.update(handle, history)
+        labels, data, point_meta, max_line = series.points(max_points)
         template = self.env.get_template("cf_rating_chart.html")
         return template.render(
             title=f"Rating 记录表 - {handle}",
@@ -142,6 +138,52 @@ class WebUI:
             labels=labels,
             data=data,
             meta=point_meta,
+            max_data=max_line,
+        )
+
+    def render_cf_rating_chart_svg(
+        self, handle: str, history: list, max_points: int = DEFAULT_MAX_POINTS
+    ) -> str:
+        series = rating_series.update(handle, history)
+        labels, data, point_meta, max_line = series.points(max_points)
+        return render_rating_chart_svg(
+            handle,
+            labels,
+            data,
+            point_meta,
+            max_line=max_line,
+            y_range=series.y_range,
+            bands=series.bands,
+        )
+
+    def render_cf_rank(self, users: list) -> str:
+        """users 为已按积分排好序的 CodeforcesUser 列表"""
+        user_data = []
+        for i, u in enumerate(users, start=1):
+            # 没有参加过比赛的用户 rating 为 0，显示为黑色
+            color = rating_color(u.rating) if u.rating else "#000000"
+            max_color = rating_color(u.max_rating) if u.max_rating else "#000000"
+            user_data.append(
+                {
+                    "rank": i,
+                    "handle": u.handle,
+                    "title": u.rank or "unrated",
+                    "rating": u.rating,
+                    "max_rating": u.max_rating,
+                    "color": color,
+                    "max_color": max_color,
+                }
+            )
+        template = self.env.get_template("cf_rank.html")
+        return template.render(title="Codeforces 队内排行", users=user_data)
+
+    @staticmethod
+    def render_svg_page(svg: str) -> str:
+        """把 SVG 包装成可直接截图的页面"""
+        return (
+            '<!DOCTYPE html><html><body style="margin:0">'
+            f'<div data-render-target style="display:inline-block">{svg}</div>'
+            "</body></html>"
         )
 
     def render_help(self, commands: list, version: str) -> str:
@@ -0,0 +1,120 @@
+import time
+
+from plugins.acm.platforms.platform import Contest
+from plugins.acm.utils.announcer import ContestAnnouncer, fingerprint
+
+NOW = int(time.time())
+
+
+def make_contest(contest_id: int, start_in: int, duration: int = 7200) -> Contest:
+    return Contest(
+        id=contest_id,
+        name=f"Round {contest_id}",
+        url="",
+        start_time=NOW + start_in,
+        duration=duration,
+    )
+
+
+def test_first_snapshot_is_baseline():
+    announcer = ContestAnnouncer()
+    assert announcer.diff("cf", [make_contest(1, 3600)]) == []
+
+
+def test_diff_reports_new_and_rescheduled_contests():
+    announcer = ContestAnnouncer()
+    old = make_contest(1, 3600)
+    announcer.diff("cf", [old])
+
+    moved = make_contest(1, 7200)
+    new = make_contest(2, 3600)
+    changes = announcer.diff("cf", [moved, new])
+
+    assert [(c.contest.id, c.previous) for c in changes] == [
+        (1, fingerprint(old)),
+        (2, None),
+    ]
+
+
+def test_pending_for_group_skips_already_announced():
+    announcer = ContestAnnouncer()
+    announcer.diff("cf", [])
+    changes = announcer.diff("cf", [make_contest(1, 3600)])
+
+    # 送达前不记为已播报
+    assert len(announcer.pending_for_group("g1", changes)) == 1
+    assert len(announcer.pending_for_group("g1", changes)) == 1
+
+    announcer.mark_announced("g1", changes)
+    assert announcer.pending_for_group("g1", changes) == []
+    assert len(announcer.pending_for_group("g2", changes)) == 1
+
+
+def test_unannounced_recovers_undelivered_changes():
+    announcer = ContestAnnouncer()
+    announcer.diff("cf", [make_contest(1, 3600)])
+    announcer.baseline_group("g1")
+    assert announcer.unannounced("g1") == []
+
+    moved = make_contest(1, 7200)
+    new = make_contest(2, 3600)
+    started = make_contest(3, -60)
+    changes = announcer.diff("cf", [moved, new, started])
+    # 只送达了其中一条
+    announcer.mark_announced("g1", [c for c in changes if c.contest.id == 2])
+
+    pending = announcer.unannounced("g1")
+    assert [(c.contest.id, c.previous) for c in pending] == [
+        (1, fingerprint(make_contest(1, 3600)))
+    ]
+    # 没有播报记录的群不补发
+    assert announcer.unannounced("g2") == []
+
+
+def test_prune_drops_finished_and_unlisted_contests():
+    announcer = ContestAnnouncer()
+    upcoming = make_contest(1, 3600)
+    finished = make_contest(2, -7200, duration=3600)
+    unlisted = make_contest(3, 3600)
+    announcer.diff("cf", [upcoming, finished, unlisted])
+    announcer.baseline_group("g1")
+    announcer.announced["g1"][("luogu", 9)] = (NOW, 60)
+
+    announcer.diff("cf", [upcoming, finished])
+    removed = announcer.prune("cf", now=NOW)
+
+    assert sorted(removed) == [("g1", ("cf", 2)), ("g1", ("cf", 3))]
+    # 其他平台的记录不受影响
+    assert set(announcer.announced["g1"]) == {("cf", 1), ("luogu", 9)}
+
+
+def test_prune_ignores_sources_without_snapshot():
+    announcer = ContestAnnouncer()
+    announcer.announced["g1"] = {("cf", 1): (NOW, 60)}
+    assert announcer.prune("cf") == []
+    assert announcer.announced["g1"] == {("cf", 1): (NOW, 60)}
+
+
+def test_first_snapshot_baseline_survives_restart():
+    announcer = ContestAnnouncer()
+    announcer.baseline_group("g1")
+
+    assert announcer.diff("cf", [make_contest(1, 3600), make_contest(2, 3600)]) == []
+    marked = announcer.baseline_source("cf", ["g1"])
+    assert sorted(key for _, key, _ in marked) == [("cf", 1), ("cf", 2)]
+
+    changes = announcer.diff(
+        "cf", [make_contest(1, 3600), make_contest(2, 3600), make_contest(3, 3600)]
+    )
+    assert [c.contest.id for c in changes] == [3]
+    announcer.mark_announced("g1", changes)
+
+    # 重启：从本地存储恢复记录与快照
+    restarted = ContestAnnouncer()
+    restarted.announced.update(
+        {g: dict(records) for g, records in announcer.announced.items()}
+    )
+    restarted.diff(
+        "cf", [make_contest(1, 3600), make_contest(2, 3600), make_contest(3, 3600)]
+    )
+    assert restarted.unannounced("g1") == []
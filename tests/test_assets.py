@@ -0,0 +1,112 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+from plugins.acm.utils import assets
+from plugins.acm.utils.assets import PLACEHOLDER_IMAGE, AssetResolver
+from plugins.acm.utils.disk_cache import DiskCache
+
+
+class FakeRoute:
+    def __init__(self, url: str, resource_type: str = "script", fail: bool = False):
+        self.request = SimpleNamespace(url=url, resource_type=resource_type)
+        self.fail = fail
+        self.fulfilled = None
+        self.aborted = False
+
+    async def fulfill(self, **kwargs):
+        if self.fail:
+            raise RuntimeError("target closed")
+        self.fulfilled = kwargs
+
+    async def abort(self):
+        self.aborted = True
+
+    async def continue_(self):
+        pass
+
+
+def _serve(monkeypatch, status=200, body=b"data", content_type=None):
+    calls = []
+
+    async def request(method, url, **kwargs):
+        calls.append(url)
+        headers = {"Content-Type": content_type} if content_type else {}
+        return SimpleNamespace(status_code=status, content=body, headers=headers)
+
+    monkeypatch.setattr(assets.http_client, "request", request)
+    return calls
+
+
+def test_content_type_comes_from_upstream_and_cache(tmp_path, monkeypatch):
+    calls = _serve(monkeypatch, content_type="image/png; charset=binary")
+    resolver = AssetResolver(DiskCache(str(tmp_path)))
+    url = "https://example.com/avatar"
+
+    first, second = FakeRoute(url, "image"), FakeRoute(url, "image")
+    asyncio.run(resolver.handle(first))
+    # 第二次命中磁盘缓存，类型由缓存文件的后缀还原
+    asyncio.run(resolver.handle(second))
+
+    assert calls == [url]
+    assert first.fulfilled["content_type"] == "image/png"
+    assert second.fulfilled == first.fulfilled
+
+
+def test_unknown_content_type_falls_back_to_url(tmp_path, monkeypatch):
+    _serve(monkeypatch)
+    resolver = AssetResolver(DiskCache(str(tmp_path)))
+    url = "https://cdn.example.com/chart.umd.min.js"
+
+    for _ in range(2):
+        route = FakeRoute(url)
+        asyncio.run(resolver.handle(route))
+        assert route.fulfilled["content_type"].endswith("javascript")
+
+
+def test_failed_download_uses_placeholder_or_aborts(tmp_path, monkeypatch):
+    _serve(monkeypatch, status=404)
+    resolver = AssetResolver(DiskCache(str(tmp_path)))
+
+    image = FakeRoute("https://example.com/a.png", "image")
+    script = FakeRoute("https://example.com/a.js")
+    asyncio.run(resolver.handle(image))
+    asyncio.run(resolver.handle(script))
+
+    assert image.fulfilled["body"] == PLACEHOLDER_IMAGE
+    assert script.aborted
+
+
+def test_handler_error_aborts_request(tmp_path, monkeypatch):
+    _serve(monkeypatch, content_type="text/css")
+    resolver = AssetResolver(DiskCache(str(tmp_path)))
+
+    route = FakeRoute("https://example.com/a.css", fail=True)
+    asyncio.run(resolver.handle(route))
+
+    assert route.aborted
+
+
+def test_bundled_chart_js_is_served_without_network(tmp_path, monkeypatch):
+    async def request(method, url, **kwargs):
+        raise AssertionError("内置资源不应访问网络")
+
+    monkeypatch.setattr(assets.http_client, "request", request)
+    resolver = AssetResolver(DiskCache(str(tmp_path)))
+    url, name = next(iter(assets.BUNDLED_ASSETS.items()))
+
+    route = FakeRoute(url)
+    asyncio.run(resolver.handle(route))
+
+    assert route.fulfilled["path"] == os.path.join(assets.STATIC_DIR, name)
+    assert route.fulfilled["content_type"] == "text/javascript"
+    assert os.path.getsize(route.fulfilled["path"]) > 0
+
+
+def test_template_references_bundled_chart_js():
+    template = os.path.join(
+        os.path.dirname(assets.STATIC_DIR), "templates", "cf_rating_chart.html"
+    )
+    with open(template, encoding="utf-8") as f:
+        content = f.read()
+    assert any(f'src="{url}"' in content for url in assets.BUNDLED_ASSETS)
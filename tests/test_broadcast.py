@@ -0,0 +1,24 @@
+import asyncio
+
+from plugins.acm.utils.broadcast import Broadcaster
+
+
+def test_on_sent_only_called_for_delivered_groups():
+    async def send(group_id: str, text: str):
+        if group_id == "bad":
+            raise RuntimeError("send failed")
+
+    broadcaster = Broadcaster(send, max_retries=1, backoff=0)
+    sent = []
+
+    result = asyncio.run(
+        broadcaster.broadcast(
+            ["g1", "bad", "skip", "g2"],
+            lambda group_id: None if group_id == "skip" else f"hi {group_id}",
+            on_sent=sent.append,
+        )
+    )
+
+    assert sorted(sent) == ["g1", "g2"]
+    assert result.sent == 2
+    assert result.failed == ["bad"]
@@ -0,0 +1,159 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from plugins.acm.platforms.codeforces import (
+    CodeforcesUser,
+    CodeforcesUserCache,
+    CodeforcesUserRating,
+)
+from plugins.acm.utils.network import FetchError
+
+
+def make_user(handle: str, rating: int) -> CodeforcesUser:
+    return CodeforcesUser(
+        handle=handle,
+        rating=rating,
+        max_rating=rating,
+        rank="",
+        max_rank="",
+        avatar="",
+        title_photo="",
+        contribution=0,
+        friend_of_count=0,
+        organization="",
+        country="",
+        city="",
+    )
+
+
+def make_rating(contest_id: int, new_rating: int) -> CodeforcesUserRating:
+    return CodeforcesUserRating(
+        contest_id=contest_id,
+        contest_name=f"Round {contest_id}",
+        handle="tourist",
+        new_rating=new_rating,
+        old_rating=0,
+        rating_update_time_seconds=1_600_000_000 + contest_id,
+        rank=1,
+    )
+
+
+class FakePlatform:
+    def __init__(self):
+        self.users: Dict[str, CodeforcesUser] = {}
+        self.history: List[CodeforcesUserRating] = []
+        self.fail_history = False
+        self.history_calls = 0
+        self.batches: List[List[str]] = []
+
+    async def get_user_info(self, handle: str) -> Optional[CodeforcesUser]:
+        return self.users.get(handle.lower())
+
+    async def get_users_info(self, handles: Iterable[str]):
+        handles = list(handles)
+        self.batches.append(handles)
+        return {h.lower(): self.users[h.lower()] for h in handles}
+
+    async def get_user_rating_history(self, handle: str, raise_on_error=False):
+        self.history_calls += 1
+        await asyncio.sleep(0)
+        if self.fail_history:
+            if raise_on_error:
+                raise FetchError("boom")
+            return []
+        return list(self.history)
+
+
+def test_failed_history_fetch_is_not_cached():
+    platform = FakePlatform()
+    platform.fail_history = True
+    cache = CodeforcesUserCache(platform)
+
+    async def run():
+        assert await cache.get_rating_history("tourist") == []
+        platform.fail_history = False
+        platform.history = [make_rating(1, 1500)]
+        # 失败没有记录获取时间，下一次请求重新获取
+        return await cache.get_rating_history("tourist")
+
+    assert [h.contest_id for h in asyncio.run(run())] == [1]
+    assert platform.history_calls == 2
+
+
+def test_failed_refresh_keeps_old_history():
+    platform = FakePlatform()
+    platform.history = [make_rating(1, 1500)]
+    cache = CodeforcesUserCache(platform)
+
+    async def run():
+        await cache.get_rating_history("tourist")
+        stamped = cache._entry("tourist").history_at
+        platform.fail_history = True
+        history = await cache.refresh_rating_history("tourist")
+        assert cache._entry("tourist").history_at == stamped
+        return history
+
+    assert [h.contest_id for h in asyncio.run(run())] == [1]
+
+
+def test_empty_history_is_cached():
+    platform = FakePlatform()
+    cache = CodeforcesUserCache(platform)
+
+    async def run():
+        assert await cache.get_rating_history("newbie") == []
+        assert await cache.get_rating_history("newbie") == []
+
+    asyncio.run(run())
+    assert platform.history_calls == 1
+
+
+def test_refresh_appends_new_contests_and_merges_concurrent_calls():
+    platform = FakePlatform()
+    platform.history = [make_rating(1, 1500)]
+    cache = CodeforcesUserCache(platform)
+
+    async def run():
+        first = await cache.get_rating_history("tourist")
+        platform.history.append(make_rating(2, 1600))
+        results = await asyncio.gather(
+            cache.refresh_rating_history("tourist"),
+            cache.refresh_rating_history("Tourist"),
+        )
+        return first, results
+
+    first, results = asyncio.run(run())
+    assert results[0] is first
+    assert [h.contest_id for h in first] == [1, 2]
+    assert platform.history_calls == 2
+
+
+def test_new_rating_in_profile_invalidates_history():
+    platform = FakePlatform()
+    platform.history = [make_rating(1, 1500)]
+    platform.users["tourist"] = make_user("tourist", 1500)
+    cache = CodeforcesUserCache(platform)
+
+    async def run():
+        await cache.get_rating_history("tourist")
+        platform.users["tourist"] = make_user("tourist", 1600)
+        await cache.refresh_user_info("tourist")
+        assert cache._entry("tourist").history_at == 0.0
+        platform.history.append(make_rating(2, 1600))
+        return await cache.get_rating_history("tourist")
+
+    assert [h.new_rating for h in asyncio.run(run())] == [1500, 1600]
+
+
+def test_get_users_info_only_fetches_missing_handles():
+    platform = FakePlatform()
+    platform.users = {"a": make_user("A", 1200), "b": make_user("b", 1300)}
+    cache = CodeforcesUserCache(platform)
+
+    async def run():
+        await cache.get_users_info(["A"])
+        return await cache.get_users_info(["a", "B", "b"])
+
+    users = asyncio.run(run())
+    assert sorted(users) == ["a", "b"]
+    assert platform.batches == [["A"], ["B"]]
@@ -0,0 +1,101 @@
+import asyncio
+
+from plugins.acm.platforms.platform import Contest
+from plugins.acm.utils.cache import ContestCache
+from plugins.acm.utils.network import FetchError
+
+
+def make_contest(contest_id: int) -> Contest:
+    return Contest(
+        id=contest_id, name=f"Round {contest_id}", url="", start_time=0, duration=0
+    )
+
+
+class FakeFetcher:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise FetchError("upstream down")
+        return [make_contest(self.calls)]
+
+
+def test_fresh_snapshot_is_served_from_memory():
+    fetcher = FakeFetcher()
+    cache = ContestCache({"cf": fetcher}, ttl=60)
+
+    async def main():
+        first = await cache.get("cf")
+        second = await cache.get("cf")
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second == [make_contest(1)]
+    assert fetcher.calls == 1
+
+
+def test_stale_snapshot_is_returned_and_refreshed_in_background():
+    fetcher = FakeFetcher()
+    cache = ContestCache({"cf": fetcher}, ttl=0)
+
+    async def main():
+        await cache.get("cf")
+        stale = await cache.get("cf")
+        await asyncio.gather(*cache._background)
+        return stale, await cache.get("cf")
+
+    stale, refreshed = asyncio.run(main())
+    assert stale == [make_contest(1)]
+    assert refreshed == [make_contest(2)]
+
+
+def test_concurrent_misses_fetch_once():
+    fetcher = FakeFetcher()
+    cache = ContestCache({"cf": fetcher}, ttl=60)
+
+    async def main():
+        return await asyncio.gather(*(cache.get("cf") for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert fetcher.calls == 1
+    assert all(r == [make_contest(1)] for r in results)
+
+
+def test_failure_keeps_last_snapshot_and_records_error():
+    fetcher = FakeFetcher()
+    cache = ContestCache({"cf": fetcher}, ttl=60)
+
+    async def main():
+        await cache.refresh("cf")
+        fetcher.fail = True
+        return await cache.refresh("cf")
+
+    assert asyncio.run(main()) == [make_contest(1)]
+    assert cache.last_error("cf") == "upstream down"
+
+
+def test_failure_without_snapshot_returns_empty_list():
+    fetcher = FakeFetcher()
+    fetcher.fail = True
+    cache = ContestCache({"cf": fetcher})
+
+    assert asyncio.run(cache.get("cf")) == []
+    assert cache.last_error("cf") == "upstream down"
+
+
+def test_managed_source_never_fetches_on_read():
+    fetcher = FakeFetcher()
+    cache = ContestCache({"cf": fetcher}, ttl=0)
+
+    async def main():
+        await cache.refresh("cf")
+        cache.managed_sources.add("cf")
+        await cache.get("cf")
+        assert not cache._background
+
+    asyncio.run(main())
+    assert fetcher.calls == 1
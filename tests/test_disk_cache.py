@@ -0,0 +1,119 @@
+import asyncio
+import os
+
+from plugins.acm.utils import disk_cache
+from plugins.acm.utils.disk_cache import DiskCache
+from plugins.acm.utils.render_cache import RenderCache, image_suffix
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"0" * 100
+JPEG = b"\xff\xd8\xff\xe0" + b"0" * 100
+
+
+def _age(cache: DiskCache, key: str, seconds: float, atime_only: bool = False):
+    path = cache._find(key)
+    st = os.stat(path)
+    atime = st.st_atime - seconds
+    mtime = st.st_mtime if atime_only else st.st_mtime - seconds
+    os.utime(path, (atime, mtime))
+
+
+def test_put_and_load_keep_suffix(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put("a", b"data", ".svg")
+
+    assert cache.load("a") == (b"data", ".svg")
+    # 另一个进程 (没有后缀记录) 也能找到文件
+    assert DiskCache(str(tmp_path)).load("a") == (b"data", ".svg")
+    assert cache.stats()["hits"] == 1
+
+
+def test_put_with_new_suffix_replaces_old_file(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put("a", PNG, ".png")
+    cache.put("a", JPEG, ".jpeg")
+
+    assert sorted(os.listdir(tmp_path)) == [".lock", "a.jpeg"]
+    assert DiskCache(str(tmp_path)).load("a") == (JPEG, ".jpeg")
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=60)
+    cache.put("a", b"data")
+    _age(cache, "a", 120)
+
+    assert cache.get("a") is None
+    assert not os.path.exists(tmp_path / "a.bin")
+
+
+def test_size_limit_is_shared_between_instances(tmp_path):
+    # 两个实例模拟共用缓存目录的两个进程，每次写入都整理目录
+    first = DiskCache(str(tmp_path), max_bytes=250, sweep_interval=0)
+    second = DiskCache(str(tmp_path), max_bytes=250, sweep_interval=0)
+    first.put("a", b"0" * 100)
+    _age(first, "a", 30, atime_only=True)
+    second.put("b", b"0" * 100)
+    _age(second, "b", 20, atime_only=True)
+    # 整理后 second 也能看到 first 写入的 a，读取后 a 成为最近使用的文件
+    assert second.get("a") is not None
+
+    first.put("c", b"0" * 100)
+
+    assert first.get("b") is None
+    assert first.get("a") is not None
+    assert sorted(os.listdir(tmp_path)) == [".lock", "a.bin", "c.bin"]
+    assert first.stats()["bytes"] == 200
+
+
+def test_lookups_and_puts_do_not_scan_directory(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path))
+    cache.put("a", b"data")
+
+    def scandir(path):
+        raise AssertionError("不应扫描缓存目录")
+
+    monkeypatch.setattr(disk_cache.os, "scandir", scandir)
+    assert cache.get("missing") is None
+    assert cache.get("a") == b"data"
+    cache.put("b", b"data", ".svg")
+    assert cache.load("b") == (b"data", ".svg")
+    assert cache.stats()["entries"] == 2
+
+
+def test_exceeding_tracked_size_triggers_sweep(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    cache.put("a", b"0" * 100)
+    _age(cache, "a", 30, atime_only=True)
+    cache.put("b", b"0" * 100)
+
+    cache.put("c", b"0" * 100)
+
+    assert cache.get("a") is None
+    assert sorted(os.listdir(tmp_path)) == [".lock", "b.bin", "c.bin"]
+    assert cache.stats()["bytes"] == 200
+
+
+def test_file_removed_elsewhere_is_a_miss(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put("a", b"data")
+    os.remove(tmp_path / "a.bin")
+
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_async_wrappers(tmp_path):
+    cache = RenderCache(str(tmp_path))
+
+    async def run():
+        await cache.put_image("k", JPEG)
+        return await cache.load_async("k")
+
+    assert asyncio.run(run()) == (JPEG, ".jpeg")
+
+
+def test_image_suffix():
+    assert image_suffix(PNG) == ".png"
+    assert image_suffix(JPEG) == ".jpeg"
+    assert image_suffix(b"RIFF\0\0\0\0WEBPVP8 ") == ".webp"
+    assert image_suffix(b"<svg/>") == ".bin"
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from plugins.acm.utils.downsample import (
+    bucket_peak_indices,
+    downsample_indices,
+    lttb_indices,
+)
+
+
+def _walk(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 1500 + np.cumsum(rng.integers(-100, 120, n))
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    y = np.zeros(100)
+    y[37] = 50
+    indices = lttb_indices(y, 10)
+
+    assert len(indices) == 10
+    assert indices[0] == 0 and indices[-1] == 99
+    assert np.all(np.diff(indices) > 0)
+    assert 37 in indices
+
+
+def test_lttb_returns_everything_when_not_reducing():
+    assert lttb_indices(np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_bucket_peaks_take_first_maximum_of_each_bucket():
+    y = np.array([1, 3, 3, 0, 5, 2, 2, 4])
+    assert bucket_peak_indices(y, 2).tolist() == [1, 4]
+
+
+@pytest.mark.parametrize("n", [10, 57, 300])
+def test_downsample_never_exceeds_budget(n):
+    y = _walk(n)
+    for budget in range(2, n + 1):
+        indices = downsample_indices(y, budget)
+        assert len(indices) <= budget
+        assert np.all(np.diff(indices) > 0)
+        assert indices[0] == 0 and indices[-1] == n - 1
+        if budget >= 4:
+            assert int(np.argmax(y)) in indices
+            assert int(np.argmin(y)) in indices
+
+
+def test_small_budget_is_clamped_to_priority_points():
+    y = np.array([5, 1, 9, 3, 7, 2, 8, 4, 6, 0])
+    assert downsample_indices(y, 3).tolist() == [0, 2, 9]
+
+
+def test_downsample_keeps_short_series_and_rejects_tiny_budget():
+    y = _walk(20)
+    assert downsample_indices(y, 50).tolist() == list(range(20))
+    with pytest.raises(ValueError):
+        downsample_indices(y, 1)
@@ -0,0 +1,180 @@
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+from httpx import Response
+
+from plugins.acm.utils import network
+from plugins.acm.utils.network import (
+    BACKOFF_MAX,
+    RETRY_BUDGET_BURST,
+    HostRateLimiter,
+    HttpClientManager,
+    Method,
+    RateLimitedError,
+    SingleFlight,
+    limited_request,
+)
+
+
+def test_close_closes_clients_of_other_loops():
+    manager = HttpClientManager()
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+    try:
+
+        async def create():
+            return manager.get_client()
+
+        other_client = asyncio.run_coroutine_threadsafe(create(), other_loop).result()
+
+        async def main():
+            own_client = manager.get_client()
+            await manager.close()
+            return own_client
+
+        own_client = asyncio.run(main())
+        assert own_client.is_closed
+        assert other_client.is_closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+
+
+def test_single_flight_merges_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"hits": 4, "misses": 1, "in_flight": 0}
+
+
+def test_single_flight_shares_exceptions_and_forgets_finished_calls():
+    flight = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(
+            flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        # 上一次调用结束后，同一个 key 会重新执行
+        with pytest.raises(ValueError):
+            await flight.do("key", fail)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_single_flight_cancelled_caller_does_not_cancel_others():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return 42
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 42
+
+
+def test_backoff_doubles_until_success(monkeypatch):
+    # 去掉抖动，取区间上限
+    monkeypatch.setattr(random, "uniform", lambda lo, hi: hi)
+    limiter = HostRateLimiter({})
+
+    delays = [limiter.on_throttled("codeforces.com") for _ in range(8)]
+    assert delays == [2, 4, 8, 16, 32, BACKOFF_MAX, BACKOFF_MAX, BACKOFF_MAX]
+
+    limiter.on_success("codeforces.com")
+    assert limiter.on_throttled("codeforces.com") == 2
+    assert limiter.on_throttled("codeforces.com", retry_after=30) == 30
+    assert limiter.stats()["backing_off"] == 1
+
+
+def test_retry_budget_is_shared_by_host():
+    limiter = HostRateLimiter({}, max_retries=2)
+
+    assert not limiter.try_retry("codeforces.com", 3)
+    allowed = [limiter.try_retry("codeforces.com", 1) for _ in range(10)]
+    assert allowed.count(True) == RETRY_BUDGET_BURST
+    assert limiter.stats()["budget_exhausted"] == 10 - RETRY_BUDGET_BURST
+    # 其他 host 的预算不受影响
+    assert limiter.try_retry("luogu.com.cn", 1)
+
+
+def test_acquire_waits_for_extended_backoff():
+    limiter = HostRateLimiter({"codeforces.com": (100, 10)})
+
+    async def run():
+        limiter._blocked_until["codeforces.com"] = time.monotonic() + 0.05
+        start = time.monotonic()
+        waiter = asyncio.ensure_future(limiter.acquire("mirror.codeforces.com"))
+        await asyncio.sleep(0.03)
+        # 等待期间又收到限流响应，退避期延长
+        limiter._blocked_until["codeforces.com"] = time.monotonic() + 0.1
+        await waiter
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.12
+
+
+def test_acquire_waits_for_tokens():
+    limiter = HostRateLimiter({"codeforces.com": (20, 1)})
+
+    async def run():
+        start = time.monotonic()
+        for host in ("codeforces.com", "mirror.codeforces.com", "codeforces.com"):
+            await limiter.acquire(host)
+        return time.monotonic() - start
+
+    # 子域名与主域名共用令牌桶，后两次各等 1/20 秒
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_throttled_response_backs_off_even_without_retry(monkeypatch):
+    monkeypatch.setattr(random, "uniform", lambda lo, hi: 0.05)
+    limiter = HostRateLimiter({}, max_retries=0)
+    monkeypatch.setattr(network, "host_limiter", limiter)
+    sent_at = []
+
+    async def request(method, url, **kwargs):
+        sent_at.append(time.monotonic())
+        return Response(429)
+
+    monkeypatch.setattr(network.http_client, "request", request)
+
+    async def run():
+        for _ in range(3):
+            with pytest.raises(RateLimitedError):
+                await limited_request(Method.GET, "https://codeforces.com/api")
+
+    asyncio.run(run())
+    assert limiter.stats()["throttled"] == 3
+    assert limiter.stats()["backing_off"] == 1
+    # 后面的请求等到退避期结束才发出
+    assert all(b - a >= 0.04 for a, b in zip(sent_at, sent_at[1:]))
@@ -0,0 +1,97 @@
+import asyncio
+
+from plugins.acm.utils.outbox import Outbox, Priority
+
+
+class FakeApi:
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+
+    async def _send(self, kind, group_id, payload):
+        if payload == "busy":
+            await self.gate.wait()
+        self.sent.append((kind, group_id, payload))
+
+    async def send_group_text(self, group_id, text, **kwargs):
+        await self._send("text", group_id, text)
+
+    async def send_group_image(self, group_id, image, **kwargs):
+        await self._send("image", group_id, image)
+
+    async def send_group_file(self, group_id, path, **kwargs):
+        await self._send("file", group_id, path)
+
+    async def post_group_forward_msg(self, group_id, forward, **kwargs):
+        await self._send("forward", group_id, forward)
+
+
+async def _run(api: FakeApi, sends):
+    """先占住群 g1，让 `sends` 中的消息都在队列里排队，再放行"""
+    outbox = Outbox(api, workers=2)
+    outbox.start()
+    try:
+        busy = asyncio.ensure_future(outbox.send_text("g1", "busy"))
+        await asyncio.sleep(0)
+        tasks = []
+        for send in sends:
+            tasks.append(asyncio.ensure_future(send(outbox)))
+            await asyncio.sleep(0)
+        api.gate.set()
+        await asyncio.gather(busy, *tasks)
+        return outbox
+    finally:
+        await outbox.stop()
+
+
+def test_texts_in_same_group_are_merged():
+    api = FakeApi()
+    outbox = asyncio.run(
+        _run(
+            api,
+            [
+                lambda o: o.send_text("g1", "A"),
+                lambda o: o.send_text("g1", "B"),
+            ],
+        )
+    )
+    assert api.sent == [("text", "g1", "busy"), ("text", "g1", "A\n\nB")]
+    assert outbox.stats()["merged"] == 1
+
+
+def test_text_is_not_merged_past_queued_image():
+    api = FakeApi()
+    asyncio.run(
+        _run(
+            api,
+            [
+                lambda o: o.send_text("g1", "A"),
+                lambda o: o.send_image("g1", "img.png"),
+                lambda o: o.send_text("g1", "C"),
+            ],
+        )
+    )
+    assert api.sent == [
+        ("text", "g1", "busy"),
+        ("text", "g1", "A"),
+        ("image", "g1", "img.png"),
+        ("text", "g1", "C"),
+    ]
+
+
+def test_interactive_messages_go_before_broadcasts():
+    api = FakeApi()
+    asyncio.run(
+        _run(
+            api,
+            [
+                lambda o: o.send_text("g1", "notice", Priority.BROADCAST),
+                lambda o: o.send_text("g1", "reply"),
+            ],
+        )
+    )
+    assert api.sent == [
+        ("text", "g1", "busy"),
+        ("text", "g1", "reply"),
+        ("text", "g1", "notice"),
+    ]
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+from plugins.acm.platforms.platform import Contest
+from plugins.acm.utils.reminder import ReminderEngine, format_lead_time
+
+LEAD = 600
+
+
+def make_contest(contest_id: int, start_in: float) -> Contest:
+    return Contest(
+        id=contest_id,
+        name=f"Round {contest_id}",
+        url="",
+        start_time=int(time.time() + LEAD + start_in),
+        duration=7200,
+    )
+
+
+def run_engine(actions, wait: float = 1.5):
+    """启动引擎，执行 actions(engine)，等待 `wait` 秒后返回触发的提醒"""
+    fired = []
+
+    async def callback(source, contest, lead):
+        fired.append((source, contest.id, lead))
+
+    async def main():
+        engine = ReminderEngine(callback, lead_times=[LEAD])
+        engine.start()
+        actions(engine)
+        await asyncio.sleep(wait)
+        await engine.stop()
+        return engine
+
+    engine = asyncio.run(main())
+    return fired, engine
+
+
+def test_reminder_fires_once_per_lead_time():
+    contest = make_contest(1, start_in=1)
+    fired, engine = run_engine(lambda e: e.sync("cf", [contest]))
+    assert fired == [("cf", 1, LEAD)]
+    assert engine.pending() == 0
+
+
+def test_unchanged_snapshot_does_not_reschedule():
+    contest = make_contest(1, start_in=1)
+
+    def actions(engine):
+        engine.sync("cf", [contest])
+        engine.sync("cf", [contest])
+
+    fired, _ = run_engine(actions)
+    assert fired == [("cf", 1, LEAD)]
+
+
+def test_rescheduled_contest_fires_only_at_new_time():
+    contest = make_contest(1, start_in=1)
+    postponed = make_contest(1, start_in=3600)
+
+    def actions(engine):
+        engine.sync("cf", [contest])
+        engine.sync("cf", [postponed])
+
+    fired, engine = run_engine(actions)
+    assert fired == []
+    assert engine.pending() == 1
+
+
+def test_removed_and_readded_contest_fires_exactly_once():
+    contest = make_contest(1, start_in=1)
+
+    def actions(engine):
+        engine.sync("cf", [contest])
+        engine.sync("cf", [])
+        engine.sync("cf", [contest])
+
+    fired, _ = run_engine(actions)
+    assert fired == [("cf", 1, LEAD)]
+
+
+def test_removed_contest_does_not_fire():
+    contest = make_contest(1, start_in=1)
+
+    def actions(engine):
+        engine.sync("cf", [contest])
+        engine.sync("cf", [])
+
+    fired, engine = run_engine(actions)
+    assert fired == []
+    assert engine.pending() == 0
+
+
+def test_format_lead_time():
+    assert format_lead_time(86400) == "1天"
+    assert format_lead_time(3600) == "1小时"
+    assert format_lead_time(600) == "10分钟"
+    assert format_lead_time(45) == "45秒"
+
+
+def test_stop_cancels_inflight_reminders():
+    started, cancelled = [], []
+
+    async def callback(source, contest, lead):
+        started.append(contest.id)
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(contest.id)
+            raise
+
+    async def main():
+        engine = ReminderEngine(callback, lead_times=[LEAD])
+        engine.start()
+        engine.sync("cf", [make_contest(1, start_in=1)])
+        await asyncio.sleep(1.5)
+        assert started == [1]
+        await engine.stop()
+        # 返回前提醒已被取消，不会在关闭存储和发送队列之后继续执行
+        assert cancelled == [1]
+        assert not engine._inflight
+
+    asyncio.run(main())
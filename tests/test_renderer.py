@@ -0,0 +1,175 @@
+import asyncio
+
+from plugins.acm.utils import renderer as renderer_module
+from plugins.acm.utils.renderer import PlaywrightRenderer
+
+PNG = b"\x89PNG\r\n\x1a\nimage"
+
+
+class FakeTarget:
+    def __init__(self, jpeg_fails: bool = False):
+        self.jpeg_fails = jpeg_fails
+        self.shots = []
+
+    async def screenshot(self, type: str, **kwargs):
+        self.shots.append(type)
+        if type == "jpeg":
+            if self.jpeg_fails:
+                raise RuntimeError("jpeg encode failed")
+            return b"\xff\xd8\xffimage"
+        return PNG
+
+
+def test_capture_falls_back_to_png_when_jpeg_fails():
+    renderer = PlaywrightRenderer()
+    target = FakeTarget(jpeg_fails=True)
+
+    data = asyncio.run(renderer._capture(target, "jpeg"))
+
+    assert data == PNG
+    assert target.shots == ["jpeg", "png"]
+    assert set(renderer.stats()["output"]) == {"png"}
+
+
+def test_capture_falls_back_to_png_when_webp_fails(monkeypatch):
+    def broken_webp(data, quality):
+        raise OSError("webp encoder not available")
+
+    monkeypatch.setattr(renderer_module, "_png_to_webp", broken_webp)
+    renderer = PlaywrightRenderer()
+    target = FakeTarget()
+
+    data = asyncio.run(renderer._capture(target, "webp"))
+
+    # 复用已有的 PNG 截图，不再截第二次
+    assert data == PNG
+    assert target.shots == ["png"]
+
+
+class FakeLocator:
+    def __init__(self, index: int):
+        self.index = index
+        self.first = self
+
+    async def count(self):
+        return 1
+
+    async def bounding_box(self):
+        return {"x": 0, "y": 0, "width": 100, "height": 50}
+
+    async def screenshot(self, type: str, **kwargs):
+        return PNG + bytes([self.index])
+
+
+class FakeFrame:
+    def __init__(self, index: int):
+        self.index = index
+
+    def locator(self, selector: str):
+        return FakeLocator(self.index)
+
+
+class FakeElement:
+    def __init__(self, index: int):
+        self.index = index
+        self.heights = []
+
+    async def content_frame(self):
+        return FakeFrame(self.index)
+
+    async def evaluate(self, script, height):
+        self.heights.append(height)
+
+
+class FakePage:
+    def __init__(self):
+        self.viewport_size = {"width": 800, "height": 600}
+        self.contents = []
+        self.elements = {}
+
+    async def set_viewport_size(self, size):
+        self.viewport_size = size
+
+    async def set_content(self, content):
+        self.contents.append(content)
+
+    async def query_selector(self, selector):
+        index = int(selector.rsplit("-", 1)[1])
+        return self.elements.setdefault(index, FakeElement(index))
+
+
+def test_render_many_uses_one_page_and_one_set_content(monkeypatch):
+    renderer = PlaywrightRenderer(image_format="png")
+    page = FakePage()
+    pooled = renderer_module._PooledPage(page=page, context=None, browser=None)
+    acquired, released = [], []
+
+    async def ensure_browser():
+        return object()
+
+    async def acquire_page(scale=1.0):
+        acquired.append(scale)
+        return pooled
+
+    async def release_page(p, healthy):
+        released.append((p, healthy))
+
+    async def wait_ready(frame):
+        # 第二段模板报错，对应位置为 None
+        return frame.index != 1
+
+    monkeypatch.setattr(renderer, "_ensure_browser", ensure_browser)
+    monkeypatch.setattr(renderer, "_acquire_page", acquire_page)
+    monkeypatch.setattr(renderer, "_release_page", release_page)
+    monkeypatch.setattr(renderer, "_wait_ready", wait_ready)
+
+    htmls = ["<p>a</p>", "<p>b</p>", '<p title="c">c</p>']
+    results = asyncio.run(renderer.render_many(htmls, viewport_width=640))
+
+    assert results == [PNG + b"\x00", None, PNG + b"\x02"]
+    assert acquired == [1.0]
+    assert released == [(pooled, True)]
+    assert len(page.contents) == 1
+    assert page.contents[0].count("<iframe") == 3
+    assert "&lt;p title=&quot;c&quot;&gt;" in page.contents[0]
+    assert page.elements[0].heights == [90]
+    assert page.viewport_size == {"width": 640, "height": 600}
+
+
+def test_recycle_waits_for_scaled_pages_on_old_browser(monkeypatch):
+    renderer = PlaywrightRenderer(pool_size=0)
+    old_browser, new_browser = object(), object()
+    closed = []
+
+    async def launch_browser():
+        return new_browser
+
+    async def new_context(browser):
+        return object()
+
+    async def close_browser(browser, context):
+        closed.append(browser)
+
+    monkeypatch.setattr(renderer, "_launch_browser", launch_browser)
+    monkeypatch.setattr(renderer, "_new_context", new_context)
+    monkeypatch.setattr(renderer, "_close_browser", close_browser)
+
+    async def scenario():
+        renderer._p = object()
+        renderer._browser, renderer._context = old_browser, object()
+        # scale=2 的单独页面有自己的上下文，只能按所属浏览器判断
+        scaled = renderer_module._PooledPage(
+            page=FakePage(), context=object(), browser=old_browser
+        )
+        renderer._active_pages.add(scaled)
+
+        task = asyncio.create_task(renderer._recycle_browser("test"))
+        await asyncio.sleep(0.3)
+        assert renderer._browser is new_browser
+        assert closed == []
+
+        renderer._active_pages.discard(scaled)
+        await task
+        assert closed == [old_browser]
+
+    asyncio.run(scenario())
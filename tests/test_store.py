@@ -0,0 +1,64 @@
+import asyncio
+
+from plugins.acm.utils.store import LocalStore
+
+
+def test_announced_contests_round_trip_and_delete(tmp_path):
+    path = str(tmp_path / "acm.db")
+
+    async def write():
+        store = LocalStore(path)
+        await store.open()
+        store.save_announced("g1", ("cf", 1), (100, 60))
+        store.save_announced("g1", ("cf", 2), (200, 60))
+        store.save_announced("g2", ("cf", 1), (100, 60))
+        await store.flush()
+        store.delete_announced_contest("g1", ("cf", 1))
+        await store.close()
+
+    async def read():
+        store = LocalStore(path)
+        await store.open()
+        try:
+            return await store.load_announced()
+        finally:
+            await store.close()
+
+    asyncio.run(write())
+    assert asyncio.run(read()) == {
+        "g1": {("cf", 2): (200, 60)},
+        "g2": {("cf", 1): (100, 60)},
+    }
+
+
+def test_delete_overrides_pending_save(tmp_path):
+    path = str(tmp_path / "acm.db")
+
+    async def main():
+        store = LocalStore(path)
+        await store.open()
+        store.save_announced("g1", ("cf", 1), (100, 60))
+        store.delete_announced_contest("g1", ("cf", 1))
+        await store.flush()
+        announced = await store.load_announced()
+        await store.close()
+        return announced
+
+    assert asyncio.run(main()) == {}
+
+
+def test_subscriptions_round_trip(tmp_path):
+    path = str(tmp_path / "acm.db")
+
+    async def main():
+        store = LocalStore(path)
+        await store.open()
+        store.save_subscription("g1", True)
+        store.save_subscription("g2", True)
+        store.save_subscription("g2", False)
+        await store.flush()
+        subscriptions = await store.load_subscriptions()
+        await store.close()
+        return subscriptions
+
+    assert asyncio.run(main()) == {"g1": True, "g2": False}